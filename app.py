@@ -1,145 +1,638 @@
+import math
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
-import requests
-from PIL import Image, ImageTk
-from io import BytesIO
-import random
-import chardet
-import os
-import json
 
-class BingeBuddy:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("BingeBuddy - Movie Recommender")
-        self.root.geometry("1100x750")
-        self.root.configure(bg="#1a1a1a")
+import instrument
+from catalog import Catalog, Watchlist, format_year, DEFAULT_CSV
+from facets import MovieQuery
+from poster_cache import PosterCache
+from posters import PosterLoader
+from prefetch import PosterPrefetcher
+from search_index import normalize as normalize_query
+from thumbnails import CARD_SIZE, POPUP_SIZE, ThumbnailPool
+from ui_scheduler import HIGH, CancelToken, UIScheduler
+from virtual_list import VirtualList
+
+POSTER_CACHE_BYTES = 200 * 1024 * 1024  # Disk budget for cached posters
+SEARCH_LIMIT = 200  # Most search results shown at once
+SEARCH_DEBOUNCE_MS = 250  # Pause in typing before a live search runs
+STREAM_BATCH = 100  # Movies added to the list per scheduler slice
+PAGE_SIZE = 100  # Movies per browse page
+WATCHLIST_FLUSH_MS = 500  # Quiet period before watchlist changes are written
+LOAD_POLL_MS = 50  # How often the UI checks on the background catalog load
+SIMILAR_LIMIT = 50  # Recommendations shown for "more like this"
+LAG_PROBE_MS = 50  # Tk event-loop lag is sampled this often while profiling
+OVERLAY_REFRESH_MS = 500
+PREFETCH_AHEAD = 20  # Off-screen cards past the rendered rows whose posters are prefetched
+POPUP_POSTER_PRIORITY = -2  # Ahead of visible cards (-1 once bumped); the popup is in front
+SORT_OPTIONS = {  # Sort combobox label -> (key, descending)
+    "Score ↓": ("score", True),
+    "Score ↑": ("score", False),
+    "Year ↓": ("year", True),
+    "Year ↑": ("year", False),
+}
+
+class MovieCard:
+    """A recyclable movie card; one instance is reused for many movies as the list scrolls"""
+
+    HEIGHT = 181  # 135px poster + padding + gap between cards
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.movie = None
+        self.ticket = None
         
-        # Initialize variables
-        self.df = None
-        self.shows_db = {}
-        self.movies_db = {}  # New dictionary to store complete movie info
-        self.watchlist = self.load_watchlist()
+        self.widget = tk.Frame(parent, bg="#1a1a1a")
+        card = tk.Frame(
+            self.widget, 
+            bg="#2a2a2a", 
+            padx=15, 
+            pady=15,
+            relief=tk.RAISED,
+            bd=0
+        )
+        card.pack(fill=tk.BOTH, expand=True, pady=(0, 8))
         
-        # Load dataset
-        self.load_dataset()
+        # Poster Frame (left side), fixed size so images don't resize the card
+        poster_frame = tk.Frame(card, bg="#2a2a2a", width=90, height=135)
+        poster_frame.pack_propagate(False)
+        poster_frame.pack(side=tk.LEFT)
         
-        # UI Setup
-        self.create_widgets()
-        self.center_window()
+        self.poster_label = tk.Label(
+            poster_frame, 
+            text="Loading...", 
+            bg="#2a2a2a", 
+            fg="white"
+        )
+        self.poster_label.pack(fill=tk.BOTH, expand=True)
         
-        # Set initial placeholder
-        self.show_placeholder("Select a genre to browse movies")
-
-    def load_watchlist(self):
-        """Load watchlist from JSON file"""
-        try:
-            if os.path.exists("watchlist.json"):
-                with open("watchlist.json", "r") as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            messagebox.showerror("Watchlist Error", f"Failed to load watchlist:\n{str(e)}")
-            return []
+        # Movie Info Frame (right side)
+        info_frame = tk.Frame(card, bg="#2a2a2a")
+        info_frame.pack(side=tk.LEFT, padx=15, fill=tk.BOTH, expand=True)
+        
+        # Title
+        self.title_label = tk.Label(
+            info_frame, 
+            font=("Helvetica", 14, "bold"),  
+            fg="white", 
+            bg="#2a2a2a",
+            anchor="w",
+            justify=tk.LEFT,
+            wraplength=500  
+        )
+        self.title_label.pack(fill=tk.X)
+        
+        # Metadata Frame (score, year, genres)
+        meta_frame = tk.Frame(info_frame, bg="#2a2a2a")
+        meta_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        # Score
+        self.score_label = tk.Label(
+            meta_frame, 
+            fg="#FFD700",
+            bg="#2a2a2a",
+            font=("Helvetica", 10)
+        )
+        self.score_label.pack(side=tk.LEFT)
+        
+        # Year
+        self.year_label = tk.Label(
+            meta_frame, 
+            fg="#aaaaaa", 
+            bg="#2a2a2a",
+            font=("Helvetica", 10)
+        )
+        self.year_label.pack(side=tk.LEFT)
+        
+        # Genres 
+        self.genres_label = tk.Label(
+            meta_frame, 
+            fg="#aaaaaa", 
+            bg="#2a2a2a",
+            font=("Helvetica", 10)
+        )
+        self.genres_label.pack(side=tk.LEFT, padx=5)
+        
+        # Watchlist Button (right side)
+        button_frame = tk.Frame(info_frame, bg="#2a2a2a")
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        tk.Button(
+            button_frame,
+            text="➕ Watchlist",
+            command=lambda: self.app.add_to_watchlist(self.movie),
+            font=("Helvetica", 10),
+            bg="#2ecc71",
+            fg="white",
+            relief=tk.FLAT
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        tk.Button(
+            button_frame,
+            text="🔍 More Like This",
+            command=lambda: self.app.show_similar(self.movie),
+            font=("Helvetica", 10),
+            bg="#3498db",
+            fg="white",
+            relief=tk.FLAT
+        ).pack(side=tk.RIGHT, padx=5)
 
-    def save_watchlist(self):
-        """Save watchlist to JSON file"""
-        try:
-            with open("watchlist.json", "w") as f:
-                json.dump(self.watchlist, f)
-        except Exception as e:
-            messagebox.showerror("Watchlist Error", f"Failed to save watchlist:\n{str(e)}")
+    def show(self, movie, priority=0):
+        """Fill the card with a movie and queue its poster"""
+        if self.ticket is not None:
+            self.ticket.cancel()
+        self.movie = movie
+        
+        self.title_label.config(text=movie['title'])
+        self.score_label.config(text=f"⭐ {movie['score']:.1f}")
+        self.year_label.config(text=f"  📅 {format_year(movie)}")
+        self.genres_label.config(text=f"  🏷️ {movie.get('genres', [])}")
+        
+        self.poster_label.config(image="", text="Loading...", bg="#2a2a2a")
+        self.poster_label.image = None
+        self.ticket = self.app.load_poster(self, movie['poster'], priority=priority)
 
-    def add_to_watchlist(self, movie):
-        """Add a movie to the watchlist"""
-        if movie not in self.watchlist:
-            self.watchlist.append(movie)
-            self.save_watchlist()
-            messagebox.showinfo("Watchlist", f"{movie['title']} added to watchlist!")
+    def show_poster(self, photo):
+        """Display a downloaded poster, or a placeholder if it failed"""
+        self.ticket = None
+        if photo is not None:
+            self.poster_label.config(image=photo, text="", bg="#2a2a2a")
+            self.poster_label.image = photo
         else:
-            messagebox.showinfo("Watchlist", f"{movie['title']} is already in your watchlist!")
+            self.poster_label.config(image="", text="Poster\nNot Available", bg="#333333")
+            self.poster_label.image = None
 
-    def remove_from_watchlist(self, movie):
-        """Remove a movie from the watchlist"""
-        self.watchlist = [m for m in self.watchlist if m['title'] != movie['title']]
-        self.save_watchlist()
-        self.show_watchlist()  # Refresh watchlist view
+class WatchlistRow:
+    """A recyclable watchlist row: selection box, movie info and actions"""
 
-    def create_watchlist_item(self, parent, movie):
-        """Create a watchlist item widget"""
+    HEIGHT = 52
+
+    def __init__(self, window, parent):
+        self.window = window
+        self.movie = None
+        
+        self.widget = tk.Frame(parent, bg="#1a1a1a")
         item_frame = tk.Frame(
-            parent,
+            self.widget,
             bg="#2a2a2a",
             padx=10,
-            pady=10,
+            pady=5,
             relief=tk.RAISED,
             bd=1
         )
-        item_frame.pack(fill=tk.X, pady=5, padx=5)
+        item_frame.pack(fill=tk.BOTH, expand=True, pady=3, padx=5)
+        
+        # Multi-select
+        self.selected = tk.BooleanVar()
+        tk.Checkbutton(
+            item_frame,
+            variable=self.selected,
+            command=lambda: self.window.set_selected(self.movie, self.selected.get()),
+            bg="#2a2a2a",
+            activebackground="#2a2a2a",
+            selectcolor="#1a1a1a"
+        ).pack(side=tk.LEFT)
         
         # Title and Info
-        genres_text = " | ".join(movie.get('genres', ['Unknown']))
-        tk.Label(
+        self.info_label = tk.Label(
             item_frame,
-            text=f"{movie['title']} (⭐ {movie['score']:.1f}, {movie['year'] if pd.notna(movie.get('year')) else 'Unknown'}, 🏷️ {genres_text})",
             font=("Helvetica", 12),
             fg="white",
             bg="#2a2a2a",
             anchor="w"
-        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        )
+        self.info_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         # Remove button
         tk.Button(
             item_frame,
             text="❌ Remove",
-            command=lambda: self.remove_from_watchlist(movie),
+            command=lambda: self.window.app.remove_from_watchlist(self.movie),
             font=("Helvetica", 10),
             bg="#e74c3c",
             fg="white",
             relief=tk.FLAT
         ).pack(side=tk.RIGHT, padx=5)
+        
+        tk.Button(
+            item_frame,
+            text="🔍 Similar",
+            command=lambda: self.window.app.show_similar(self.movie),
+            font=("Helvetica", 10),
+            bg="#3498db",
+            fg="white",
+            relief=tk.FLAT
+        ).pack(side=tk.RIGHT, padx=5)
 
-    def show_watchlist(self):
-        """Display the watchlist in a new window"""
-        if not self.watchlist:
-            messagebox.showinfo("Watchlist", "Your watchlist is empty!")
-            return
-
-        watchlist_window = tk.Toplevel(self.root)
-        watchlist_window.title("Your Watchlist")
-        watchlist_window.geometry("800x600")
-        watchlist_window.configure(bg="#1a1a1a")
+    def show(self, movie):
+        self.movie = movie
+        genres_text = " | ".join(movie.get('genres', ['Unknown']))
+        self.info_label.config(
+            text=f"{movie['title']} (⭐ {movie['score']:.1f}, {format_year(movie)}, 🏷️ {genres_text})"
+        )
+        self.selected.set(movie['uid'] in self.window.selected)
 
-        # Create scrollable canvas
-        canvas = tk.Canvas(watchlist_window, bg="#1a1a1a", highlightthickness=0)
-        scrollbar = ttk.Scrollbar(watchlist_window, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg="#1a1a1a")
+class WatchlistWindow:
+    """One persistent, virtualized watchlist window that is patched in place.
 
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+    Adding or removing a movie inserts or drops a single row; sorting and
+    bulk removal only rebind the rows on screen. Closing the window hides it.
+    """
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+    SORTS = {  # Sort combobox label -> key function (None keeps the order added)
+        "Date Added": None,
+        "Score ↓": lambda movie: _descending(movie['score']),
+        "Year ↓": lambda movie: _descending(format_year(movie)),
+        "Title": lambda movie: movie['title'].lower(),
+    }
 
-        # Add title
+    def __init__(self, app):
+        self.app = app
+        self.selected = set()  # Uids ticked for bulk removal
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Your Watchlist")
+        self.window.geometry("800x600")
+        self.window.configure(bg="#1a1a1a")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+        
+        # Header and toolbar
         tk.Label(
-            scrollable_frame,
+            self.window,
             text="Your Watchlist",
             font=("Helvetica", 16, "bold"),
             fg="#e50914",
             bg="#1a1a1a"
         ).pack(pady=10)
+        
+        toolbar = tk.Frame(self.window, bg="#1a1a1a")
+        toolbar.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        tk.Button(
+            toolbar,
+            text="✨ Recommend From My List",
+            command=app.recommend_from_watchlist,
+            font=("Helvetica", 11),
+            bg="#3498db",
+            fg="white",
+            relief=tk.FLAT,
+            padx=15
+        ).pack(side=tk.LEFT)
+        
+        tk.Button(
+            toolbar,
+            text="🗑️ Remove Selected",
+            command=self.remove_selected,
+            font=("Helvetica", 11),
+            bg="#e74c3c",
+            fg="white",
+            relief=tk.FLAT,
+            padx=15
+        ).pack(side=tk.LEFT, padx=10)
+        
+        self.sort_var = tk.StringVar(value=next(iter(self.SORTS)))
+        sort_menu = ttk.Combobox(
+            toolbar, textvariable=self.sort_var, values=list(self.SORTS),
+            state="readonly", width=10
+        )
+        sort_menu.pack(side=tk.RIGHT)
+        sort_menu.bind("<<ComboboxSelected>>", lambda event: self.resort())
+        tk.Label(
+            toolbar, text="Sort:", font=("Helvetica", 10), fg="#aaaaaa", bg="#1a1a1a"
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        self.count_label = tk.Label(
+            toolbar, font=("Helvetica", 10), fg="#aaaaaa", bg="#1a1a1a"
+        )
+        self.count_label.pack(side=tk.RIGHT, padx=10)
+        
+        # Virtualized rows
+        canvas = tk.Canvas(self.window, bg="#1a1a1a", highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.window, orient="vertical")
+        frame = tk.Frame(canvas, bg="#1a1a1a")
+        self.rows = VirtualList(
+            canvas,
+            frame,
+            scrollbar,
+            row_height=WatchlistRow.HEIGHT,
+            make_row=lambda parent: WatchlistRow(self, parent),
+            bind_row=lambda row, movie, index, visible: row.show(movie)
+        )
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        self.resort()
+
+    def show(self):
+        """Bring the window back and center it over the main window"""
+        root = self.app.root
+        x = root.winfo_x() + (root.winfo_width() // 2) - 400
+        y = root.winfo_y() + (root.winfo_height() // 2) - 300
+        self.window.geometry(f'+{x}+{y}')
+        self.window.deiconify()
+        self.window.lift()
+
+    def resort(self):
+        """Reorder the rows from the watchlist; only visible rows are rebound"""
+        key = self.SORTS.get(self.sort_var.get())
+        movies = list(self.app.watchlist)
+        if key is not None:
+            movies.sort(key=key)
+        self.rows.set_items(movies, keep_offset=True)
+        self.update_count()
+
+    def movie_added(self, movie):
+        """Insert one row where the current sort puts it"""
+        key = self.SORTS.get(self.sort_var.get())
+        items = self.rows.items
+        index = len(items)
+        if key is not None:
+            new_key = key(movie)
+            index = next((i for i, other in enumerate(items) if key(other) > new_key), len(items))
+        self.rows.insert(index, movie)
+        self.update_count()
+
+    def movies_removed(self, uids):
+        """Drop the rows of removed movies without touching the others"""
+        uids = set(uids)
+        self.selected -= uids
+        if len(uids) == 1:
+            uid = next(iter(uids))
+            index = next((i for i, movie in enumerate(self.rows.items) if movie['uid'] == uid), None)
+            if index is not None:
+                self.rows.remove(index)
+        elif uids:
+            self.rows.set_items(
+                [movie for movie in self.rows.items if movie['uid'] not in uids],
+                keep_offset=True
+            )
+        self.update_count()
+
+    def set_selected(self, movie, selected):
+        if selected:
+            self.selected.add(movie['uid'])
+        else:
+            self.selected.discard(movie['uid'])
+        self.update_count()
+
+    def remove_selected(self):
+        if self.selected:
+            self.app.remove_many_from_watchlist(list(self.selected))
+
+    def update_count(self):
+        count = len(self.rows.items)
+        text = f"{count} movie{'s' if count != 1 else ''}"
+        if self.selected:
+            text += f", {len(self.selected)} selected"
+        self.count_label.config(text=text)
+
+class DebugOverlay:
+    """Profiling overlay (F12): live histograms, hit ratios and counters, plus exports"""
+
+    def __init__(self, app):
+        self.app = app
+        self.refresh_after = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("BingeBuddy Profiler")
+        self.window.geometry("640x480")
+        self.window.configure(bg="#111111")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+        
+        toolbar = tk.Frame(self.window, bg="#111111")
+        toolbar.pack(fill=tk.X, padx=8, pady=6)
+        self.enabled_var = tk.BooleanVar(value=instrument.enabled())
+        tk.Checkbutton(
+            toolbar,
+            text="Recording",
+            variable=self.enabled_var,
+            command=self.toggle,
+            fg="white",
+            bg="#111111",
+            selectcolor="#333333",
+            activebackground="#111111"
+        ).pack(side=tk.LEFT)
+        for text, command in (("Reset", self.reset),
+                              ("Export JSON", self.export_json),
+                              ("Export Trace", self.export_trace)):
+            tk.Button(
+                toolbar,
+                text=text,
+                command=command,
+                font=("Helvetica", 10),
+                bg="#333333",
+                fg="white",
+                relief=tk.FLAT,
+                padx=10
+            ).pack(side=tk.LEFT, padx=4)
+        
+        self.text = tk.Text(
+            self.window,
+            font=("Courier", 9),
+            fg="#dddddd",
+            bg="#111111",
+            relief=tk.FLAT,
+            wrap=tk.NONE
+        )
+        self.text.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+        self.refresh()
+
+    def hide(self):
+        if self.refresh_after is not None:
+            self.window.after_cancel(self.refresh_after)
+            self.refresh_after = None
+        self.window.withdraw()
+
+    def toggle(self):
+        instrument.enable(self.enabled_var.get())
+        self.app.start_lag_probe()
+
+    def reset(self):
+        instrument.recorder.reset()
+        self.refresh()
+
+    def export_json(self):
+        self._export("profile.json", instrument.recorder.export_json)
+
+    def export_trace(self):
+        self._export("trace.json", instrument.recorder.export_chrome_trace)
+
+    def _export(self, suffix, write):
+        path = f"bingebuddy-{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+        try:
+            write(path)
+        except OSError as e:
+            messagebox.showerror("Export Failed", str(e), parent=self.window)
+            return
+        messagebox.showinfo("Exported", f"Saved {path}", parent=self.window)
+
+    def refresh(self):
+        """Redraw the summary; repeats while the overlay is open"""
+        self.refresh_after = None
+        snapshot = instrument.recorder.snapshot()
+        lines = [f"{'span / histogram':<32}{'count':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"]
+        for name, h in snapshot["histograms"].items():
+            lines.append(f"{name:<32}{h['count']:>8}{h['p50']:>9.2f}{h['p90']:>9.2f}"
+                         f"{h['p99']:>9.2f}{h['max']:>9.2f}")
+        lines.append("")
+        lines.append(f"{'cache':<32}{'hits':>8}{'misses':>9}{'ratio':>9}")
+        for name, r in snapshot["hit_ratios"].items():
+            lines.append(f"{name:<32}{r['hits']:>8}{r['misses']:>9}{r['ratio']:>9.1%}")
+        lines.append("")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:<32}{value:>8}")
+        client = self.app.poster_cache.client
+        lines.append(f"{'http.failure_rate':<32}{client.failure_rate():>8.1%}")
+        lines.append(f"{'thumbnails/sec':<32}{self.app.thumbnails.thumbnails_per_second():>8.1f}")
+        if not snapshot["enabled"]:
+            lines.insert(0, "Recording is off: tick 'Recording' to collect timings.\n")
+        
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.refresh_after = self.window.after(OVERLAY_REFRESH_MS, self.refresh)
+
+
+class BingeBuddy:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("BingeBuddy - Movie Recommender")
+        self.root.geometry("1100x750")
+        self.root.configure(bg="#1a1a1a")
+        
+        # Initialize variables
+        self.catalog = Catalog.empty()
+        self.watchlist = self.load_watchlist()
+        self.placeholder = None
+        # Time-sliced Tk work; list_token cancels whatever still feeds the list on screen
+        self.scheduler = UIScheduler(self.root)
+        self.list_token = CancelToken()
+        self.search_after = None  # Pending debounced search
+        self.last_search = None
+        self.shown_query = None
+        self.browse_query = None  # Query behind the page on screen, None for search results
+        self.page_number = 0
+        self.watchlist_flush_after = None  # Pending deferred watchlist write
+        self.watchlist_window = None  # Created on first open, then reused
+        self.loaded = False  # Set once the background catalog load has finished
+        self.load_events = queue.Queue()  # (kind, value) messages from the loader thread
+        
+        # Background poster downloads, backed by the on-disk cache; decoding
+        # and resizing run on worker processes
+        self.thumbnails = ThumbnailPool()
+        self.poster_cache = PosterCache(max_bytes=POSTER_CACHE_BYTES, thumbnails=self.thumbnails)
+        self.posters = PosterLoader(self.root, self.poster_cache, scheduler=self.scheduler)
+        self.prefetcher = PosterPrefetcher(self.root, self.posters)
+        self.last_list_offset = 0  # For the scroll direction
+        self.next_pick = None  # (query key, movie) drawn ahead of time, poster already warming
+        self.debug_overlay = None  # Created on first F12
+        self.lag_probe_after = None
+        self.root.bind("<F12>", lambda event: self.show_debug_overlay())
+        self.start_lag_probe()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # UI Setup: the window paints right away with the genre list disabled
+        self.create_widgets()
+        self.center_window()
+        self.show_placeholder("Loading movies...")
+        
+        # Load dataset in the background; the UI is filled in when it is ready
+        self.load_dataset()
+
+    def load_watchlist(self):
+        """Load the watchlist database (writes are batched, see flush_watchlist)"""
+        try:
+            return Watchlist(defer=True).load()
+        except Exception as e:
+            messagebox.showerror("Watchlist Error", f"Failed to load watchlist:\n{str(e)}")
+            return Watchlist(defer=True)
+
+    def schedule_watchlist_flush(self):
+        """Write watchlist changes shortly after the last one, in one transaction"""
+        if self.watchlist_flush_after is not None:
+            self.root.after_cancel(self.watchlist_flush_after)
+        self.watchlist_flush_after = self.root.after(WATCHLIST_FLUSH_MS, self.flush_watchlist)
+
+    def flush_watchlist(self):
+        self.watchlist_flush_after = None
+        try:
+            self.watchlist.flush()
+        except Exception as e:
+            messagebox.showerror("Watchlist Error", f"Failed to save watchlist:\n{str(e)}")
+
+    def add_to_watchlist(self, movie):
+        """Add a movie to the watchlist"""
+        added = self.watchlist.add(movie)
+        self.schedule_watchlist_flush()
+        if added and self.watchlist_window is not None:
+            self.watchlist_window.movie_added(movie)
+            
+        if added:
+            messagebox.showinfo("Watchlist", f"{movie['title']} added to watchlist!")
+        else:
+            messagebox.showinfo("Watchlist", f"{movie['title']} is already in your watchlist!")
+
+    def remove_from_watchlist(self, movie):
+        """Remove a movie from the watchlist"""
+        self.remove_many_from_watchlist([movie['uid']])
+
+    def remove_many_from_watchlist(self, uids):
+        """Remove several movies and drop just their rows from the watchlist window"""
+        uids = [uid for uid in uids if self.watchlist.remove(uid)]
+        self.schedule_watchlist_flush()
+        if self.watchlist_window is not None:
+            self.watchlist_window.movies_removed(uids)  # Refresh watchlist view
+
+    def show_watchlist(self):
+        """Open (or raise) the watchlist window"""
+        if not self.watchlist and self.watchlist_window is None:
+            messagebox.showinfo("Watchlist", "Your watchlist is empty!")
+            return
 
-        # Add watchlist items
-        for movie in self.watchlist:
-            self.create_watchlist_item(scrollable_frame, movie)
+        if self.watchlist_window is None:
+            self.watchlist_window = WatchlistWindow(self)
+        self.watchlist_window.show()
 
-        # Center the window
-        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - 400
-        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - 300
-        watchlist_window.geometry(f'+{x}+{y}')
+    def show_debug_overlay(self):
+        if self.debug_overlay is None:
+            self.debug_overlay = DebugOverlay(self)
+        self.debug_overlay.show()
+
+    def start_lag_probe(self):
+        """Sample Tk event-loop lag while profiling is on"""
+        if instrument.enabled() and self.lag_probe_after is None:
+            self.lag_probe_after = self.root.after(
+                LAG_PROBE_MS, self._lag_probed, time.perf_counter() + LAG_PROBE_MS / 1000
+            )
+
+    def _lag_probed(self, expected):
+        """How late the timer fired is how long the event loop was busy"""
+        instrument.observe("tk.loop_lag_ms", max(0.0, (time.perf_counter() - expected) * 1000))
+        self.lag_probe_after = None
+        self.start_lag_probe()
+
+    def on_close(self):
+        """Stop background work and persist the poster cache and watchlist before exiting"""
+        self.prefetcher.close()
+        self.posters.close()
+        self.thumbnails.shutdown()
+        self.scheduler.close()
+        try:
+            self.watchlist.close()
+        except Exception as e:
+            messagebox.showerror("Watchlist Error", f"Failed to save watchlist:\n{str(e)}")
+        try:
+            self.poster_cache.flush()
+        except OSError:
+            pass
+        self.poster_cache.client.close()
+        self.root.destroy()
 
     def center_window(self):
         """Center the window on screen"""
@@ -150,93 +643,78 @@ class BingeBuddy:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'+{x}+{y}')
 
-    def detect_encoding(self, file_path):
-        """Automatically detect file encoding"""
-        with open(file_path, 'rb') as f:
-            result = chardet.detect(f.read(10000))
-        return result['encoding']
-
     def load_dataset(self):
-        """Load and process the movie dataset"""
-        csv_path = "MovieGenre.csv"
-        if not os.path.exists(csv_path):
-            messagebox.showerror("File Missing", f"Could not find {csv_path} in the current directory")
-            return
+        """Load and process the movie dataset on a worker thread"""
+        threading.Thread(
+            target=self._load_dataset_worker,
+            args=(DEFAULT_CSV,),
+            name="catalog-load",
+            daemon=True
+        ).start()
+        self.root.after(LOAD_POLL_MS, self._poll_dataset)
 
+    def _load_dataset_worker(self, csv_path):
+        """Runs on the worker thread; only talks to Tk through load_events"""
+        report = lambda step: self.load_events.put(("progress", step))
         try:
-            # Try detecting encoding first
-            encoding = self.detect_encoding(csv_path)
-            
-            # Try reading with detected encoding
-            try:
-                self.df = pd.read_csv(
-                    csv_path,
-                    encoding=encoding,
-                    usecols=['Title', 'IMDB Score', 'Genre', 'Poster']
-                )
-            except:
-                # Fallback through common encodings
-                encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-                for enc in encodings:
-                    try:
-                        self.df = pd.read_csv(
-                            csv_path,
-                            encoding=enc,
-                            usecols=['Title', 'IMDB Score', 'Genre', 'Poster']
-                        )
-                        break
-                    except:
-                        continue
-            
-            # Verify data loaded successfully
-            if not hasattr(self, 'df') or self.df.empty:
-                raise ValueError("Could not read CSV file with any encoding")
-            
-            # Data Cleaning
-            self.df = self.df.dropna(subset=['Poster', 'IMDB Score'])
-            self.df['IMDB Score'] = pd.to_numeric(self.df['IMDB Score'], errors='coerce')
-            self.df['Year'] = self.df['Title'].str.extract(r'\((\d{4})\)')
-            self.df['Genres'] = self.df['Genre'].str.split('|')
-            
-            # Build genre database and movie database with all genres
-            self.shows_db = {}
-            self.movies_db = {}
-            
-            for _, row in self.df.iterrows():
-                if not isinstance(row['Genres'], list):
-                    continue
-                
-                # Create movie entry
-                title = row['Title']
-                if title not in self.movies_db:
-                    self.movies_db[title] = {
-                        'title': title,
-                        'score': row['IMDB Score'],
-                        'year': row['Year'],
-                        'poster': row['Poster'],
-                        'genres': []  # Store all genres for this movie
-                    }
-                
-                for genre in row['Genres']:
-                    genre = genre.strip()
-                    # Add to genre database
-                    if genre not in self.shows_db:
-                        self.shows_db[genre] = []
-                    self.shows_db[genre].append(self.movies_db[title])
-                    
-                    # Add to movie's genre list if not already there
-                    if genre not in self.movies_db[title]['genres']:
-                        self.movies_db[title]['genres'].append(genre)
-                    
+            catalog = Catalog.load(csv_path, progress=report)
+            report("Indexing titles")
+            catalog.search_index
+            catalog.popular_movies()
         except Exception as e:
-            messagebox.showerror("Loading Error",
-                f"Failed to load data:\n{str(e)}\n\n"
-                "Please ensure:\n"
-                "1. File is named 'MovieGenre1.csv'\n"
-                "2. Contains required columns\n"
-                "3. Is in the same folder")
-            self.shows_db = {}
-            self.movies_db = {}
+            self.load_events.put(("error", (csv_path, e)))
+            return
+        self.load_events.put(("done", catalog))
+
+    def _poll_dataset(self):
+        """Show loading progress and pick up the catalog once it is ready"""
+        try:
+            while True:
+                kind, value = self.load_events.get_nowait()
+                if kind == "progress":
+                    if self.placeholder is not None:
+                        self.placeholder.config(text=f"Loading movies... {value}")
+                elif kind == "error":
+                    self.on_dataset_error(*value)
+                    return
+                else:
+                    self.on_dataset_loaded(value)
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(LOAD_POLL_MS, self._poll_dataset)
+
+    def on_dataset_error(self, csv_path, error):
+        self.show_placeholder("No movies loaded")
+        if isinstance(error, FileNotFoundError):
+            messagebox.showerror("File Missing", f"Could not find {csv_path} in the current directory")
+            return
+        messagebox.showerror("Loading Error",
+            f"Failed to load data:\n{str(error)}\n\n"
+            "Please ensure:\n"
+            f"1. File is named '{csv_path}'\n"
+            "2. Contains required columns\n"
+            "3. Is in the same folder")
+
+    def on_dataset_loaded(self, catalog):
+        """Swap in the loaded catalog and enable the genre, filter and search controls"""
+        self.catalog = catalog
+        self.loaded = True
+        self.catalog.prepare_search()
+        self.catalog.prepare_facets()
+        
+        genres = self.catalog.genres()
+        self.genre_menu.config(values=genres or ["No genres found"], state="readonly")
+        for genre in genres:
+            var = tk.BooleanVar()
+            self.extra_genres[genre] = var
+            self.extra_genres_menu.add_checkbutton(label=genre, variable=var, command=self.load_movies)
+        
+        self.show_placeholder("Select a genre to browse movies")
+        self.prefetcher.prefetch_idle([movie['poster'] for movie in self.catalog.popular_movies()])
+        if self.search_var.get().strip():
+            # Typed while loading
+            self.search_movies()
 
     def create_widgets(self):
         """Create all UI components"""
@@ -269,8 +747,8 @@ class BingeBuddy:
         self.genre_menu = ttk.Combobox(
             control_frame, 
             textvariable=self.genre_var, 
-            values=sorted(self.shows_db.keys()) if self.shows_db else ["No genres found"], 
-            state="readonly",
+            values=["Loading..."], 
+            state="disabled",
             font=("Helvetica", 12),
             width=25
         )
@@ -311,6 +789,7 @@ class BingeBuddy:
         )
         self.search_entry.pack(side=tk.LEFT, padx=20)
         self.search_entry.bind("<Return>", self.search_movies)
+        self.search_var.trace_add("write", self.on_search_typed)
         
         tk.Button(
             control_frame, 
@@ -323,182 +802,287 @@ class BingeBuddy:
             padx=15
         ).pack(side=tk.LEFT)
         
+        self.create_filter_bar()
+        
         # Main Content Canvas
         self.canvas = tk.Canvas(self.root, bg="#1a1a1a", highlightthickness=0)
         self.scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = tk.Frame(self.canvas, bg="#1a1a1a")
         
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
+        # Only the cards on screen (plus a few either side) exist as widgets
+        self.movie_list = VirtualList(
+            self.canvas,
+            self.scrollable_frame,
+            self.scrollbar,
+            row_height=MovieCard.HEIGHT,
+            make_row=self.create_movie_card,
+            bind_row=self.bind_movie_card,
+            on_render=self.on_list_render,
+            scheduler=self.scheduler
         )
         
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        
         self.canvas.pack(side="left", fill="both", expand=True, padx=20)
         self.scrollbar.pack(side="right", fill="y")
 
-    def load_movies(self, event=None):
-        """Load movies for selected genre"""
+    def create_filter_bar(self):
+        """Extra genres, AND/OR matching, score/year ranges, sort order and the pager"""
+        filter_frame = tk.Frame(self.root, bg="#1a1a1a")
+        filter_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+        label_style = {"font": ("Helvetica", 10), "fg": "#aaaaaa", "bg": "#1a1a1a"}
+        
+        # More genres, combined with the selected one
+        self.extra_genres = {}
+        genres_button = tk.Menubutton(
+            filter_frame,
+            text="More Genres ▾",
+            font=("Helvetica", 10),
+            bg="#2a2a2a",
+            fg="white",
+            relief=tk.FLAT
+        )
+        # Filled in once the catalog has loaded
+        self.extra_genres_menu = tk.Menu(genres_button, tearoff=False)
+        genres_button.configure(menu=self.extra_genres_menu)
+        genres_button.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(filter_frame, text="Match:", **label_style).pack(side=tk.LEFT)
+        self.match_var = tk.StringVar(value="all")
+        match_menu = ttk.Combobox(
+            filter_frame, textvariable=self.match_var, values=["all", "any"],
+            state="readonly", width=4
+        )
+        match_menu.pack(side=tk.LEFT, padx=(2, 10))
+        match_menu.bind("<<ComboboxSelected>>", self.load_movies)
+        
+        # Ranges; blank means unbounded
+        self.min_score_var = tk.StringVar()
+        self.from_year_var = tk.StringVar()
+        self.to_year_var = tk.StringVar()
+        for text, var, low, high, step in (
+            ("Min ⭐", self.min_score_var, 0, 10, 0.5),
+            ("From", self.from_year_var, 1900, 2030, 1),
+            ("To", self.to_year_var, 1900, 2030, 1),
+        ):
+            tk.Label(filter_frame, text=text, **label_style).pack(side=tk.LEFT)
+            spinbox = tk.Spinbox(
+                filter_frame, textvariable=var, from_=low, to=high, increment=step,
+                width=6, command=self.load_movies
+            )
+            var.set("")
+            spinbox.pack(side=tk.LEFT, padx=(2, 10))
+            spinbox.bind("<Return>", self.load_movies)
+        
+        tk.Label(filter_frame, text="Sort:", **label_style).pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value=next(iter(SORT_OPTIONS)))
+        sort_menu = ttk.Combobox(
+            filter_frame, textvariable=self.sort_var, values=list(SORT_OPTIONS),
+            state="readonly", width=8
+        )
+        sort_menu.pack(side=tk.LEFT, padx=(2, 10))
+        sort_menu.bind("<<ComboboxSelected>>", self.load_movies)
+        
+        # Random picks favour higher scores unless unticked
+        self.weighted_pick_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            filter_frame,
+            text="🎲 Favor high scores",
+            variable=self.weighted_pick_var,
+            selectcolor="#2a2a2a",
+            activebackground="#1a1a1a",
+            **label_style
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # Pager (right side)
+        self.next_button = tk.Button(
+            filter_frame, text="Next ▶", command=lambda: self.turn_page(1),
+            font=("Helvetica", 10), bg="#2a2a2a", fg="white", relief=tk.FLAT, state=tk.DISABLED
+        )
+        self.next_button.pack(side=tk.RIGHT)
+        self.page_label = tk.Label(filter_frame, text="", width=8, **label_style)
+        self.page_label.pack(side=tk.RIGHT)
+        self.prev_button = tk.Button(
+            filter_frame, text="◀ Prev", command=lambda: self.turn_page(-1),
+            font=("Helvetica", 10), bg="#2a2a2a", fg="white", relief=tk.FLAT, state=tk.DISABLED
+        )
+        self.prev_button.pack(side=tk.RIGHT)
+
+    def current_query(self):
+        """The browse query described by the genre menu and the filter bar"""
         genre = self.genre_var.get()
-        if not genre or genre not in self.shows_db:
+        genres = [genre] if self.catalog.has_genre(genre) else []
+        genres += [name for name, var in self.extra_genres.items() if var.get()]
+        sort, descending = SORT_OPTIONS.get(self.sort_var.get(), ("score", True))
+        return MovieQuery(
+            genres=genres,
+            match_all=self.match_var.get() != "any",
+            min_score=_number(self.min_score_var.get(), float),
+            min_year=_number(self.from_year_var.get(), int),
+            max_year=_number(self.to_year_var.get(), int),
+            sort=sort,
+            descending=descending
+        )
+
+    def load_movies(self, event=None):
+        """Load the first page of movies for the selected genres and filters"""
+        if not self.catalog.movies:
             return
             
+        self.show_page(self.current_query(), 0)
+
+    def turn_page(self, step):
+        """Show the next (1) or previous (-1) page of the current browse query"""
+        if self.browse_query is not None:
+            self.show_page(self.browse_query, self.page_number + step)
+
+    def show_page(self, query, number):
+        self.posters.cancel_all()
         self.show_placeholder("Loading movies...")
-        self.root.after(100, lambda: self._load_movies_async(genre))
+        # Cancelled if a search or another genre replaces the list first
+        self.scheduler.submit(
+            lambda: self._load_movies_async(query, number),
+            HIGH,
+            self.list_token
+        )
 
-    def _load_movies_async(self, genre):
-        """Async loading of movies"""
+    def _load_movies_async(self, query, number):
+        """Fetch and show one page, run from the scheduler"""
         try:
-            # Clear previous movies
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-            
-            # Load movies for selected genre
-            for movie in self.shows_db[genre]:
-                self.create_movie_card(movie)
-                
-            if not self.scrollable_frame.winfo_children():
-                self.show_placeholder("No movies found for this genre")
+            # Only the requested page is ever fetched and rendered
+            page = self.catalog.query(query, number, PAGE_SIZE)
+            if page:
+                self.show_movies(page.movies)
+            else:
+                self.show_placeholder("No movies match these filters")
+            self.update_pager(query, page)
                 
         except Exception as e:
             self.show_placeholder(f"Error loading movies: {str(e)}")
 
-    def create_movie_card(self, movie):
-        """Create a movie card widget with genre information"""
-        card = tk.Frame(
-            self.scrollable_frame, 
-            bg="#2a2a2a", 
-            padx=15, 
-            pady=15,
-            relief=tk.RAISED,
-            bd=0
+    def update_pager(self, query=None, page=None):
+        """Point the pager at a browse page, or disable it for search results"""
+        self.browse_query = query
+        self.page_number = page.number if page is not None else 0
+        self.page_label.config(text=f"Page {page.number + 1}" if page is not None else "")
+        self.prev_button.config(
+            state=tk.NORMAL if page is not None and page.number > 0 else tk.DISABLED
         )
-        card.pack(fill=tk.X, pady=8)
-        
-        # Poster Frame (left side)
-        poster_frame = tk.Frame(card, bg="#2a2a2a")
-        poster_frame.pack(side=tk.LEFT)
-        
-        # Poster Loading Placeholder
-        poster_placeholder = tk.Label(
-            poster_frame, 
-            text="Loading...", 
-            bg="#2a2a2a", 
-            fg="white",
-            width=10,  
-            height=8   
+        self.next_button.config(
+            state=tk.NORMAL if page is not None and page.has_next else tk.DISABLED
         )
-        poster_placeholder.pack()
-        
-        # Load poster async
-        self.root.after(100, lambda: self.load_poster(poster_frame, movie['poster']))
-        
-        # Movie Info Frame (right side)
-        info_frame = tk.Frame(card, bg="#2a2a2a")
-        info_frame.pack(side=tk.LEFT, padx=15, fill=tk.BOTH, expand=True)
-        
-        # Title
-        tk.Label(
-            info_frame, 
-            text=movie['title'], 
-            font=("Helvetica", 14, "bold"),  
-            fg="white", 
-            bg="#2a2a2a",
-            anchor="w",
-            wraplength=500  
-        ).pack(fill=tk.X)
-        
-        # Metadata Frame (score, year, genres)
-        meta_frame = tk.Frame(info_frame, bg="#2a2a2a")
-        meta_frame.pack(fill=tk.X, pady=(5, 0))
-        
-        # Score
-        tk.Label(
-            meta_frame, 
-            text=f"⭐ {movie['score']:.1f}", 
-            fg="#FFD700",
-            bg="#2a2a2a",
-            font=("Helvetica", 10)
-        ).pack(side=tk.LEFT)
-        
-        # Year
-        tk.Label(
-            meta_frame, 
-            text=f"  📅 {movie['year'] if pd.notna(movie['year']) else 'Unknown'}", 
-            fg="#aaaaaa", 
-            bg="#2a2a2a",
-            font=("Helvetica", 10)
-        ).pack(side=tk.LEFT)
-        
-        # Genres 
-       
-        genres_text = movie.get('genres',[])
-        tk.Label(
-            meta_frame, 
-            text=f"  🏷️ {genres_text}", 
-            fg="#aaaaaa", 
-            bg="#2a2a2a",
-            font=("Helvetica", 10)
-        ).pack(side=tk.LEFT, padx=5)
-        
-        # Watchlist Button (right side)
-        button_frame = tk.Frame(info_frame, bg="#2a2a2a")
-        button_frame.pack(fill=tk.X, pady=(5, 0))
-        
-        tk.Button(
-            button_frame,
-            text="➕ Watchlist",
-            command=lambda: self.add_to_watchlist(movie),
-            font=("Helvetica", 10),
-            bg="#2ecc71",
-            fg="white",
-            relief=tk.FLAT
-        ).pack(side=tk.RIGHT, padx=5)
 
-    def load_poster(self, frame, url):
-        """Load and display movie poster (smaller size)"""
-        try:
-            # Clear placeholder
-            for widget in frame.winfo_children():
-                widget.destroy()
-            
-            # Download and resize image (smaller size)
-            response = requests.get(url, timeout=10)
-            img = Image.open(BytesIO(response.content))
-            img = img.resize((90, 135), Image.LANCZOS)  # Smaller size
-            photo = ImageTk.PhotoImage(img)
-            
-            # Display image
-            label = tk.Label(frame, image=photo, bg="#2a2a2a")
-            label.image = photo
-            label.pack()
-            
-        except Exception as e:
-            # Show placeholder if error
-            for widget in frame.winfo_children():
-                widget.destroy()
-            tk.Label(
-                frame, 
-                text="Poster\nNot Available", 
-                bg="#333333",
-                fg="white",
-                width=10,
-                height=8
-            ).pack()
+    def create_movie_card(self, parent):
+        """Create an empty, reusable movie card for the list view"""
+        with instrument.span("ui.create_card"):
+            return MovieCard(self, parent)
+
+    def bind_movie_card(self, card, movie, index, visible):
+        """Point a recycled card at another movie"""
+        with instrument.span("ui.bind_card"):
+            card.show(movie, priority=0 if visible else index)
+
+    def load_poster(self, card, url, size=CARD_SIZE, priority=0):
+        """Queue a poster download for a card (smaller size)"""
+        return self.posters.request(url, size, card.show_poster, priority=priority)
+
+    def on_list_render(self):
+        """Prioritise posters for cards that scrolled into view and prefetch the next ones"""
+        for card in self.movie_list.visible_rows():
+            if card.ticket is not None:
+                self.posters.bump(card.ticket, -1)
+        self.prefetch_ahead()
+
+    def prefetch_ahead(self):
+        """Warm the cache for the cards just past the rendered rows, in the scroll direction"""
+        movie_list = self.movie_list
+        visible = movie_list.visible_range()
+        if movie_list.offset >= self.last_list_offset:
+            start = visible.stop + movie_list.overscan
+            ahead = movie_list.items[start:start + PREFETCH_AHEAD]
+        else:
+            stop = max(0, visible.start - movie_list.overscan)
+            ahead = movie_list.items[max(0, stop - PREFETCH_AHEAD):stop][::-1]
+        self.last_list_offset = movie_list.offset
+        self.prefetcher.prefetch_ahead([movie['poster'] for movie in ahead])
+
+    def show_similar(self, movie):
+        """List the movies most like one movie"""
+        if movie is None or not self.catalog.movies:
+            return
+        self.show_recommendations(
+            self.catalog.similar(movie, k=SIMILAR_LIMIT),
+            f"No similar movies found for {movie['title']}"
+        )
+
+    def recommend_from_watchlist(self):
+        """List the movies most like the whole watchlist"""
+        if not self.catalog.movies:
+            return
+        self.show_recommendations(
+            self.catalog.recommend(list(self.watchlist), k=SIMILAR_LIMIT),
+            "Add movies from the catalog to your watchlist to get recommendations"
+        )
+
+    def show_recommendations(self, movies, empty_text):
+        self.posters.cancel_all()
+        self.update_pager()
+        if movies:
+            self.show_movies(movies)
+        else:
+            self.show_placeholder(empty_text)
 
     def random_movie(self):
-        """Recommend a random movie"""
-        if not self.movies_db:
-            messagebox.showwarning("No Data", "No movies loaded!")
+        """Recommend a random movie matching the genre and score filters, skipping the watchlist"""
+        if not self.catalog.movies:
+            if self.loaded:
+                messagebox.showwarning("No Data", "No movies loaded!")
+            else:
+                messagebox.showinfo("Loading", "Movies are still loading, try again in a moment.")
+            return
+            
+        browse = self.current_query()
+        query = MovieQuery(
+            genres=browse.genres,
+            match_all=browse.match_all,
+            min_score=browse.min_score,
+            min_year=browse.min_year,
+            max_year=browse.max_year
+        )
+        key = (query.key(), self.weighted_pick_var.get())
+        movie = self.take_next_pick(key) or self.pick_random(query)
+        if movie is None:
+            messagebox.showinfo("Random Pick", "No movies match these filters!")
             return
             
-        # Pick random movie
-        movie = random.choice(list(self.movies_db.values()))
         self.show_movie_popup(movie)
+        self.prepare_next_pick(query, key)
+
+    def pick_random(self, query):
+        return self.catalog.random_pick(
+            query=query,
+            weighted=self.weighted_pick_var.get(),
+            exclude_uids=self.watchlist.uids()
+        )
+
+    def take_next_pick(self, key):
+        """The pick drawn after the last popup, if the filters are unchanged and it is still wanted"""
+        next_pick, self.next_pick = self.next_pick, None
+        if next_pick is None or next_pick[0] != key or next_pick[1]['uid'] in self.watchlist:
+            return None
+        return next_pick[1]
+
+    def prepare_next_pick(self, query, key):
+        """Draw the next pick now and warm its poster while the user looks at this one"""
+        movie = self.pick_random(query)
+        if movie is not None:
+            self.next_pick = (key, movie)
+            # Pinned: list changes while the popup is open must not drop it
+            self.posters.warm(
+                movie['poster'],
+                POPUP_SIZE,
+                lambda ok: None,
+                POPUP_POSTER_PRIORITY + 1,
+                pinned=True
+            )
 
     def show_movie_popup(self, movie):
         """Show movie details in popup (with smaller poster)"""
@@ -530,27 +1114,25 @@ class BingeBuddy:
         poster_frame = tk.Frame(content_frame, bg="#1a1a1a")
         poster_frame.pack(pady=10)
         
-        # Try loading poster 
-        try:
-            response = requests.get(movie['poster'], timeout=5)
-            img = Image.open(BytesIO(response.content))
-            img = img.resize((150, 225), Image.LANCZOS)  
-            photo = ImageTk.PhotoImage(img)
-            tk.Label(
-                poster_frame, 
-                image=photo, 
-                bg="#1a1a1a"
-            ).pack()
-            popup.photo = photo
-        except:
-            tk.Label(
-                poster_frame, 
-                text="Poster\nNot Available", 
-                bg="#333333",
-                fg="white",
-                width=15,
-                height=10
-            ).pack()
+        # Placeholder until the poster arrives from the cache or the network
+        poster_label = tk.Label(
+            poster_frame, 
+            text="Loading\nposter...", 
+            bg="#333333",
+            fg="white",
+            width=15,
+            height=10
+        )
+        poster_label.pack()
+        ticket = self.posters.request(
+            movie['poster'],
+            POPUP_SIZE,
+            lambda photo: self.show_popup_poster(poster_label, photo),
+            priority=POPUP_POSTER_PRIORITY,
+            pinned=True
+        )
+        # Pinned, so searching or browsing behind the popup keeps its poster coming
+        popup.bind("<Destroy>", lambda event: event.widget is popup and ticket.cancel())
         
         # Movie details
         tk.Label(
@@ -566,7 +1148,7 @@ class BingeBuddy:
         genres_text = movie.get('genres', [])
         tk.Label(
             content_frame, 
-            text=f"⭐ {movie['score']:.1f} | 📅 {movie['year'] if pd.notna(movie['year']) else 'Unknown'} | 🏷️ {genres_text}", 
+            text=f"⭐ {movie['score']:.1f} | 📅 {format_year(movie)} | 🏷️ {genres_text}", 
             font=("Helvetica", 10),  
             fg="#aaaaaa", 
             bg="#1a1a1a"
@@ -598,42 +1180,109 @@ class BingeBuddy:
             pady=3
         ).pack(pady=5)
 
-    def search_movies(self, event):
+    def show_popup_poster(self, label, photo):
+        """Swap the popup's placeholder for the poster (called by the poster loader)"""
+        if photo is None:
+            label.config(text="Poster\nNot Available")
+            return
+        label.config(
+            image=photo,
+            text="",
+            bg="#1a1a1a",
+            width=POPUP_SIZE[0],
+            height=POPUP_SIZE[1]
+        )
+        label.photo = photo
+
+    def on_search_typed(self, *args):
+        """Run a live search once typing pauses"""
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DEBOUNCE_MS, self.search_movies)
+
+    def search_movies(self, event=None):
         """Search movies by title"""
-        query = self.search_var.get().lower()
-        if not query:
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+            
+        query = normalize_query(self.search_var.get())
+        if not query or not self.catalog.movies:
+            return
+        if query == self.shown_query:
             return
             
-        # Clear previous movies
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        # Cancel posters for the previous results
+        self.posters.cancel_all()
         
-        # Search across all movies
-        found_movies = []
+        # A longer version of the last query only needs to recheck its results
+        results = self.catalog.search(query, limit=SEARCH_LIMIT, previous=self.last_search)
+        self.last_search = results
         
-        for movie in self.movies_db.values():
-            if query in movie['title'].lower():
-                found_movies.append(movie)
+        found_movies = self.catalog.movies_at(results)
+        self.update_pager()
 
         # Display results
         if found_movies:
-            for movie in found_movies:
-                self.create_movie_card(movie)
+            self.show_movies(found_movies)
         else:
             self.show_placeholder(f"No movies found for '{query}'")
+        self.shown_query = query
+
+    def clear_movies(self):
+        """Remove the placeholder and every card from the movie list"""
+        # Stops any batches still streaming into the old list
+        self.list_token.cancel()
+        self.list_token = CancelToken()
+        self.shown_query = None
+        if self.placeholder is not None:
+            self.placeholder.destroy()
+            self.placeholder = None
+        self.movie_list.clear()
+
+    def show_movies(self, movies):
+        """Stream a list of movies into the card view in time-sliced batches"""
+        self.clear_movies()
+        with instrument.span("ui.show_movies", movies=len(movies)):
+            self.movie_list.set_items(movies[:STREAM_BATCH])
+        if len(movies) > STREAM_BATCH:
+            self.scheduler.submit(self._stream_movies(movies), token=self.list_token)
+
+    def _stream_movies(self, movies):
+        """Append the remaining movies one batch per scheduler slice"""
+        for start in range(STREAM_BATCH, len(movies), STREAM_BATCH):
+            with instrument.span("ui.stream_movies"):
+                self.movie_list.extend(movies[start:start + STREAM_BATCH])
+            yield
 
     def show_placeholder(self, text):
         """Show placeholder text when no movies are displayed"""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        self.clear_movies()
         
-        tk.Label(
+        self.placeholder = tk.Label(
             self.scrollable_frame, 
             text=text, 
             font=("Helvetica", 14), 
             fg="white", 
             bg="#1a1a1a"
-        ).pack(pady=50)
+        )
+        self.placeholder.pack(pady=50)
+
+def _descending(value):
+    """Sort key putting high numbers first and missing ones ('Unknown', NaN) last"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return float("inf")
+    return -value if value == value else float("inf")
+
+def _number(text, cast):
+    """Parse a filter field; blank, invalid or non-finite (inf, nan) means no bound"""
+    try:
+        value = float(text)
+        return cast(value) if math.isfinite(value) else None
+    except (OverflowError, ValueError):
+        return None
 
 if __name__ == "__main__":
     root = tk.Tk()
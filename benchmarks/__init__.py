@@ -0,0 +1 @@
+"""Offline benchmark harness for BingeBuddy (run with ``python -m benchmarks.run``)."""
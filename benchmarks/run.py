@@ -0,0 +1,484 @@
+"""Run the BingeBuddy benchmarks and write machine-readable results.
+
+Everything runs offline: datasets come from ``benchmarks.synthetic`` and
+posters from a local ``benchmarks.stub_server``. Ingest and search run in a
+fresh interpreter per dataset size so peak RSS is measured cleanly. The card
+rendering benchmark needs a display; run it under Xvfb, e.g.
+``xvfb-run python -m benchmarks.run``. It is skipped (and recorded as
+skipped) otherwise.
+
+    python -m benchmarks.run --out results/before.json
+    python -m benchmarks.run --sizes 10000,100000,1000000 --out results/after.json
+    python -m benchmarks.run --compare results/before.json results/after.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.stub_server import PosterServer
+from benchmarks.synthetic import generate_csv, query_mix
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "mean_ms": float(values.mean()),
+    }
+
+
+# ---- child processes ------------------------------------------------------
+
+def child_ingest(csv_path, use_snapshot, streaming=False):
+    from catalog import Catalog
+
+    start = time.perf_counter()
+    catalog = Catalog.load(csv_path, use_snapshot=use_snapshot, streaming=streaming)
+    return {
+        "seconds": time.perf_counter() - start,
+        "warm": catalog.warm,
+        "phases": catalog.timings,
+        "movies": len(catalog),
+        "genres": len(catalog.genres()),
+        "table_mb": catalog.table.nbytes / (1024 * 1024),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def child_search(csv_path, query_count):
+    from catalog import Catalog
+
+    catalog = Catalog.load(csv_path)
+
+    start = time.perf_counter()
+    index = catalog.search_index
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    index.prepare_fuzzy()
+    fuzzy = time.perf_counter() - start
+
+    queries = query_mix(catalog.table.titles(), query_count)
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        catalog.search(query)
+        samples.append(time.perf_counter() - start)
+
+    # "More like this" for single movies (uncached) and a 50-title watchlist
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    similarity = catalog.similarity
+    similar_build = time.perf_counter() - start
+    similar_samples = []
+    for i in rng.choice(len(catalog), size=min(200, len(catalog)), replace=False).tolist():
+        start = time.perf_counter()
+        similarity.similar([i], 20, exclude=[i])
+        similar_samples.append(time.perf_counter() - start)
+    watchlist = catalog.movies_at(rng.choice(len(catalog), size=min(50, len(catalog)), replace=False))
+    start = time.perf_counter()
+    catalog.recommend(list(watchlist), 20)
+    recommend = time.perf_counter() - start
+
+    return {
+        "index_build_seconds": build,
+        "fuzzy_build_seconds": fuzzy,
+        "latency": percentiles(samples),
+        "similar_build_seconds": similar_build,
+        "similar_latency": percentiles(similar_samples),
+        "recommend_50_seconds": recommend,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(*args):
+    """Run one benchmark in a fresh interpreter and return its JSON result"""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--child", *map(str, args)],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ---- benchmarks -----------------------------------------------------------
+
+def bench_ingest(csv_path):
+    from ingest import store_path
+    from snapshot import snapshot_path
+
+    if os.path.exists(snapshot_path(csv_path)):
+        os.remove(snapshot_path(csv_path))
+    results = {
+        "csv_only": run_child("ingest", csv_path, "no-snapshot"),
+        "cold": run_child("ingest", csv_path, "snapshot"),
+        "warm": run_child("ingest", csv_path, "snapshot"),
+    }
+
+    # Chunked ingest through the on-disk store: from scratch, then with ~1% more rows
+    # appended (the CSV is restored afterwards so later benchmarks see the same data)
+    store_files = [store_path(csv_path) + suffix for suffix in ("", "-wal", "-shm")]
+    size = os.path.getsize(csv_path)
+    os.remove(snapshot_path(csv_path))
+    try:
+        results["streamed"] = run_child("ingest", csv_path, "stream")
+        with open(csv_path, "rb") as f:
+            f.readline()
+            rows = f.readlines()
+        with open(csv_path, "ab") as f:
+            f.writelines(row.replace(b" (", b" Redux (", 1) for row in rows[:max(1, len(rows) // 100)])
+        results["streamed_append"] = run_child("ingest", csv_path, "stream")
+    finally:
+        os.truncate(csv_path, size)
+        for path in store_files:
+            if os.path.exists(path):
+                os.remove(path)
+    return results
+
+
+def bench_posters(base_url, count, worker_counts):
+    """Poster fetch + decode throughput through the cache, cold and warm"""
+    from poster_cache import PosterCache
+
+    results = {}
+    for workers in worker_counts:
+        cache_dir = tempfile.mkdtemp(prefix="bb-posters-")
+        urls = [f"{base_url}/{i}.jpg" for i in range(count)]
+        try:
+            for phase in ("cold", "warm"):
+                # A new instance each phase so the in-memory LRU starts empty
+                cache = PosterCache(cache_dir)
+                failures = 0
+                start = time.perf_counter()
+                with ThreadPoolExecutor(workers) as pool:
+                    for ok in pool.map(lambda url: _fetch_ok(cache, url), urls):
+                        failures += not ok
+                elapsed = time.perf_counter() - start
+                cache.flush()
+                cache.client.close()
+                results[f"{workers}_workers_{phase}"] = {
+                    "posters_per_second": count / elapsed,
+                    "seconds": elapsed,
+                    "failures": failures,
+                    "cache": dict(cache.stats),
+                    "http": dict(cache.client.stats,
+                                 failure_rate=cache.client.failure_rate(),
+                                 latency=cache.client.latency_percentiles()),
+                }
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def bench_thumbnails(count, worker_counts):
+    """Thumbnails per second from full-size JPEGs: in-thread vs. the process pool"""
+    from benchmarks.stub_server import make_posters
+    from thumbnails import ThumbnailPool
+
+    posters = make_posters(size=(600, 890))
+    results = {}
+    for workers in [0, *worker_counts]:
+        pool = ThumbnailPool(workers)
+        try:
+            pool.render(posters[0])  # Start the worker processes outside the timing
+            pool.stats.update(decodes=0, thumbnails=0, busy_seconds=0.0)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max(1, workers) * 2) as threads:
+                list(threads.map(lambda i: pool.render(posters[i % len(posters)]), range(count)))
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        results[f"{workers}_processes"] = {
+            "thumbnails_per_second": pool.stats["thumbnails"] / elapsed,
+            "seconds": elapsed,
+            "stats": dict(pool.stats),
+        }
+    return results
+
+
+def bench_server(csv_path, worker_counts, clients=8, query_count=500):
+    """Search queries per second through the catalog server, per worker process count"""
+    from catalog import Catalog
+    from catalog_server import CatalogClient, CatalogServer
+
+    queries = query_mix(Catalog.load(csv_path).table.titles(), query_count)
+
+    results = {}
+    for workers in worker_counts:
+        socket_dir = tempfile.mkdtemp(prefix="bb-server-")
+        address = os.path.join(socket_dir, "catalog.sock")
+
+        def run_client(_):
+            with CatalogClient(address) as client:
+                for query in queries:
+                    client.search(query)
+
+        try:
+            with CatalogServer(csv_path, address, workers):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(clients) as pool:
+                    list(pool.map(run_client, range(clients)))
+                elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+        results[f"{workers}_workers"] = {
+            "clients": clients,
+            "queries_per_second": clients * len(queries) / elapsed,
+        }
+    return results
+
+
+def _fetch_ok(cache, url):
+    try:
+        cache.get_image(url, (90, 135))
+        return True
+    except Exception:
+        return False
+
+
+def bench_render(csv_path, pages=50):
+    """Cards bound per second while scrolling the genre view (needs a display)"""
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        return {"skipped": "no DISPLAY (run under xvfb-run)"}
+
+    import tkinter as tk
+
+    workdir = tempfile.mkdtemp(prefix="bb-render-")
+    shutil.copy(csv_path, os.path.join(workdir, "MovieGenre.csv"))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from app import BingeBuddy
+
+        root = tk.Tk()
+        root.geometry("1100x750")
+        start = time.perf_counter()
+        app = BingeBuddy(root)
+        root.update()
+        startup = time.perf_counter() - start
+        while not app.loaded:
+            root.update()
+            time.sleep(0.005)
+        catalog_ready = time.perf_counter() - start
+
+        bound = [0]
+        bind = app.bind_movie_card
+
+        def counting_bind(*args):
+            bound[0] += 1
+            bind(*args)
+
+        app.movie_list.bind_row = counting_bind
+        genre = max(app.catalog.genres(), key=lambda g: len(app.catalog.movies_in_genre(g)))
+        movies = app.catalog.movies_in_genre(genre)
+
+        start = time.perf_counter()
+        app.show_movies(movies)
+        root.update()
+        first_paint = time.perf_counter() - start
+        while len(app.movie_list.items) < len(movies):
+            root.update()
+        fully_listed = time.perf_counter() - start
+
+        viewport = app.canvas.winfo_height()
+        bound[0] = 0
+        start = time.perf_counter()
+        for page in range(1, pages + 1):
+            app.movie_list.scroll_to(page * viewport)
+            root.update_idletasks()
+        scroll = time.perf_counter() - start
+
+        widgets = _count_widgets(root)
+        app.on_close()
+        return {
+            "genre": genre,
+            "movies": len(movies),
+            "startup_seconds": startup,
+            "catalog_ready_seconds": catalog_ready,
+            "first_paint_seconds": first_paint,
+            "full_list_seconds": fully_listed,
+            "cards_per_second": bound[0] / scroll if scroll else None,
+            "widgets_alive": widgets,
+            "scheduler": dict(app.scheduler.stats),
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _count_widgets(widget):
+    return 1 + sum(_count_widgets(child) for child in widget.winfo_children())
+
+
+# ---- comparison -----------------------------------------------------------
+
+def flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = flatten(json.load(f)["results"])
+    with open(new_path) as f:
+        new = flatten(json.load(f)["results"])
+
+    width = max((len(key) for key in old.keys() | new.keys()), default=10)
+    print(f"{'metric':<{width}}  {'old':>12}  {'new':>12}  {'change':>8}")
+    for key in sorted(old.keys() | new.keys()):
+        a, b = old.get(key), new.get(key)
+        change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else ""
+        print(f"{key:<{width}}  {_fmt(a):>12}  {_fmt(b):>12}  {change:>8}")
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+
+# ---- entry point ----------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BingeBuddy benchmarks")
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="comma-separated CSV row counts (default: %(default)s)")
+    parser.add_argument("--queries", type=int, default=2000, help="search queries per size")
+    parser.add_argument("--posters", type=int, default=200, help="posters per fetch run")
+    parser.add_argument("--workers", default="1,4,8", help="poster worker counts")
+    parser.add_argument("--thumbnails", type=int, default=400, help="posters per thumbnail run")
+    parser.add_argument("--processes", default="1,2,4", help="thumbnail process counts")
+    parser.add_argument("--server-workers", default="1,2,4", help="catalog server worker counts")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub server latency (s)")
+    parser.add_argument("--skip", default="",
+                        help="comma-separated: ingest,search,posters,thumbnails,server,render")
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="print metric changes between two result files")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        mode, csv_path, *rest = args.child
+        if mode == "ingest":
+            result = child_ingest(csv_path, use_snapshot=rest[0] == "snapshot",
+                                  streaming=rest[0] == "stream")
+        else:
+            result = child_search(csv_path, int(rest[0]))
+        print(json.dumps(result))
+        return 0
+
+    if args.compare:
+        try:
+            compare(*args.compare)
+        except BrokenPipeError:
+            pass
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    skip = set(filter(None, args.skip.split(",")))
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="bb-bench-")
+
+    with PosterServer(latency=args.latency) as server:
+        try:
+            for size in sizes:
+                csv_path = os.path.join(workdir, f"movies_{size}.csv")
+                start = time.perf_counter()
+                generate_csv(csv_path, size, poster_base=server.base_url)
+                print(f"[{size} rows] generated in {time.perf_counter() - start:.1f}s",
+                      file=sys.stderr)
+
+                if "ingest" not in skip:
+                    results.setdefault("ingest", {})[str(size)] = bench_ingest(csv_path)
+                    print(f"[{size} rows] ingest done", file=sys.stderr)
+                if "search" not in skip:
+                    results.setdefault("search", {})[str(size)] = run_child(
+                        "search", csv_path, args.queries
+                    )
+                    print(f"[{size} rows] search done", file=sys.stderr)
+
+            if "posters" not in skip:
+                workers = [int(w) for w in args.workers.split(",") if w]
+                results["posters"] = bench_posters(server.base_url, args.posters, workers)
+                print("posters done", file=sys.stderr)
+
+            if "thumbnails" not in skip:
+                processes = [int(p) for p in args.processes.split(",") if p]
+                results["thumbnails"] = bench_thumbnails(args.thumbnails, processes)
+                print("thumbnails done", file=sys.stderr)
+
+            if "server" not in skip and sizes and hasattr(socket, "AF_UNIX"):
+                csv_path = os.path.join(workdir, f"movies_{sizes[-1]}.csv")
+                counts = [int(w) for w in args.server_workers.split(",") if w]
+                results["server"] = bench_server(csv_path, counts)
+                print("server done", file=sys.stderr)
+
+            if "render" not in skip and sizes:
+                csv_path = os.path.join(workdir, f"movies_{sizes[0]}.csv")
+                results["render"] = bench_render(csv_path)
+                print("render done", file=sys.stderr)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "compare")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
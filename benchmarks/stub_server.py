@@ -0,0 +1,119 @@
+"""Local HTTP server that serves generated poster JPEGs with configurable latency."""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+
+def make_posters(count=8, size=(300, 445)):
+    """A handful of distinct JPEGs the server rotates through"""
+    from PIL import Image, ImageDraw
+
+    posters = []
+    for i in range(count):
+        image = Image.new("RGB", size, (40 + i * 25 % 200, 30, 90 + i * 17 % 150))
+        draw = ImageDraw.Draw(image)
+        for y in range(0, size[1], 12):
+            draw.line([(0, y), (size[0], y + i * 7)], fill=(200, 180 - i * 10, 60), width=3)
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        posters.append(buffer.getvalue())
+    return posters
+
+
+class PosterServer:
+    """Serves ``/posters/<n>.jpg``; every request waits ``latency`` (+ jitter) seconds.
+
+    Supports ETag revalidation and can fail a fraction of requests with 404
+    to mimic dead image URLs.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.posters = make_posters()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                delay = server.latency + random.uniform(0, server.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+
+                name = self.path.rsplit("/", 1)[-1]
+                digest = int(hashlib.md5(name.encode()).hexdigest(), 16)
+                if (digest % 1000) / 1000 < server.failure_rate:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = server.posters[digest % len(server.posters)]
+                etag = f'"{digest % len(server.posters)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/posters"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve stub posters for BingeBuddy")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = PosterServer(args.latency, args.jitter, args.failure_rate, port=args.port)
+    print(f"Serving posters at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
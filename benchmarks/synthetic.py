@@ -0,0 +1,103 @@
+"""Synthetic MovieGenre.csv files shaped like the real IMDB dump."""
+import argparse
+import csv
+import random
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "Film-Noir", "Game-Show",
+    "History", "Horror", "Music", "Musical", "Mystery", "News", "Reality-TV",
+    "Romance", "Sci-Fi", "Short", "Sport", "Talk-Show", "Thriller", "War",
+    "Western", "Adult",
+]
+
+# Roughly the real skew: a few genres dominate
+GENRE_WEIGHTS = [
+    9, 5, 3, 3, 14, 7, 6, 22, 3, 3, 1, 1, 2, 5, 2, 1, 3, 1, 1, 8, 3, 3, 1, 1, 5, 2, 1, 1,
+]
+
+WORDS = """
+love night dark man city story last day war girl king time house blood dead
+life world star black summer secret lost return island river road queen
+shadow heart fire ghost dream wild journey home American little big great
+red white blue golden final silent hidden broken brother sister father
+mother family friend stranger angel devil kiss money murder street
+""".split()
+
+ACCENTED = ["Amélie", "Café", "Señor", "Noël", "Über", "Déjà Vu"]
+
+
+def movie_title(rng):
+    words = rng.sample(WORDS, rng.randint(1, 4))
+    if rng.random() < 0.02:
+        words.append(rng.choice(ACCENTED))
+    title = " ".join(word.capitalize() for word in words)
+    if rng.random() < 0.3:
+        title = "The " + title
+    return f"{title} ({rng.randint(1915, 2017)})"
+
+
+def generate_csv(path, rows, poster_base="http://127.0.0.1:8765/posters", seed=0,
+                 duplicate_rate=0.02, missing_rate=0.01, encoding="latin-1"):
+    """Write ``rows`` movies to ``path`` and return the list of titles written"""
+    rng = random.Random(seed)
+    titles = []
+    with open(path, "w", encoding=encoding, errors="replace", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["imdbId", "Imdb Link", "Title", "IMDB Score", "Genre", "Poster"])
+        for i in range(rows):
+            if titles and rng.random() < duplicate_rate:
+                # The real file repeats some titles with different genres
+                title = rng.choice(titles)
+            else:
+                title = movie_title(rng)
+                titles.append(title)
+
+            genres = rng.choices(GENRES, weights=GENRE_WEIGHTS, k=rng.randint(1, 3))
+            genre = "|".join(dict.fromkeys(genres))
+            score = round(min(9.9, max(1.0, rng.gauss(6.3, 1.1))), 1)
+            poster = f"{poster_base}/{i}.jpg"
+
+            # Missing values the loader has to drop
+            if rng.random() < missing_rate:
+                score = ""
+            if rng.random() < missing_rate:
+                poster = ""
+
+            writer.writerow([100000 + i, f"http://www.imdb.com/title/tt{100000 + i}", title,
+                             score, genre, poster])
+    return titles
+
+
+def query_mix(titles, count, seed=0):
+    """Search queries like a user would type: prefixes, words, substrings and typos"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        title = rng.choice(titles).lower()
+        words = title.split()
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(title[:rng.randint(1, min(8, len(title)))])
+        elif kind < 0.6:
+            queries.append(" ".join(rng.sample(words, min(len(words), 2))))
+        elif kind < 0.8:
+            start = rng.randint(0, max(0, len(title) - 4))
+            queries.append(title[start:start + 4])
+        else:
+            word = list(max(words, key=len))
+            if len(word) > 3:
+                i = rng.randint(0, len(word) - 2)
+                word[i], word[i + 1] = word[i + 1], word[i]
+            queries.append("".join(word))
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic MovieGenre.csv")
+    parser.add_argument("path")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--poster-base", default="http://127.0.0.1:8765/posters")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_csv(args.path, args.rows, args.poster_base, args.seed)
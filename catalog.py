@@ -0,0 +1,643 @@
+"""UI-free movie catalog: dataset loading, genre index, search, random picks and the watchlist.
+
+Nothing here imports tkinter, PIL or requests, and pandas/chardet are only
+imported when a CSV actually has to be parsed, so a warm start from the
+snapshot (and the CLI) stays fast and works on headless machines. Movies
+live in a column-oriented ``MovieTable``; the intermediate DataFrames are
+dropped as soon as it is built. CSVs too large for memory are streamed
+through the on-disk store in ``ingest`` instead.
+"""
+from __future__ import annotations
+
+import io
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+import ingest
+import instrument
+import snapshot
+from facets import FacetIndex, MovieQuery, ResultPage
+from movie_table import MISSING_YEAR, Movie, MovieList, MovieTable, uid_of
+from sampler import RandomPicker
+from search_index import SearchIndex, SearchResults, normalize
+from similar import SimilarityIndex
+
+DEFAULT_CSV = "MovieGenre.csv"
+DEFAULT_WATCHLIST = "watchlist.db"
+LEGACY_WATCHLIST = "watchlist.json"
+STREAMING_MIN_BYTES = 512 << 20  # CSVs this large are ingested in chunks by default
+POPULAR_GENRES = 6  # Largest genres whose top titles count as likely next picks
+POPULAR_PER_GENRE = 20
+RECENT_PICKS = 20  # Random picks that are not repeated
+CACHED_PICKERS = 16  # Filters whose random-pick tables are kept
+
+
+NO_MOVIES = np.empty(0, dtype=np.int32)
+
+
+class CatalogError(Exception):
+    """The dataset could not be loaded"""
+
+
+def format_year(movie: Mapping) -> str:
+    """Year for display; older watchlists store a missing year as NaN"""
+    year = movie.get('year')
+    if year is None or (isinstance(year, float) and math.isnan(year)):
+        return 'Unknown'
+    return str(year)
+
+
+def read_csv(csv_path: str, timings: Dict[str, float]):
+    """Read the CSV once, decoding it with the detected encoding or the first fallback that fits"""
+    import pandas as pd
+
+    start = time.perf_counter()
+    with open(csv_path, 'rb') as f:
+        raw = f.read()
+    timings['read'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoding = ingest.detect_encoding(raw)
+    timings['detect'] = time.perf_counter() - start
+
+    # Decoding in memory is cheap; only the text that decodes is parsed
+    text = ingest.decode(raw, encoding)
+    del raw
+    timings['decode'] = time.perf_counter() - start - timings['detect']
+    if text is None:
+        return None
+
+    start = time.perf_counter()
+    df = pd.read_csv(io.StringIO(text), usecols=ingest.CSV_COLUMNS)
+    timings['parse'] = time.perf_counter() - start
+    return df
+
+
+def build_index(df, timings: Dict[str, float]):
+    """Clean the raw CSV frame and build (MovieTable, genre index) with vectorized ops"""
+    import pandas as pd
+
+    # Data Cleaning
+    start = time.perf_counter()
+    df = ingest.clean_frame(df)
+    timings['clean'] = time.perf_counter() - start
+
+    # One row per (title, genre) pair, in CSV order
+    start = time.perf_counter()
+    pairs = ingest.genre_pairs(df)
+
+    # Each title keeps its first row; movie ids follow CSV order
+    first = ingest.first_rows(df, pairs)
+    del df
+    n_movies = len(first)
+    pair_movies = first.index.get_indexer(pairs['Title']).astype(np.int32)
+    genre_codes, genre_names = pd.factorize(pairs['Genre'])
+
+    # ...and the union of its genres. Grouping by sorting the movie ids is
+    # far cheaper than groupby().agg(list) with tens of thousands of groups.
+    unique = ~pairs.duplicated().to_numpy()
+    del pairs
+    order = np.argsort(pair_movies[unique], kind='stable')
+    movie_genres = _split_sorted(pair_movies[unique][order], genre_codes[unique][order])
+
+    table = MovieTable.from_columns(
+        first.index.tolist(),
+        first['Poster'].tolist(),
+        first['IMDB Score'].to_numpy(dtype=np.float64),
+        pd.to_numeric(first['Year']).fillna(MISSING_YEAR).to_numpy(dtype=np.int16),
+        movie_genres,
+        genre_names.tolist()
+    )
+    del first
+
+    # Genre index: each genre's distinct movie ids, ascending, however often
+    # a title is repeated in the CSV
+    keys = np.unique(genre_codes[unique].astype(np.int64) * n_movies + pair_movies[unique])
+    genre_index = dict(zip(
+        genre_names.tolist(),
+        _split_sorted(keys // n_movies, (keys % n_movies).astype(np.int32))
+    ))
+    timings['index'] = time.perf_counter() - start
+    return table, genre_index
+
+
+def _split_sorted(keys, values):
+    """Split ``values`` into one array per run of equal (sorted) ``keys``"""
+    if not len(keys):
+        return []
+    return np.split(values, np.flatnonzero(np.diff(keys)) + 1)
+
+
+class Catalog:
+    """The loaded movies plus a genre index and a title search index"""
+
+    def __init__(self, table: MovieTable, genre_index: Dict[str, np.ndarray],
+                 timings: Optional[Dict[str, float]] = None, warm: bool = False,
+                 cold_seconds: Optional[float] = None):
+        self.table = table
+        self.genre_index = genre_index  # Genre -> its distinct movie ids, ascending
+        self.movies: MovieList = table.movies()  # Search index order
+        self.timings = timings or {}
+        self.warm = warm
+        self.cold_seconds = cold_seconds
+        self._search_index: Optional[SearchIndex] = None
+        self._facets: Optional[FacetIndex] = None
+        self._similarity: Optional[SimilarityIndex] = None
+        self._title_order: Optional[np.ndarray] = None
+        self._popular: Optional[MovieList] = None
+        self._pickers: "OrderedDict[tuple, RandomPicker]" = OrderedDict()
+        self.recent_picks: deque = deque(maxlen=RECENT_PICKS)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def empty(cls) -> "Catalog":
+        return cls(MovieTable.empty(), {})
+
+    @classmethod
+    def load(cls, csv_path: str = DEFAULT_CSV, use_snapshot: bool = True,
+             progress: Optional[Callable[[str], None]] = None,
+             streaming: Optional[bool] = None) -> "Catalog":
+        """Load from the snapshot when it is fresh, otherwise parse the CSV (and snapshot it).
+
+        ``progress`` is called with a short description as each step starts;
+        it runs on the loading thread. ``streaming`` ingests the CSV in chunks
+        through the on-disk store (by default only for very large files);
+        rows appended to the CSV since the last ingest are all that is parsed.
+        """
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(csv_path)
+        report = progress or (lambda step: None)
+        if streaming is None:
+            streaming = os.path.getsize(csv_path) >= STREAMING_MIN_BYTES
+
+        # Warm start: reuse the snapshot from a previous run if the CSV is unchanged
+        load_start = time.perf_counter()
+        snapshot_file = snapshot.snapshot_path(csv_path)
+        if use_snapshot:
+            report("Opening snapshot")
+            with instrument.span("catalog.snapshot_load"):
+                cached = snapshot.load_snapshot(snapshot_file, csv_path)
+            if cached is not None:
+                table, genre_index, header = cached
+                timings = {'snapshot': time.perf_counter() - load_start}
+                return cls(table, genre_index, timings, warm=True,
+                           cold_seconds=header.get('build_seconds'))
+
+        if streaming:
+            return cls._load_streaming(csv_path, snapshot_file, report, load_start)
+
+        timings = {}
+        try:
+            report("Reading CSV")
+            with instrument.span("catalog.read_csv"):
+                df = read_csv(csv_path, timings)
+            if df is None or df.empty:
+                raise ValueError("Could not read CSV file with any encoding")
+            report("Building catalog")
+            with instrument.span("catalog.build_index", rows=len(df)):
+                table, genre_index = build_index(df, timings)
+            del df
+        except (OSError, ValueError, KeyError) as e:
+            raise CatalogError(str(e)) from e
+
+        # Save a snapshot so the next launch can skip all of the above
+        build_seconds = time.perf_counter() - load_start
+        if use_snapshot:
+            try:
+                report("Saving snapshot")
+                snapshot_start = time.perf_counter()
+                with instrument.span("catalog.snapshot_write"):
+                    snapshot.write_snapshot(snapshot_file, csv_path, table, genre_index, build_seconds)
+                timings['snapshot'] = time.perf_counter() - snapshot_start
+            except (OSError, ValueError):
+                pass
+        return cls(table, genre_index, timings, cold_seconds=build_seconds)
+
+    @classmethod
+    def attach(cls, csv_path: str = DEFAULT_CSV) -> "Catalog":
+        """Map the snapshot that another process (e.g. the catalog server) keeps fresh.
+
+        Never parses the CSV or writes anything; the table is a read-only
+        mapping shared with every other process that has the snapshot open.
+        """
+        start = time.perf_counter()
+        loaded = snapshot.load_snapshot(snapshot.snapshot_path(csv_path), csv_path)
+        if loaded is None:
+            raise CatalogError(f"No up-to-date snapshot of {csv_path} to attach to")
+        table, genre_index, header = loaded
+        return cls(table, genre_index, {'snapshot': time.perf_counter() - start}, warm=True,
+                   cold_seconds=header.get('build_seconds'))
+
+    @classmethod
+    def _load_streaming(cls, csv_path: str, snapshot_file: str,
+                        report: Callable[[str], None], load_start: float) -> "Catalog":
+        """Ingest new CSV rows into the store, then export and map it as a snapshot"""
+        timings = {}
+        try:
+            start = time.perf_counter()
+            with ingest.MovieStore(ingest.store_path(csv_path)) as store:
+                with instrument.span("catalog.ingest"):
+                    sha1 = store.ingest(csv_path, progress=report)
+                timings['ingest'] = time.perf_counter() - start
+
+                report("Saving snapshot")
+                start = time.perf_counter()
+                with snapshot.SnapshotWriter(snapshot_file, csv_path, sha1) as writer, \
+                        instrument.span("catalog.export"):
+                    movies, genres = store.export(writer)
+                    build_seconds = time.perf_counter() - load_start
+                    writer.commit(movies, genres, build_seconds)
+                timings['snapshot'] = time.perf_counter() - start
+
+            report("Opening snapshot")
+            loaded = snapshot.load_snapshot(snapshot_file, csv_path)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            raise CatalogError(str(e)) from e
+        if loaded is None:
+            raise CatalogError(f"{csv_path} changed while it was being ingested")
+        table, genre_index, _ = loaded
+        return cls(table, genre_index, timings, cold_seconds=build_seconds)
+
+    def describe_load(self) -> str:
+        """One-line summary of how the catalog was loaded and how long it took"""
+        if self.warm:
+            return "Warm start: loaded {} movies in {} genres from snapshot in {:.0f}ms{}".format(
+                len(self.table),
+                len(self.genre_index),
+                self.timings['snapshot'] * 1000,
+                f" (cold start took {self.cold_seconds * 1000:.0f}ms)" if self.cold_seconds else ""
+            )
+        return "Cold start: loaded {} movies in {} genres in {:.0f}ms ({})".format(
+            len(self.table),
+            len(self.genre_index),
+            (self.cold_seconds or 0) * 1000,
+            ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.timings.items())
+        )
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def id_of(self, movie: Mapping) -> Optional[int]:
+        """Movie id of one of our movies, or of a saved movie dict (looked up by title)"""
+        if isinstance(movie, Movie) and movie.table is self.table:
+            return movie.id
+        return self.find_title(movie['title'])
+
+    def find_title(self, title: str) -> Optional[int]:
+        """Id of the movie with exactly this title, by binary search over the sorted titles"""
+        with self._lock:
+            if self._title_order is None:
+                titles = self.table.titles()
+                self._title_order = np.array(
+                    sorted(range(len(titles)), key=titles.__getitem__), dtype=np.int32
+                )
+            order = self._title_order
+
+        strings = self.table.strings
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if strings[order[mid]] < title:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and strings[order[lo]] == title:
+            return int(order[lo])
+        return None
+
+    # ---- genres -----------------------------------------------------------
+
+    def genres(self) -> List[str]:
+        return sorted(self.genre_index)
+
+    def has_genre(self, genre: str) -> bool:
+        return genre in self.genre_index
+
+    def movies_in_genre(self, genre: str) -> MovieList:
+        return self.table.movies(self.genre_index.get(genre, NO_MOVIES))
+
+    def count_in_genre(self, genre: str) -> int:
+        return len(self.genre_index.get(genre, NO_MOVIES))
+
+    def top_in_genre(self, genre: str, n: int = 10) -> MovieList:
+        """Highest-scored movies in a genre"""
+        ids = self.genre_index.get(genre, NO_MOVIES)
+        scores = np.nan_to_num(self.table.scores[ids], nan=-np.inf)
+        return self.table.movies(ids[np.argsort(-scores, kind='stable')[:n]])
+
+    def popular_movies(self) -> MovieList:
+        """Top-scored movies of the largest genres, interleaved genre by genre (built once)"""
+        with self._lock:
+            if self._popular is not None:
+                return self._popular
+        largest = sorted(self.genre_index, key=lambda genre: -len(self.genre_index[genre]))
+        tops = [self.top_in_genre(genre, POPULAR_PER_GENRE).ids.tolist()
+                for genre in largest[:POPULAR_GENRES]]
+        ids = dict.fromkeys(i for rank in zip(*tops) for i in rank)
+        ids.update(dict.fromkeys(i for top in tops for i in top))  # Genres with fewer titles
+        popular = self.table.movies(np.fromiter(ids, dtype=np.int32, count=len(ids)))
+        with self._lock:
+            self._popular = popular
+        return popular
+
+    def with_genres(self, genres: List[str], match_all: bool = True) -> MovieList:
+        """Movies tagged with all (or any) of ``genres``, via the genre bitsets"""
+        return self.table.movies(np.flatnonzero(self.table.match_genres(genres, match_all)))
+
+    # ---- faceted browsing -------------------------------------------------
+
+    @property
+    def facets(self) -> FacetIndex:
+        """Sorted per-genre orders, built on first use"""
+        with self._lock:
+            if self._facets is None:
+                self._facets = FacetIndex(self.table, self.genre_index)
+            return self._facets
+
+    def prepare_facets(self, background: bool = True) -> None:
+        """Sort every genre by score now, or on a background thread"""
+        facets = self.facets
+        if background:
+            threading.Thread(target=facets.prepare, daemon=True).start()
+        else:
+            facets.prepare()
+
+    def query(self, query: MovieQuery, page: int = 0, page_size: int = 50) -> ResultPage:
+        """One sorted page of the movies matching ``query``"""
+        with instrument.span("catalog.query", page=page):
+            return self.facets.page(query, page, page_size)
+
+    # ---- search -----------------------------------------------------------
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Title index, built on first use"""
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.table.titles(), self.table.scores)
+            return self._search_index
+
+    def prepare_search(self, background: bool = True) -> None:
+        """Build the search index now, and its fuzzy part on a background thread"""
+        index = self.search_index
+        if background:
+            threading.Thread(target=index.prepare_fuzzy, daemon=True).start()
+        else:
+            index.prepare_fuzzy()
+
+    def search(self, query: str, limit: int = 200,
+               previous: Optional[SearchResults] = None) -> SearchResults:
+        """Ranked title positions; narrows ``previous`` when the query extends it"""
+        index = self.search_index
+        with instrument.span("catalog.search"):
+            if (previous is not None and previous.complete
+                    and normalize(query).startswith(previous.query)):
+                instrument.count("catalog.search_refined")
+                return index.refine(previous, query, limit)
+            return index.search(query, limit)
+
+    def find(self, query: str, limit: int = 200) -> MovieList:
+        """Movies matching a title query, best first"""
+        return self.movies_at(self.search(query, limit))
+
+    def movies_at(self, ids) -> MovieList:
+        return self.table.movies(np.asarray(ids, dtype=np.int32))
+
+    # ---- more like this ---------------------------------------------------
+
+    @property
+    def similarity(self) -> SimilarityIndex:
+        """Similarity index, built on first use"""
+        with self._lock:
+            if self._similarity is None:
+                self._similarity = SimilarityIndex(self.table)
+            return self._similarity
+
+    def similar(self, movie: Mapping, k: int = 20) -> MovieList:
+        """Movies most like ``movie``: same genres, close score and year"""
+        i = self.id_of(movie)
+        if i is None:
+            return self.table.movies(NO_MOVIES)
+        with instrument.span("catalog.similar"):
+            ids, _ = self.similarity.similar([i], k)
+        return self.table.movies(ids)
+
+    def recommend(self, movies: List[Mapping], k: int = 20) -> MovieList:
+        """Movies most like a whole list (e.g. the watchlist), scored in one pass"""
+        ids = [i for i in map(self.id_of, movies) if i is not None]
+        with instrument.span("catalog.recommend", seeds=len(ids)):
+            ids, _ = self.similarity.similar(ids, k)
+        return self.table.movies(ids)
+
+    # ---- random pick ------------------------------------------------------
+
+    def picker(self, query: Optional[MovieQuery] = None, weighted: bool = False) -> RandomPicker:
+        """Sampling table for the movies matching ``query``, cached per filter"""
+        key = (query.key() if query is not None else None, weighted)
+        with self._lock:
+            picker = self._pickers.get(key)
+            instrument.hit("catalog.pickers", picker is not None)
+            if picker is not None:
+                self._pickers.move_to_end(key)
+                return picker
+
+        ids = self.movies.ids if query is None else self.facets.matching(query)
+        picker = RandomPicker(self.table, ids, weighted, self.recent_picks)
+        with self._lock:
+            self._pickers[key] = picker
+            while len(self._pickers) > CACHED_PICKERS:
+                self._pickers.popitem(last=False)
+        return picker
+
+    def random_pick(self, rng: Optional[random.Random] = None, query: Optional[MovieQuery] = None,
+                    weighted: bool = False, exclude_uids=()) -> Optional[Movie]:
+        """A random movie matching ``query``, optionally favouring higher scores.
+
+        Movies in ``exclude_uids`` (e.g. the watchlist's ``uids()``) and the
+        last few picks are skipped while anything else is left.
+        """
+        with instrument.span("catalog.random_pick"):
+            i = self.picker(query, weighted).pick(rng, exclude_uids)
+        return None if i is None else self.table.movie(i)
+
+
+class Watchlist:
+    """The user's saved movies, keyed by their stable uid and stored in SQLite.
+
+    Membership checks and set operations work on integer uids, which stay
+    valid when the CSV is edited or reloaded. Movies added from the catalog
+    are kept as the catalog's own ``Movie`` views; a small record of each is
+    saved next to its uid so the list can be shown before (or without) the
+    catalog. Changes are written in one transaction per ``flush()``; with
+    ``defer=False`` every add/remove flushes immediately. SQLite commits are
+    atomic, so a crash loses at most the unflushed changes, never the list.
+    Older title-keyed databases, and a legacy ``watchlist.json`` next to a
+    new database, are imported on first open.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str = DEFAULT_WATCHLIST, legacy_path: Optional[str] = LEGACY_WATCHLIST,
+                 defer: bool = False, flush_every: int = 500):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.defer = defer
+        self.flush_every = flush_every
+        self.movies: "OrderedDict[int, Mapping]" = OrderedDict()  # Uid -> movie, oldest first
+        self._pending: Dict[int, Optional[Mapping]] = {}  # Uid -> movie to save, or None to delete
+        self._next_position = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+    def load(self) -> "Watchlist":
+        """Open the database and read the watchlist (a missing file is an empty list)"""
+        db = self._connect()
+        rows = db.execute("SELECT uid, position, movie FROM entries ORDER BY position").fetchall()
+        self.movies = OrderedDict((uid, json.loads(movie)) for uid, _, movie in rows)
+        self._next_position = rows[-1][1] + 1 if rows else 0
+        self._pending.clear()
+        return self
+
+    def add(self, movie: Mapping) -> bool:
+        """Add a movie; False if it is already there"""
+        uid = uid_of(movie)
+        if uid in self.movies:
+            return False
+        self.movies[uid] = movie
+        self._changed(uid, movie)
+        return True
+
+    def add_many(self, movies) -> int:
+        """Add several movies in one write; returns how many were new"""
+        with self._batch():
+            return sum(self.add(movie) for movie in movies)
+
+    def remove(self, uid: int) -> bool:
+        """Remove a movie by uid; False if it was not there"""
+        if self.movies.pop(uid, None) is None:
+            return False
+        self._changed(uid, None)
+        return True
+
+    def remove_many(self, uids) -> int:
+        """Remove several movies in one write; returns how many were removed"""
+        with self._batch():
+            return sum(self.remove(uid) for uid in uids)
+
+    def uids(self) -> set:
+        return set(self.movies)
+
+    def flush(self) -> None:
+        """Write pending changes in a single transaction"""
+        if not self._pending:
+            return
+        db = self._connect()
+        saves = []
+        for uid, movie in self._pending.items():
+            if movie is not None:
+                saves.append((uid, self._next_position, json.dumps(_record(movie))))
+                self._next_position += 1
+        with db:
+            db.executemany(
+                "DELETE FROM entries WHERE uid = ?",
+                [(uid,) for uid, movie in self._pending.items() if movie is None]
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO entries (uid, position, movie) VALUES (?, ?, ?)", saves
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Flush and close the database"""
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self.movies
+
+    def __iter__(self) -> Iterator[Mapping]:
+        return iter(self.movies.values())
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    # ---- storage ----------------------------------------------------------
+
+    def _changed(self, uid: int, movie: Optional[Mapping]) -> None:
+        # Latest change per movie, in the order the changes happened
+        self._pending.pop(uid, None)
+        self._pending[uid] = movie
+        if not self.defer or len(self._pending) >= self.flush_every:
+            self.flush()
+
+    @contextmanager
+    def _batch(self):
+        """Defer flushing until the end of a bulk change"""
+        defer, self.defer = self.defer, True
+        try:
+            yield
+        finally:
+            self.defer = defer
+            if not defer:
+                self.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "uid INTEGER PRIMARY KEY, position INTEGER NOT NULL, movie TEXT NOT NULL)"
+                )
+            self._db = db
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version < self.SCHEMA_VERSION:
+                self._import_legacy(version)
+        return self._db
+
+    def _import_legacy(self, version: int) -> None:
+        """Copy movies from the title-keyed table (version 1) or the old JSON watchlist, once"""
+        db = self._db
+        movies = []
+        if version == 1:
+            rows = db.execute("SELECT movie FROM watchlist ORDER BY position").fetchall()
+            movies = [json.loads(movie) for movie, in rows]
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, "r") as f:
+                movies = json.load(f)
+        with db:
+            rows = {}
+            for movie in movies:
+                uid = uid_of(movie)
+                rows.setdefault(uid, (uid, len(rows), json.dumps(_record(movie))))
+            db.executemany(
+                "INSERT OR IGNORE INTO entries (uid, position, movie) VALUES (?, ?, ?)",
+                rows.values()
+            )
+            db.execute("DROP TABLE IF EXISTS watchlist")
+            db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+
+def _record(movie: Mapping) -> dict:
+    """What the watchlist saves of a movie: its uid and what the list shows"""
+    return {
+        'uid': uid_of(movie),
+        'title': movie['title'],
+        'score': movie.get('score'),
+        'year': movie.get('year'),
+        'poster': movie.get('poster'),
+        'genres': list(movie.get('genres', [])),
+    }
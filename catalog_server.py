@@ -0,0 +1,346 @@
+"""Local catalog service: one catalog per host, queried by many front-ends.
+
+``CatalogServer`` loads the catalog once (writing the snapshot if needed),
+builds the search index and the sorted genre orders, then starts a pool of
+worker processes that all ``accept`` on one listening socket (a Unix socket
+path, or ``host:port``). Where ``fork`` is available the workers inherit the
+loaded catalog: the table stays a read-only ``mmap`` of the snapshot and the
+prebuilt indexes are shared copy-on-write (``gc.freeze`` keeps the collector
+from touching them), so memory is paid once per host while queries run on
+every core. Elsewhere each worker maps the snapshot itself with
+``Catalog.attach``, which shares the table through the page cache.
+
+The protocol is one JSON object per line each way. A request names a CLI
+command that only needs the catalog (genres, top, browse, search, random,
+similar) and its arguments; the response is ``{"ok": true, "result":
+[records]}`` or ``{"ok": false, "error": message}``. Only the arguments in
+``COMMAND_ARGS`` are taken from a request, so clients cannot reach the
+CLI's file options (``--file``, ``--watchlist``), and result counts are
+capped at ``MAX_RESULTS`` so one request cannot tie up a worker.
+``CatalogClient`` wraps it, and ``cli.py --server ADDRESS`` sends any of
+those commands to a server.
+
+There is no authentication: a Unix socket is protected by its file
+permissions, and TCP addresses must be on the loopback interface.
+
+Processes on the same host that only read can skip the socket and
+``Catalog.attach`` the snapshot the server keeps up to date.
+"""
+import argparse
+import gc
+import ipaddress
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import cli
+import instrument
+from catalog import DEFAULT_CSV, Catalog, CatalogError
+
+DEFAULT_ADDRESS = "bingebuddy.sock"
+COMMAND_ARGS = {  # Command -> the arguments a request may set, with their defaults
+    "genres": {},
+    "top": {"genre": None, "n": 10},
+    "browse": {
+        "genre": None, "any": False, "min_score": None, "max_score": None, "from_year": None,
+        "to_year": None, "sort": "score", "asc": False, "page": 1, "page_size": 20,
+    },
+    "search": {"queries": [], "limit": 20},
+    "random": {
+        "n": 1, "seed": None, "genre": None, "any": False, "min_score": None,
+        "weighted": False, "exclude_uids": [],
+    },
+    "similar": {"titles": [], "n": 10},
+}
+FIXED_ARGS = {"file": None, "skip_watchlist": False}  # Server-side files are never read
+MAX_RESULTS = 2000  # Per query; a worker builds the whole response before replying
+MAX_QUERIES = 100   # Queries or titles in one search/similar request
+COUNT_ARGS = {"n": MAX_RESULTS, "limit": MAX_RESULTS, "page_size": MAX_RESULTS, "page": None}
+LIST_ARGS = ("queries", "titles")
+REMOTE_COMMANDS = tuple(COMMAND_ARGS)
+MAX_REQUEST_BYTES = 1 << 20
+BACKLOG = 128
+RESTART_POLL = 1.0  # Seconds between checks for workers that died
+
+
+def default_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def parse_address(address):
+    """``host:port`` is TCP, anything else a Unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class ServerError(Exception):
+    """The server could not answer a request"""
+
+
+def check_args(args):
+    """Error message for arguments that would make a request unbounded, or None"""
+    for name, cap in COUNT_ARGS.items():
+        if name not in args:
+            continue
+        value = args[name]
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            return f"{name} must be a positive integer"
+        if cap is not None and value > cap:
+            return f"{name} must be at most {cap}"
+    for name in LIST_ARGS:
+        if name in args:
+            values = args[name]
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                return f"{name} must be a list of strings"
+            if len(values) > MAX_QUERIES:
+                return f"At most {MAX_QUERIES} {name} per request"
+    return None
+
+
+def handle(catalog, request):
+    """Run one request against ``catalog``; returns the response object"""
+    command = request.get("command")
+    if command == "info":
+        return {"ok": True, "result": {
+            "pid": os.getpid(), "movies": len(catalog), "genres": len(catalog.genre_index)
+        }}
+    defaults = COMMAND_ARGS.get(command)
+    if defaults is None:
+        return {"ok": False, "error": f"Unknown command: {command}"}
+    try:
+        given = request.get("args") or {}
+        args = {
+            **defaults,
+            **{name: value for name, value in given.items() if name in defaults},
+            **FIXED_ARGS,
+        }
+        error = check_args(args)
+        if error is not None:
+            return {"ok": False, "error": error}
+        args = argparse.Namespace(**args)
+        with instrument.span(f"server.{command}"):
+            return {"ok": True, "result": list(cli.COMMANDS[command](catalog, args))}
+    except CatalogError as e:
+        return {"ok": False, "error": str(e)}
+    except Exception as e:
+        # A bad argument must cost one error response, not the connection
+        instrument.count("server.errors")
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+class CatalogServer:
+    """Serves one catalog to local clients from a pool of worker processes"""
+
+    def __init__(self, csv_path=DEFAULT_CSV, address=DEFAULT_ADDRESS, workers=None, streaming=None):
+        self.csv_path = csv_path
+        self.address = address
+        self.workers = default_workers() if workers is None else workers
+        self.streaming = streaming
+        self.catalog = None
+        self.listener = None
+        self._processes = []
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+    def start(self):
+        """Load the catalog, listen and start the workers; returns the catalog"""
+        self.catalog = Catalog.load(self.csv_path, streaming=self.streaming)
+        if self._forking():
+            # Build everything workers would otherwise each build for themselves
+            self.catalog.prepare_search(background=False)
+            self.catalog.prepare_facets(background=False)
+            self.catalog.popular_movies()
+            gc.freeze()
+        self.listener = self._listen()
+        for _ in range(self.workers):
+            self._processes.append(self._spawn())
+        return self.catalog
+
+    def serve_forever(self):
+        """Keep the pool at full size until interrupted"""
+        try:
+            while True:
+                time.sleep(RESTART_POLL)
+                for i, process in enumerate(self._processes):
+                    if not process.is_alive():
+                        process.join()
+                        self._processes[i] = self._spawn()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes.clear()
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            family, address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.remove(address)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _forking(self):
+        return self._context.get_start_method() == "fork"
+
+    def _listen(self):
+        family, address = parse_address(self.address)
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.remove(address)  # Left over from a server that did not shut down
+        else:
+            if not is_loopback(address[0]):
+                listener.close()
+                raise ValueError(
+                    f"Refusing to listen on {address[0]}: the catalog server has no "
+                    "authentication, so TCP addresses must be loopback (e.g. 127.0.0.1)"
+                )
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address)
+        listener.listen(BACKLOG)
+        return listener
+
+    def _spawn(self):
+        # A forked worker inherits the loaded catalog; a spawned one attaches to the snapshot
+        catalog = self.catalog if self._forking() else None
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.listener, catalog, self.csv_path),
+            name="catalog-worker",
+            daemon=True
+        )
+        process.start()
+        return process
+
+
+def _worker_main(listener, catalog, csv_path):
+    """Accept connections until terminated; each connection gets a thread"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl-C
+    if catalog is None:
+        catalog = Catalog.attach(csv_path)
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except InterruptedError:
+            continue
+        threading.Thread(target=_serve_connection, args=(catalog, conn), daemon=True).start()
+
+
+def _serve_connection(catalog, conn):
+    with conn, conn.makefile("rwb") as f:
+        while True:
+            try:
+                line = f.readline(MAX_REQUEST_BYTES + 1)
+            except OSError:
+                return
+            if not line:
+                return
+            too_long = len(line) > MAX_REQUEST_BYTES
+            if too_long:
+                response = {"ok": False, "error": f"Request longer than {MAX_REQUEST_BYTES} bytes"}
+            else:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if isinstance(request, dict):
+                    response = handle(catalog, request)
+                else:
+                    response = {"ok": False, "error": "Malformed request"}
+            try:
+                f.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.flush()
+            except OSError:
+                return  # Client went away
+            if too_long:
+                return  # The rest of the line is still unread; drop the connection
+
+
+class CatalogClient:
+    """Connection to a CatalogServer; safe to share between threads"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=30):
+        family, address = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self._file = self.sock.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def call(self, command, args=None):
+        """Run a command on the server and return its result"""
+        request = json.dumps({"command": command, "args": args or {}}).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(request)
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ServerError("Connection closed by the catalog server")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise ServerError(response.get("error", "Request failed"))
+        return response["result"]
+
+    def info(self):
+        return self.call("info")
+
+    def genres(self):
+        return self.call("genres")
+
+    def top(self, genre, n=10):
+        return self.call("top", {"genre": genre, "n": n})
+
+    def search(self, query, limit=20):
+        return self.call("search", {"queries": [query], "limit": limit})
+
+    def random(self, n=1, genres=(), match_all=True, min_score=None, weighted=False,
+               exclude_uids=(), seed=None):
+        return self.call("random", {
+            "n": n, "seed": seed, "genre": list(genres), "any": not match_all,
+            "min_score": min_score, "weighted": weighted, "exclude_uids": list(exclude_uids),
+        })
+
+    def similar(self, title, n=10):
+        return self.call("similar", {"titles": [title], "n": n})
+
+    def browse(self, genres=(), match_all=True, min_score=None, max_score=None, from_year=None,
+               to_year=None, sort="score", ascending=False, page=1, page_size=20):
+        return self.call("browse", {
+            "genre": list(genres), "any": not match_all, "min_score": min_score,
+            "max_score": max_score, "from_year": from_year, "to_year": to_year,
+            "sort": sort, "asc": ascending, "page": page, "page_size": page_size,
+        })
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
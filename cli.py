@@ -0,0 +1,322 @@
+"""Headless batch queries against the movie catalog, streamed as JSON lines.
+
+Examples::
+
+    python cli.py genres
+    python cli.py top Drama -n 20
+    python cli.py browse -g Comedy -g Romance --min-score 7 --sort year --page 2
+    python cli.py search "star wars" "toy story" --limit 5
+    python cli.py search --file queries.txt
+    python cli.py random -n 3 --seed 42
+    python cli.py random -g Horror --min-score 6.5 --weighted --skip-watchlist
+    python cli.py similar "Toy Story (1995)" -n 5
+    python cli.py recommend -n 20
+    python cli.py watchlist
+    python cli.py --trace trace.json --profile profile.json search --file queries.txt
+    python cli.py serve --workers 4 &
+    python cli.py --server bingebuddy.sock search "star wars"
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+from typing import Iterable, Iterator, Mapping, Optional
+
+import instrument
+from catalog import DEFAULT_CSV, DEFAULT_WATCHLIST, Catalog, CatalogError, Watchlist
+from facets import SORT_KEYS, MovieQuery
+from movie_table import uid_of
+
+
+def movie_record(movie: Mapping, **extra) -> dict:
+    """A movie as a JSON-safe dict (missing scores/years become null)"""
+    score = movie.get('score')
+    year = movie.get('year')
+    record = {
+        'uid': uid_of(movie),
+        'title': movie['title'],
+        'score': None if score is None or math.isnan(score) else score,
+        'year': None if isinstance(year, float) and math.isnan(year) else year,
+        'genres': list(movie.get('genres', [])),
+        'poster': movie.get('poster'),
+    }
+    record.update(extra)
+    return record
+
+
+def emit(records: Iterable[dict], out=sys.stdout) -> None:
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+    out.flush()
+
+
+def read_queries(path: str) -> Iterator[str]:
+    """One query per line; blank lines are skipped ("-" reads stdin)"""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def cmd_genres(catalog: Catalog, args) -> Iterator[dict]:
+    for genre in catalog.genres():
+        yield {'genre': genre, 'movies': catalog.count_in_genre(genre)}
+
+
+def cmd_top(catalog: Catalog, args) -> Iterator[dict]:
+    if not catalog.has_genre(args.genre):
+        raise CatalogError(f"Unknown genre: {args.genre}")
+    for rank, movie in enumerate(catalog.top_in_genre(args.genre, args.n), 1):
+        yield movie_record(movie, genre=args.genre, rank=rank)
+
+
+def cmd_browse(catalog: Catalog, args) -> Iterator[dict]:
+    query = MovieQuery(
+        genres=args.genre or (),
+        match_all=not args.any,
+        min_score=args.min_score,
+        max_score=args.max_score,
+        min_year=args.from_year,
+        max_year=args.to_year,
+        sort=args.sort,
+        descending=not args.asc,
+    )
+    if args.page < 1 or args.page_size < 1:
+        raise CatalogError("--page and --page-size start at 1")
+    page = catalog.query(query, args.page - 1, args.page_size)
+    first = (args.page - 1) * args.page_size
+    for rank, movie in enumerate(page.movies, first + 1):
+        yield movie_record(movie, page=args.page, rank=rank)
+
+
+def cmd_search(catalog: Catalog, args) -> Iterator[dict]:
+    queries = list(args.queries)
+    if args.file:
+        queries = itertools.chain(queries, read_queries(args.file))
+    for query in queries:
+        for rank, movie in enumerate(catalog.find(query, args.limit), 1):
+            yield movie_record(movie, query=query, rank=rank)
+
+
+def cmd_random(catalog: Catalog, args) -> Iterator[dict]:
+    rng = random.Random(args.seed)
+    query = None
+    if args.genre or args.min_score is not None:
+        query = MovieQuery(genres=args.genre or (), match_all=not args.any, min_score=args.min_score)
+    exclude = set(getattr(args, 'exclude_uids', None) or ())  # Sent by remote clients
+    if args.skip_watchlist:
+        exclude |= Watchlist(args.watchlist).load().uids()
+    for _ in range(args.n):
+        movie = catalog.random_pick(rng, query, args.weighted, exclude)
+        if movie is None:
+            return
+        yield movie_record(movie)
+
+
+def cmd_similar(catalog: Catalog, args) -> Iterator[dict]:
+    for title in args.titles:
+        i = catalog.find_title(title)
+        if i is None:
+            raise CatalogError(f"Unknown title: {title}")
+        for rank, movie in enumerate(catalog.similar(catalog.table.movie(i), args.n), 1):
+            yield movie_record(movie, like=title, rank=rank)
+
+
+def cmd_recommend(catalog: Catalog, args) -> Iterator[dict]:
+    watchlist = list(Watchlist(args.watchlist).load())
+    for rank, movie in enumerate(catalog.recommend(watchlist, args.n), 1):
+        yield movie_record(movie, rank=rank)
+
+
+def cmd_watchlist(catalog: Optional[Catalog], args) -> Iterator[dict]:
+    for movie in Watchlist(args.watchlist).load():
+        yield movie_record(movie)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="BingeBuddy batch queries (JSON lines on stdout)")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="movie dataset (default: %(default)s)")
+    parser.add_argument("--no-snapshot", action="store_true", help="always parse the CSV")
+    parser.add_argument("--stream", action="store_true",
+                        help="ingest the CSV in chunks through the on-disk store (for huge files)")
+    parser.add_argument("--timings", action="store_true", help="print load timings to stderr")
+    parser.add_argument("--profile", metavar="FILE", help="write span/histogram/counter summary JSON")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace (chrome://tracing)")
+    parser.add_argument("--server", metavar="ADDRESS",
+                        help="send catalog queries to a running `serve` process (socket path or host:port)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("genres", help="list genres with their movie counts")
+
+    top = commands.add_parser("top", help="top N movies by IMDB score in a genre")
+    top.add_argument("genre")
+    top.add_argument("-n", type=int, default=10)
+
+    browse = commands.add_parser("browse", help="filtered, sorted, paginated browsing")
+    browse.add_argument("-g", "--genre", action="append", help="genre filter (repeatable)")
+    browse.add_argument("--any", action="store_true", help="match any genre instead of all")
+    browse.add_argument("--min-score", type=float)
+    browse.add_argument("--max-score", type=float)
+    browse.add_argument("--from-year", type=int)
+    browse.add_argument("--to-year", type=int)
+    browse.add_argument("--sort", choices=SORT_KEYS, default="score")
+    browse.add_argument("--asc", action="store_true", help="ascending order")
+    browse.add_argument("--page", type=int, default=1)
+    browse.add_argument("--page-size", type=int, default=20)
+
+    search = commands.add_parser("search", help="title search, one or many queries")
+    search.add_argument("queries", nargs="*")
+    search.add_argument("--file", help="read queries from a file, one per line (- for stdin)")
+    search.add_argument("--limit", type=int, default=20)
+
+    pick = commands.add_parser("random", help="random picks")
+    pick.add_argument("-n", type=int, default=1)
+    pick.add_argument("--seed", type=int)
+    pick.add_argument("-g", "--genre", action="append", help="genre filter (repeatable)")
+    pick.add_argument("--any", action="store_true", help="match any genre instead of all")
+    pick.add_argument("--min-score", type=float)
+    pick.add_argument("--weighted", action="store_true", help="favour higher IMDB scores")
+    pick.add_argument("--skip-watchlist", action="store_true", help="never pick watchlist movies")
+    pick.add_argument("--watchlist", default=DEFAULT_WATCHLIST)
+
+    similar = commands.add_parser("similar", help="movies most like the given titles")
+    similar.add_argument("titles", nargs="+", help="exact titles, e.g. 'Toy Story (1995)'")
+    similar.add_argument("-n", type=int, default=10)
+
+    recommend = commands.add_parser("recommend", help="movies most like the whole watchlist")
+    recommend.add_argument("-n", type=int, default=10)
+    recommend.add_argument("--watchlist", default=DEFAULT_WATCHLIST)
+
+    watchlist = commands.add_parser("watchlist", help="dump the saved watchlist")
+    watchlist.add_argument("--watchlist", default=DEFAULT_WATCHLIST)
+
+    serve = commands.add_parser("serve", help="serve the catalog to local clients until interrupted")
+    serve.add_argument("--address", default="bingebuddy.sock",
+                       help="Unix socket path or host:port (default: %(default)s)")
+    serve.add_argument("--workers", type=int, help="worker processes (default: one per core, up to 8)")
+
+    return parser
+
+
+COMMANDS = {
+    "genres": cmd_genres,
+    "top": cmd_top,
+    "browse": cmd_browse,
+    "search": cmd_search,
+    "random": cmd_random,
+    "similar": cmd_similar,
+    "recommend": cmd_recommend,
+    "watchlist": cmd_watchlist,
+}
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.profile or args.trace:
+        instrument.enable()
+    try:
+        return run(args)
+    finally:
+        if args.profile:
+            instrument.recorder.export_json(args.profile)
+        if args.trace:
+            instrument.recorder.export_chrome_trace(args.trace)
+
+
+def run(args) -> int:
+    if args.command == "serve":
+        return serve(args)
+    if args.server:
+        import catalog_server
+
+        if args.command in catalog_server.REMOTE_COMMANDS:
+            return run_remote(args)
+
+    catalog = None
+    if args.command != "watchlist":
+        try:
+            catalog = Catalog.load(args.csv, use_snapshot=not args.no_snapshot,
+                                   streaming=True if args.stream else None)
+        except FileNotFoundError:
+            print(f"Could not find {args.csv}", file=sys.stderr)
+            return 2
+        except CatalogError as e:
+            print(f"Failed to load data: {e}", file=sys.stderr)
+            return 2
+        if args.timings:
+            print(catalog.describe_load(), file=sys.stderr)
+
+    try:
+        with instrument.span(f"cli.{args.command}"):
+            emit(COMMANDS[args.command](catalog, args))
+    except CatalogError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Output piped into e.g. `head`
+        pass
+    return 0
+
+
+def run_remote(args) -> int:
+    """Send the command to a catalog server instead of loading the catalog here"""
+    from catalog_server import CatalogClient, ServerError
+
+    params = {k: v for k, v in vars(args).items() if k != "command"}
+    # Local files are read here; the server may run in another directory
+    if args.command == "search" and args.file:
+        params['queries'] = list(itertools.chain(args.queries, read_queries(args.file)))
+        params['file'] = None
+    if args.command == "random" and args.skip_watchlist:
+        params['exclude_uids'] = sorted(Watchlist(args.watchlist).load().uids())
+        params['skip_watchlist'] = False
+
+    try:
+        with CatalogClient(args.server) as client, instrument.span(f"cli.{args.command}"):
+            emit(client.call(args.command, params))
+    except OSError as e:
+        print(f"Could not reach the catalog server at {args.server}: {e}", file=sys.stderr)
+        return 2
+    except ServerError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def serve(args) -> int:
+    """Run the catalog server in the foreground"""
+    from catalog_server import CatalogServer
+
+    server = CatalogServer(args.csv, args.address, args.workers, streaming=True if args.stream else None)
+    try:
+        catalog = server.start()
+    except FileNotFoundError:
+        print(f"Could not find {args.csv}", file=sys.stderr)
+        return 2
+    except CatalogError as e:
+        print(f"Failed to load data: {e}", file=sys.stderr)
+        return 2
+    except (OSError, ValueError) as e:
+        print(f"Could not listen on {args.address}: {e}", file=sys.stderr)
+        server.close()
+        return 2
+    if args.timings:
+        print(catalog.describe_load(), file=sys.stderr)
+    print(f"Serving {len(catalog)} movies on {args.address} with {server.workers} workers",
+          file=sys.stderr)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Faceted browsing: AND/OR genre filters, score and year ranges, sorted pages.
+
+Every (genre, sort key, direction) gets a sorted array of its distinct
+movie ids the first time it is used, stored with the sort values, so a range
+on the sort key is two binary searches. A page is read by scanning that
+array from the front; the remaining filters are checked in vectorized chunks
+against the table's genre bitsets and columns. The cost of a page therefore
+grows with the page (and how selective the filters are), not with the size
+of the genre.
+"""
+import threading
+
+import numpy as np
+
+import instrument
+from movie_table import MISSING_YEAR
+
+SORT_KEYS = ('score', 'year')
+SCAN_CHUNK = 256  # First chunk checked when a page needs filtering
+NO_IDS = np.empty(0, dtype=np.int32)
+
+
+class MovieQuery:
+    """What to browse: genres, score/year ranges (inclusive) and the sort order"""
+
+    __slots__ = ('genres', 'match_all', 'min_score', 'max_score', 'min_year', 'max_year',
+                 'sort', 'descending')
+
+    def __init__(self, genres=(), match_all=True, min_score=None, max_score=None,
+                 min_year=None, max_year=None, sort='score', descending=True):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        self.genres = tuple(dict.fromkeys(genres))
+        self.match_all = match_all
+        self.min_score = min_score
+        self.max_score = max_score
+        self.min_year = min_year
+        self.max_year = max_year
+        self.sort = sort
+        self.descending = descending
+
+    def bounds(self, key):
+        """(low, high) for ``key``; either may be None"""
+        if key == 'score':
+            return self.min_score, self.max_score
+        return self.min_year, self.max_year
+
+    def key(self):
+        """Hashable form of the query, for caches"""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MovieQuery({fields})"
+
+
+class ResultPage:
+    """One page of query results; ``total`` is only counted when asked for"""
+
+    def __init__(self, facets, query, ids, number, size, has_next):
+        self.facets = facets
+        self.query = query
+        self.ids = ids
+        self.number = number
+        self.size = size
+        self.has_next = has_next
+        self._total = None
+
+    @property
+    def movies(self):
+        return self.facets.table.movies(self.ids)
+
+    @property
+    def total(self):
+        if self._total is None:
+            self._total = self.facets.count(self.query)
+        return self._total
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.size))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class FacetIndex:
+    """Sorted per-genre id arrays over a MovieTable, built on demand"""
+
+    def __init__(self, table, genre_index):
+        self.table = table
+        self.genre_index = genre_index
+        self._orders = {}
+        self._lock = threading.Lock()
+
+        years = table.years.astype(np.float64)
+        years[table.years == MISSING_YEAR] = np.nan
+        self._columns = {'score': table.scores, 'year': years}
+
+    def order(self, genre, key='score', descending=True):
+        """Distinct ids in ``genre`` (None: every movie) sorted by ``key``, and their sort values.
+
+        Sort values are negated for descending orders and missing values are
+        +inf, so the values array is always ascending with missing values last.
+        """
+        cache_key = (genre, key, descending)
+        with self._lock:
+            cached = self._orders.get(cache_key)
+        instrument.hit("facets.orders", cached is not None)
+        if cached is not None:
+            return cached
+
+        if genre is None:
+            ids = np.arange(len(self.table), dtype=np.int32)
+        else:
+            ids = np.asarray(self.genre_index.get(genre, NO_IDS), dtype=np.int32)
+        values = self._columns[key][ids]
+        if descending:
+            values = -values
+        values = np.where(np.isnan(values), np.inf, values)
+        order = np.argsort(values, kind='stable')
+        cached = (ids[order], values[order])
+
+        with self._lock:
+            self._orders[cache_key] = cached
+        return cached
+
+    def prepare(self, key='score', descending=True):
+        """Build the default order for every genre up front"""
+        for genre in [None, *self.genre_index]:
+            self.order(genre, key, descending)
+
+    def page(self, query, number=0, size=50):
+        """Page ``number`` (from 0) of the movies matching ``query``"""
+        ids, filtered = self._candidates(query)
+        want = (number + 1) * size + 1  # One extra to know if there is a next page
+
+        if filtered:
+            found = []
+            count = 0
+            start = 0
+            chunk = max(SCAN_CHUNK, want)
+            while start < len(ids) and count < want:
+                part = ids[start:start + chunk]
+                part = part[self._keep(query, part)]
+                found.append(part)
+                count += len(part)
+                start += chunk
+                chunk *= 2
+            ids = np.concatenate(found) if found else NO_IDS
+
+        first = number * size
+        return ResultPage(self, query, ids[first:first + size], number, size,
+                          has_next=len(ids) > first + size)
+
+    def count(self, query):
+        """Number of movies matching ``query`` (one vectorized pass)"""
+        ids, filtered = self._candidates(query)
+        if not filtered:
+            return len(ids)
+        return int(np.count_nonzero(self._keep(query, ids)))
+
+    def matching(self, query):
+        """Every id matching ``query``, in sort order"""
+        ids, filtered = self._candidates(query)
+        return ids[self._keep(query, ids)] if filtered else ids
+
+    def _candidates(self, query):
+        """Sorted ids to scan and whether they still need ``_keep`` filtering"""
+        genres = query.genres
+        if query.match_all and any(genre not in self.genre_index for genre in genres):
+            return NO_IDS, False
+
+        if query.match_all and genres:
+            # Scan the smallest genre; the bitsets check the others
+            genre = min(genres, key=lambda g: len(self.genre_index[g]))
+        elif len(genres) == 1:
+            genre = genres[0]
+        else:
+            genre = None
+        ids, values = self.order(genre, query.sort, query.descending)
+
+        # A range on the sort key is a slice of the sorted array
+        low, high = query.bounds(query.sort)
+        if query.descending:
+            low, high = (None if high is None else -high), (None if low is None else -low)
+        start = np.searchsorted(values, low, 'left') if low is not None else 0
+        stop = np.searchsorted(values, high if high is not None else np.inf, 'right')
+        if low is not None or high is not None:
+            # Missing values never satisfy a range
+            stop = min(stop, np.searchsorted(values, np.inf, 'left'))
+        ids = ids[start:stop]
+
+        other = 'year' if query.sort == 'score' else 'score'
+        filtered = len(genres) > 1 or any(bound is not None for bound in query.bounds(other))
+        return ids, filtered
+
+    def _keep(self, query, ids):
+        """Boolean mask over ``ids`` for the genre and range filters"""
+        keep = np.ones(len(ids), dtype=bool)
+        if len(query.genres) > 1:
+            keep &= self.table.match_genres(query.genres, query.match_all, ids)
+        for key in SORT_KEYS:
+            low, high = query.bounds(key)
+            if low is None and high is None:
+                continue
+            values = self._columns[key][ids]
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+        return keep
@@ -0,0 +1,340 @@
+"""CSV cleaning, plus a streaming, resumable ingest for catalogs larger than RAM.
+
+The in-memory path (``catalog.read_csv`` / ``catalog.build_index``) and the
+streaming path share the cleaning rules defined here.
+
+``MovieStore`` reads the CSV in blocks of raw bytes cut at row boundaries,
+so each block parses on its own and the store knows exactly how many bytes
+it has taken in. Every block is cleaned and merged into a SQLite database
+next to the CSV (the first row of a title wins, genres are unioned), which
+does the de-duplication on disk. The store records the length and SHA-1 of
+what it has consumed: if the CSV has only grown, the next ingest parses just
+the new rows; any other change starts over.
+
+``MovieStore.export`` streams the store into a regular snapshot through
+``snapshot.SnapshotWriter``, and the catalog memory-maps that, so peak memory
+depends on the block size rather than the size of the file.
+"""
+import hashlib
+import io
+import os
+import sqlite3
+from typing import Callable, Optional
+
+import numpy as np
+
+from movie_table import MISSING_YEAR, genre_bitsets
+
+CSV_COLUMNS = ['Title', 'IMDB Score', 'Genre', 'Poster']
+FALLBACK_ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+BLOCK_BYTES = 16 << 20  # Raw CSV bytes parsed per step
+EXPORT_BATCH = 100_000  # Movies (or genre rows) written to the snapshot per step
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    poster TEXT NOT NULL,
+    score REAL,
+    year INTEGER
+);
+CREATE TABLE IF NOT EXISTS genres (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    UNIQUE (movie_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS movie_genres_by_movie ON movie_genres (movie_id);
+CREATE INDEX IF NOT EXISTS movie_genres_by_genre ON movie_genres (genre_id, movie_id);
+DROP TABLE IF EXISTS genre_rows;
+CREATE TEMP TABLE IF NOT EXISTS block_titles (pos INTEGER PRIMARY KEY, title TEXT NOT NULL);
+"""
+
+
+def store_path(csv_path):
+    """Where the ingest store for a CSV file lives"""
+    return os.path.splitext(csv_path)[0] + ".bbstore"
+
+
+def detect_encoding(raw: bytes) -> Optional[str]:
+    """Detect the encoding from the first few KB of the file"""
+    import chardet
+
+    return chardet.detect(raw[:10000])['encoding']
+
+
+def decode(raw: bytes, encoding: Optional[str]) -> Optional[str]:
+    """Decode with ``encoding`` or the first fallback that fits; None if none does"""
+    for enc in [encoding] + FALLBACK_ENCODINGS:
+        try:
+            return raw.decode(enc)
+        except (TypeError, LookupError, UnicodeDecodeError):
+            continue
+    return None
+
+
+def clean_frame(df):
+    """Drop rows without a poster, score or genre; numeric scores and a Year column"""
+    import pandas as pd
+
+    df = df.dropna(subset=['Poster', 'IMDB Score', 'Genre'])
+    return df.assign(
+        **{'IMDB Score': pd.to_numeric(df['IMDB Score'], errors='coerce')},
+        Year=df['Title'].str.extract(r'\((\d{4})\)', expand=False)
+    )
+
+
+def genre_pairs(df):
+    """One (Title, Genre) row per CSV row and genre, in CSV order"""
+    pairs = df[['Title']].assign(Genre=df['Genre'].str.split('|')).explode('Genre')
+    pairs['Genre'] = pairs['Genre'].str.strip()
+    return pairs[pairs['Genre'] != '']
+
+
+def first_rows(df, pairs):
+    """The first row of every title that has at least one genre, indexed by title"""
+    first = df.drop_duplicates('Title').set_index('Title')
+    return first.loc[first.index.isin(pairs['Title'])]
+
+
+class MovieStore:
+    """On-disk, append-only store of the cleaned catalog, filled from a CSV block by block"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.genre_id = {name: i for i, name in self.db.execute("SELECT id, name FROM genres")}
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "MovieStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        (count,) = self.db.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM movies").fetchone()
+        return count
+
+    def ingest(self, csv_path: str, block_bytes: int = BLOCK_BYTES,
+               progress: Optional[Callable[[str], None]] = None) -> str:
+        """Take in the rows of ``csv_path`` not ingested yet; returns the SHA-1 of the whole file"""
+        report = progress or (lambda step: None)
+        with open(csv_path, 'rb') as f:
+            digest = self._resume(f)
+            if digest is None:
+                self._reset()
+                encoding = detect_encoding(f.read(10000))
+                f.seek(0)
+                header = f.readline()
+                digest = hashlib.sha1(header)
+                consumed = len(header)
+            else:
+                encoding = self._meta('encoding')
+                header = self._meta('header')
+                consumed = self._meta('consumed')
+
+            pending = b""
+            while True:
+                block = f.read(block_bytes)
+                data = pending + block
+                cut = _row_boundary(data) if block else len(data)
+                if cut:
+                    digest.update(data[:cut])
+                    consumed += cut
+                    # The rows and the position they were read up to are saved together
+                    with self.db:
+                        self._add_block(header + data[:cut], encoding)
+                        self._set_meta(encoding=encoding, header=header,
+                                       consumed=consumed, sha1=digest.hexdigest())
+                    report(f"Ingesting CSV ({len(self):,} movies)")
+                pending = data[cut:]
+                if not block:
+                    return digest.hexdigest()
+
+    def export(self, writer) -> tuple:
+        """Stream the store into a ``snapshot.SnapshotWriter``; returns (movies, genres)"""
+        db = self.db
+        movies = len(self)
+        genre_names = [name for name, in db.execute("SELECT name FROM genres ORDER BY id")]
+
+        # Every array exists even when the store is empty
+        for name, dtype in (('string_offsets', np.int64), ('string_table', np.uint8),
+                            ('score', np.float64), ('year', np.int16),
+                            ('movie_combo', np.uint32), ('genre_masks', np.uint64),
+                            ('genre_movie_ids', np.int32)):
+            writer.append(name, np.empty(0, dtype=dtype))
+
+        # One string table: every title, then every poster URL, then the genre names
+        writer.append('string_offsets', np.zeros(1, dtype=np.int64))
+        end = 0
+        for batch in _batches(db.execute("SELECT title, score, year FROM movies ORDER BY id")):
+            titles, scores, years = zip(*batch)
+            end = _append_strings(writer, titles, end)
+            writer.append('score', np.array([np.nan if s is None else s for s in scores], dtype=np.float64))
+            writer.append('year', np.array([MISSING_YEAR if y is None else y for y in years], dtype=np.int16))
+        for batch in _batches(db.execute("SELECT poster FROM movies ORDER BY id")):
+            end = _append_strings(writer, [poster for poster, in batch], end)
+        _append_strings(writer, genre_names, end)
+
+        # Genre combinations and bitsets, a range of movies at a time
+        combos = {}
+        for start in range(0, movies, EXPORT_BATCH):
+            stop = min(start + EXPORT_BATCH, movies)
+            rows = np.array(db.execute(
+                "SELECT movie_id, genre_id FROM movie_genres"
+                " WHERE movie_id >= ? AND movie_id < ? ORDER BY movie_id, rowid",
+                (start, stop)
+            ).fetchall(), dtype=np.int64).reshape(-1, 2)
+            bounds = np.searchsorted(rows[:, 0], np.arange(start, stop + 1))
+            genre_ids = rows[:, 1].tolist()
+            writer.append('movie_combo', np.fromiter(
+                (combos.setdefault(tuple(genre_ids[a:b]), len(combos))
+                 for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())),
+                dtype=np.uint32, count=stop - start
+            ))
+            writer.append('genre_masks', genre_bitsets(bounds, rows[:, 1], len(genre_names)).reshape(-1))
+        combo_offsets = np.zeros(len(combos) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in combos], out=combo_offsets[1:])
+        writer.append('combo_offsets', combo_offsets)
+        writer.append('combo_genre_ids', np.fromiter(
+            (g for ids in combos for g in ids), dtype=np.uint16, count=int(combo_offsets[-1])
+        ))
+
+        # Genre index: each genre's distinct movie ids, ascending
+        counts = dict(db.execute("SELECT genre_id, COUNT(*) FROM movie_genres GROUP BY genre_id"))
+        genre_movie_offsets = np.zeros(len(genre_names) + 1, dtype=np.int64)
+        np.cumsum([counts.get(g, 0) for g in range(len(genre_names))], out=genre_movie_offsets[1:])
+        writer.append('genre_movie_offsets', genre_movie_offsets)
+        for batch in _batches(db.execute(
+            "SELECT movie_id FROM movie_genres ORDER BY genre_id, movie_id"
+        )):
+            writer.append('genre_movie_ids', np.array(batch, dtype=np.int32).reshape(-1))
+        return movies, len(genre_names)
+
+    def _add_block(self, raw: bytes, encoding: Optional[str]) -> None:
+        """Clean one block of CSV text (header line included) and merge it into the store.
+
+        Runs inside the caller's transaction.
+        """
+        import pandas as pd
+
+        text = decode(raw, encoding)
+        if text is None:
+            raise ValueError("Could not read CSV file with any encoding")
+        df = clean_frame(pd.read_csv(io.StringIO(text), usecols=CSV_COLUMNS))
+        pairs = genre_pairs(df)
+        first = first_rows(df, pairs)
+        del df
+        titles = first.index.astype(str).tolist()
+
+        # Titles already in the store keep their id (and first row); the rest get new ids
+        db = self.db
+        db.execute("DELETE FROM block_titles")
+        db.executemany("INSERT INTO block_titles (pos, title) VALUES (?, ?)", enumerate(titles))
+        ids = np.full(len(titles), -1, dtype=np.int64)
+        for pos, i in db.execute(
+            "SELECT b.pos, m.id FROM block_titles b JOIN movies m ON m.title = b.title"
+        ):
+            ids[pos] = i
+        new = np.flatnonzero(ids < 0)
+        ids[new] = np.arange(len(self), len(self) + len(new))
+
+        scores = first['IMDB Score'].to_numpy(dtype=np.float64)
+        years = pd.to_numeric(first['Year']).to_numpy(dtype=np.float64)
+        posters = first['Poster'].astype(str).tolist()
+        db.executemany(
+            "INSERT INTO movies (id, title, poster, score, year) VALUES (?, ?, ?, ?, ?)",
+            ((int(ids[p]), titles[p], posters[p],
+              None if np.isnan(scores[p]) else float(scores[p]),
+              None if np.isnan(years[p]) else int(years[p]))
+             for p in new.tolist())
+        )
+
+        for name in pd.unique(pairs['Genre']).tolist():
+            if name not in self.genre_id:
+                self.genre_id[name] = len(self.genre_id)
+                db.execute("INSERT INTO genres (id, name) VALUES (?, ?)", (self.genre_id[name], name))
+
+        pair_movies = ids[first.index.get_indexer(pairs['Title'])].tolist()
+        pair_genres = pairs['Genre'].map(self.genre_id).tolist()
+        db.executemany("INSERT OR IGNORE INTO movie_genres (movie_id, genre_id) VALUES (?, ?)",
+                       zip(pair_movies, pair_genres))
+
+    def _resume(self, f):
+        """SHA-1 of the part of ``f`` already ingested (``f`` left just after it), or None.
+
+        None means nothing was ingested yet or the file no longer starts with
+        what was, so everything has to be read again.
+        """
+        consumed = self._meta('consumed')
+        if not consumed or os.fstat(f.fileno()).st_size < consumed:
+            return None
+        digest = hashlib.sha1()
+        remaining = consumed
+        while remaining:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                return None
+            digest.update(chunk)
+            remaining -= len(chunk)
+        if digest.hexdigest() != self._meta('sha1'):
+            f.seek(0)
+            return None
+        return digest
+
+    def _reset(self) -> None:
+        with self.db:
+            for table in ('meta', 'movies', 'genres', 'movie_genres'):
+                self.db.execute(f"DELETE FROM {table}")
+        self.genre_id = {}
+
+    def _meta(self, key: str):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, **values) -> None:
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items())
+
+
+def _row_boundary(data: bytes) -> int:
+    """Length of the longest prefix of ``data`` made of complete CSV rows.
+
+    A newline only ends a row outside quotes, i.e. after an even number of
+    quote characters (escaped quotes come in pairs).
+    """
+    quotes = data.count(b'"')
+    end = len(data)
+    while True:
+        cut = data.rfind(b"\n", 0, end)
+        if cut < 0:
+            return 0
+        quotes -= data.count(b'"', cut + 1, end)
+        if quotes % 2 == 0:
+            return cut + 1
+        end = cut
+
+
+def _batches(cursor, size=EXPORT_BATCH):
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            return
+        yield batch
+
+
+def _append_strings(writer, strings, end):
+    """Append strings to the snapshot's string table; returns the new end offset"""
+    if not strings:
+        return end
+    encoded = [s.encode('utf-8') for s in strings]
+    lengths = np.fromiter((len(s) + 1 for s in encoded), dtype=np.int64, count=len(encoded))
+    writer.append('string_table', np.frombuffer(b"\x00".join(encoded) + b"\x00", dtype=np.uint8))
+    writer.append('string_offsets', end + np.cumsum(lengths))
+    return end + int(lengths.sum())
@@ -0,0 +1,210 @@
+"""Opt-in profiling: spans, histograms, counters and cache hit ratios.
+
+Everything goes through the module-level ``recorder``, which is off unless
+``BINGEBUDDY_PROFILE=1`` is set or ``enable()`` is called. While it is off,
+``span()`` returns a shared no-op context manager and ``count``/``observe``/
+``hit`` return after one attribute check, so instrumented hot paths cost
+next to nothing.
+
+While it is on, every span is timed into a histogram of the same name (in
+milliseconds) and kept as a trace event. ``snapshot()`` summarises the
+histograms, counters and hit ratios as JSON-ready data, and
+``chrome_trace()`` returns the spans in the Chrome trace event format
+(load it in chrome://tracing or Perfetto). Nothing here imports tkinter;
+the app measures Tk event-loop lag with ``observe`` and draws the overlay.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+HISTOGRAM_SAMPLES = 2048  # Recent samples kept per histogram for percentiles
+TRACE_EVENTS = 100_000    # Most recent spans kept for the trace export
+
+
+class Histogram:
+    """Count, sum, min and max of every value, percentiles over the recent ones"""
+
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.samples = deque(maxlen=HISTOGRAM_SAMPLES)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        summary = {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+        for p in (50, 90, 99):
+            summary[f"p{p}"] = samples[min(len(samples) - 1, len(samples) * p // 100)] if samples else 0.0
+        return summary
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start")
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.finish_span(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Recorder:
+    """Collects spans, histograms, counters and hit/miss pairs from any thread"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+            self.hits = {}  # name -> [hits, misses]
+            self.events = deque(maxlen=TRACE_EVENTS)
+            self.threads = {}
+            self.origin = time.perf_counter()
+
+    def span(self, name, **args):
+        """Context manager timing a block; a shared no-op while disabled"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, args)
+
+    def finish_span(self, name, start, end, args=None):
+        thread = threading.current_thread()
+        with self._lock:
+            self._histogram(name).add((end - start) * 1000)
+            self.threads[thread.ident] = thread.name
+            self.events.append((name, start, end, thread.ident, args or None))
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        """Add a value (e.g. milliseconds of loop lag) to a histogram"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(name).add(value)
+
+    def hit(self, name, hit):
+        """Record a cache lookup that hit (True) or missed (False)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            pair = self.hits.setdefault(name, [0, 0])
+            pair[0 if hit else 1] += 1
+
+    def snapshot(self):
+        """Histograms, counters and hit ratios as plain data"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "hit_ratios": {
+                    name: {"hits": hits, "misses": misses,
+                           "ratio": hits / (hits + misses) if hits + misses else 0.0}
+                    for name, (hits, misses) in sorted(self.hits.items())
+                },
+            }
+
+    def chrome_trace(self):
+        """Spans as a Chrome trace event document"""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.threads.items()
+            ]
+            for name, start, end, tid, args in self.events:
+                event = {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (start - self.origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                if args:
+                    event["args"] = args
+                events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_json(self, path):
+        _write_json(path, self.snapshot())
+
+    def export_chrome_trace(self, path):
+        _write_json(path, self.chrome_trace())
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+
+recorder = Recorder(enabled=os.environ.get("BINGEBUDDY_PROFILE", "") not in ("", "0"))
+
+span = recorder.span
+count = recorder.count
+observe = recorder.observe
+hit = recorder.hit
+
+
+def enable(on=True):
+    recorder.enabled = on
+
+
+def enabled():
+    return recorder.enabled
@@ -0,0 +1,321 @@
+"""Compact, array-backed storage for the movie catalog.
+
+A MovieTable keeps one row per movie in parallel NumPy arrays instead of a
+dict per movie. Scores and years are typed arrays; titles, poster URLs and
+genre names share one UTF-8 string table. Each movie's genres are stored
+twice: as an id into a small table of distinct genre combinations (which
+keeps the CSV order for display) and as a bitmask row, so filtering the
+whole catalog by genre is a handful of vectorized ANDs.
+
+``Movie`` objects are two-slot views created on demand. They behave like
+the old read-only movie dicts (``movie['title']``, ``movie.get('genres')``,
+``dict(movie)``), so the UI and the watchlist do not need to know.
+
+A movie's id is its row, which is only meaningful within one table. What is
+saved outside the catalog (the watchlist) uses ``movie['uid']`` instead: a
+63-bit hash of the title, the key movies are de-duplicated by. It is the
+same in every build of any version of the CSV and is computed on demand.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+MASK_BITS = 64
+MISSING_YEAR = -1
+FIELDS = ('uid', 'title', 'score', 'year', 'poster', 'genres')
+
+
+def movie_uid(title: str) -> int:
+    """Stable id of the movie with this title (non-negative, fits SQLite's INTEGER)"""
+    digest = hashlib.blake2b(title.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+
+def uid_of(movie: Mapping) -> int:
+    """``movie['uid']``, also for movie dicts saved before uids existed"""
+    uid = movie.get('uid')
+    return movie_uid(movie['title']) if uid is None else uid
+
+
+class StringTable:
+    """Immutable list of strings kept as one NUL-separated UTF-8 buffer plus offsets"""
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data        # uint8, every string followed by a NUL
+        self.offsets = offsets  # int64, len(self) + 1 entries
+
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> "StringTable":
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(s) + 1 for s in encoded], out=offsets[1:])
+        data = np.frombuffer(b"\x00".join(encoded) + b"\x00", dtype=np.uint8)
+        return cls(data[:offsets[-1]], offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1] - 1].tobytes().decode('utf-8')
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        """Decode strings ``start`` to ``stop`` with a single decode/split"""
+        if stop <= start:
+            return []
+        lo, hi = int(self.offsets[start]), int(self.offsets[stop])
+        return self.data[lo:hi - 1].tobytes().decode('utf-8').split("\x00")
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.offsets.nbytes
+
+
+class Movie(Mapping):
+    """One movie of a MovieTable, read like the old ``{'title': ..., ...}`` dict"""
+
+    __slots__ = ('table', 'id')
+
+    def __init__(self, table: "MovieTable", id: int):
+        self.table = table
+        self.id = id
+
+    def __getitem__(self, key: str):
+        table, i = self.table, self.id
+        if key == 'title':
+            return table.strings[i]
+        if key == 'uid':
+            return movie_uid(table.strings[i])
+        if key == 'score':
+            return float(table.scores[i])
+        if key == 'year':
+            return table.year_name(i)
+        if key == 'poster':
+            return table.strings[len(table) + i]
+        if key == 'genres':
+            return table.genres_of(i)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Movie({self.id}, {self['title']!r})"
+
+
+class MovieList(Sequence):
+    """Movies selected by an id array; items are created as they are indexed"""
+
+    __slots__ = ('table', 'ids')
+
+    def __init__(self, table: "MovieTable", ids: np.ndarray):
+        self.table = table
+        self.ids = ids
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MovieList(self.table, self.ids[index])
+        return Movie(self.table, int(self.ids[index]))
+
+    def __iter__(self) -> Iterator[Movie]:
+        table = self.table
+        return (Movie(table, i) for i in self.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class MovieTable:
+    """Column store for the catalog; row ``i`` is movie id ``i``.
+
+    The string table holds every title, then every poster URL, then the
+    genre names, so both the snapshot and the in-memory catalog use the same
+    arrays (and a warm start can keep them memory-mapped).
+    """
+
+    def __init__(self, strings: StringTable, scores: np.ndarray, years: np.ndarray,
+                 combo: np.ndarray, combo_offsets: np.ndarray, combo_genre_ids: np.ndarray,
+                 genre_masks: np.ndarray):
+        self.strings = strings
+        self.scores = scores                     # float64, NaN when missing
+        self.years = years                       # int16, MISSING_YEAR when missing
+        self.combo = combo                       # uint32 index into the combination table
+        self.combo_offsets = combo_offsets       # int64 CSR offsets into combo_genre_ids
+        self.combo_genre_ids = combo_genre_ids   # uint16 genre ids, CSV order per combination
+        self.genre_masks = genre_masks           # uint64 (movies, words) genre bitsets
+
+        n = len(scores)
+        self.genre_names: List[str] = strings.slice(2 * n, len(strings))
+        self.genre_id: Dict[str, int] = {name: i for i, name in enumerate(self.genre_names)}
+        self._combo_lists: Optional[List[List[str]]] = None
+        self._combo_masks: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls) -> "MovieTable":
+        return cls.from_columns([], [], [], [], [], [])
+
+    @classmethod
+    def from_columns(cls, titles: List[str], posters: List[str], scores, years,
+                     movie_genres: List, genre_names: List[str]) -> "MovieTable":
+        """Build a table from per-movie columns.
+
+        ``years`` uses MISSING_YEAR for unknown years and ``movie_genres``
+        holds each movie's genre ids (indexes into ``genre_names``) in order.
+        """
+        n = len(titles)
+        combo_ids: Dict[tuple, int] = {}
+        combo = np.fromiter(
+            (combo_ids.setdefault(tuple(int(g) for g in ids), len(combo_ids)) for ids in movie_genres),
+            dtype=np.uint32, count=n
+        )
+        combos = list(combo_ids)
+        combo_offsets = np.zeros(len(combos) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in combos], out=combo_offsets[1:])
+        combo_genre_ids = np.fromiter(
+            (g for ids in combos for g in ids), dtype=np.uint16, count=int(combo_offsets[-1])
+        )
+
+        return cls(
+            StringTable.from_strings(list(titles) + list(posters) + list(genre_names)),
+            np.asarray(scores, dtype=np.float64),
+            np.asarray(years, dtype=np.int16),
+            combo,
+            combo_offsets,
+            combo_genre_ids,
+            genre_bitsets(combo_offsets, combo_genre_ids, len(genre_names))[combo],
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "MovieTable":
+        """Wrap arrays produced by ``arrays()`` (e.g. straight out of a snapshot mmap)"""
+        n = len(arrays['score'])
+        masks = arrays['genre_masks']
+        words = len(masks) // n if n else 1
+        return cls(
+            StringTable(arrays['string_table'], arrays['string_offsets']),
+            arrays['score'],
+            arrays['year'],
+            arrays['movie_combo'],
+            arrays['combo_offsets'],
+            arrays['combo_genre_ids'],
+            masks.reshape(n, words),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every column as a flat array, for writing a snapshot"""
+        return {
+            'score': self.scores,
+            'year': self.years,
+            'string_offsets': self.strings.offsets,
+            'string_table': self.strings.data,
+            'movie_combo': self.combo,
+            'combo_offsets': self.combo_offsets,
+            'combo_genre_ids': self.combo_genre_ids,
+            'genre_masks': self.genre_masks.reshape(-1),
+        }
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the table's arrays"""
+        return self.strings.nbytes + sum(
+            array.nbytes for name, array in self.arrays().items()
+            if name not in ('string_table', 'string_offsets')
+        )
+
+    # ---- rows -------------------------------------------------------------
+
+    def movie(self, i: int) -> Movie:
+        return Movie(self, i)
+
+    def movies(self, ids: Optional[np.ndarray] = None) -> MovieList:
+        """The movies at ``ids`` (all of them by default)"""
+        if ids is None:
+            ids = np.arange(len(self), dtype=np.int32)
+        return MovieList(self, ids)
+
+    def titles(self) -> List[str]:
+        return self.strings.slice(0, len(self))
+
+    def year_name(self, i: int) -> Optional[str]:
+        year = int(self.years[i])
+        return None if year == MISSING_YEAR else str(year)
+
+    def genres_of(self, i: int) -> List[str]:
+        """Genre names of movie ``i`` (shared between movies; do not modify)"""
+        if self._combo_lists is None:
+            offsets = self.combo_offsets.tolist()
+            genre_ids = self.combo_genre_ids.tolist()
+            self._combo_lists = [
+                [self.genre_names[g] for g in genre_ids[start:end]]
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+        return self._combo_lists[self.combo[i]]
+
+    # ---- genre bitsets ----------------------------------------------------
+
+    def combo_masks(self) -> np.ndarray:
+        """Genre bitset of each distinct genre combination (rows of ``combo``)"""
+        if self._combo_masks is None:
+            self._combo_masks = genre_bitsets(
+                self.combo_offsets, self.combo_genre_ids, len(self.genre_names)
+            )
+        return self._combo_masks
+
+    def genre_mask(self, genres) -> Optional[np.ndarray]:
+        """Bitset row for a set of genre names, or None if one of them is unknown"""
+        mask = np.zeros(self.genre_masks.shape[1], dtype=np.uint64)
+        for genre in genres:
+            g = self.genre_id.get(genre)
+            if g is None:
+                return None
+            mask[g // MASK_BITS] |= np.uint64(1 << (g % MASK_BITS))
+        return mask
+
+    def match_genres(self, genres, match_all: bool = True,
+                     ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean array: movies (all, or those at ``ids``) with all (or any) of ``genres``"""
+        masks = self.genre_masks if ids is None else self.genre_masks[ids]
+        if match_all:
+            mask = self.genre_mask(genres)
+            if mask is None:
+                return np.zeros(len(masks), dtype=bool)
+            return ((masks & mask) == mask).all(axis=1)
+
+        mask = self.genre_mask([genre for genre in genres if genre in self.genre_id])
+        return (masks & mask).any(axis=1)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a (rows, words) uint64 bitset array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).sum(axis=-1, dtype=np.int64)
+    masks = np.ascontiguousarray(masks)
+    return _BYTE_BITS[masks.view(np.uint8)].reshape(masks.shape[:-1] + (-1,)).sum(axis=-1)
+
+
+_BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+def genre_bitsets(offsets, genre_ids, n_genres):
+    """One genre bitset per row of a CSR list of genre ids (combinations, or movies)"""
+    words = max(1, -(-n_genres // MASK_BITS))
+    masks = np.zeros((len(offsets) - 1, words), dtype=np.uint64)
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    genre_ids = genre_ids.astype(np.int64)
+    np.bitwise_or.at(
+        masks,
+        (rows, genre_ids // MASK_BITS),
+        np.left_shift(np.uint64(1), (genre_ids % MASK_BITS).astype(np.uint64))
+    )
+    return masks
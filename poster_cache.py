@@ -0,0 +1,304 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+import instrument
+from poster_http import PosterClient
+from thumbnails import THUMBNAIL_SIZES, ThumbnailPool, wrap_rgb
+
+log = logging.getLogger(__name__)
+
+
+class PosterCache:
+    """Content-addressed on-disk poster cache with an in-memory thumbnail LRU.
+
+    Each poster URL maps to a SHA-1 key. The original download and every
+    thumbnail size the app asks for are stored under that key, so a warm
+    cache serves thumbnails without touching the network or decoding the
+    full-size image. Entries older than ``max_age`` are revalidated with
+    ETag/Last-Modified before being reused, and the least recently used
+    entries are evicted once the directory grows past ``max_bytes``.
+
+    New thumbnails are rendered by ``thumbnails`` (a ThumbnailPool); every
+    size in THUMBNAIL_SIZES is made from the same decode, so the card and
+    popup posters cost one download and one decode between them.
+    Downloads go through ``client`` (a pooled, retrying PosterClient whose
+    negative cache of dead URLs is saved with the index).
+    """
+
+    INDEX_FILE = "index.json"
+    DEAD_FILE = "dead_urls.json"
+
+    def __init__(self, directory="poster_cache", max_bytes=200 * 1024 * 1024,
+                 memory_items=512, max_age=7 * 24 * 3600, thumbnails=None, client=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.max_age = max_age
+        self.thumbnails = thumbnails if thumbnails is not None else ThumbnailPool(workers=0)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One index write at a time, in snapshot order
+        self._memory = OrderedDict()   # (url, size) -> PIL image
+        self._entries = OrderedDict()  # key -> metadata, least recently used first
+        self._total_bytes = 0
+        self._dirty = 0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "not_modified": 0,
+            "evictions": 0,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.client = client if client is not None else PosterClient(
+            dead_path=os.path.join(self.directory, self.DEAD_FILE)
+        )
+        self._load_index()
+
+    # ---- public API -------------------------------------------------------
+
+    def get_image(self, url, size, timeout=10):
+        """Return a resized RGB poster, downloading it only when needed"""
+        image = self._memory_get(url, size)
+        instrument.hit("poster_cache.memory", image is not None)
+        if image is not None:
+            return image
+
+        key = self.key_for(url)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and not self._is_stale(entry):
+            with instrument.span("poster_cache.disk_read"):
+                image = self._load_thumbnail(url, key, entry, size)
+            instrument.hit("poster_cache.disk", image is not None)
+            if image is not None:
+                self._count("disk_hits")
+                self._memory_put(url, size, image)
+                return image
+
+        with instrument.span("poster_cache.download"):
+            data = self._download(url, key, entry, timeout)
+        return self._make_thumbnail(url, key, data, size)
+
+    def hit_ratio(self):
+        """Fraction of lookups served without a download"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["not_modified"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def total_bytes(self):
+        return self._total_bytes
+
+    def flush(self):
+        """Write the cache index (and the client's dead URLs) to disk if they changed"""
+        self.client.save_dead()
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Entries are updated in place by other threads while we write
+                index = copy.deepcopy(self._entries)
+                self._dirty = 0
+
+            path = os.path.join(self.directory, self.INDEX_FILE)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                with self._lock:
+                    self._dirty += 1  # Try again on the next flush
+                raise
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    # ---- memory LRU -------------------------------------------------------
+
+    def _memory_get(self, url, size):
+        with self._lock:
+            image = self._memory.get((url, size))
+            if image is not None:
+                self._memory.move_to_end((url, size))
+                self.stats["memory_hits"] += 1
+            return image
+
+    def _memory_put(self, url, size, image):
+        with self._lock:
+            self._memory[(url, size)] = image
+            self._memory.move_to_end((url, size))
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    # ---- disk store -------------------------------------------------------
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    @staticmethod
+    def _size_suffix(size):
+        return f"_{size[0]}x{size[1]}.jpg"
+
+    def _load_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            with open(path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for key, entry in sorted(index.items(), key=lambda item: item[1].get("accessed", 0)):
+            if not os.path.exists(self._path(key, ".orig")):
+                continue
+            self._entries[key] = entry
+            self._total_bytes += entry.get("bytes", 0)
+
+    def _is_stale(self, entry):
+        return time.time() - entry.get("fetched", 0) > self.max_age
+
+    def _load_thumbnail(self, url, key, entry, size):
+        suffix = self._size_suffix(size)
+        if suffix not in entry.get("files", {}):
+            # Full-size copy is on disk, only this thumbnail size is new
+            try:
+                with open(self._path(key, ".orig"), "rb") as f:
+                    return self._make_thumbnail(url, key, f.read(), size)
+            except OSError:
+                return None
+
+        try:
+            image = Image.open(self._path(key, suffix))
+            image.load()
+        except OSError:
+            return None
+
+        self._touch(key)
+        return image
+
+    def _download(self, url, key, entry, timeout):
+        """Fetch the poster, revalidating a stale entry when we have one"""
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.client.get(url, timeout=timeout, headers=headers)
+
+        if entry is not None and response.status_code == 304:
+            self._count("not_modified")
+            with self._lock:
+                entry["fetched"] = time.time()
+                self._dirty += 1
+            with open(self._path(key, ".orig"), "rb") as f:
+                return f.read()
+
+        response.raise_for_status()
+        self._count("revalidated" if entry is not None else "misses")
+        if entry is not None:
+            self._remove(key)
+
+        data = response.content
+        self._write(key, ".orig", data)
+        with self._lock:
+            self._entries[key] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "accessed": time.time(),
+                "files": {".orig": len(data)},
+                "bytes": len(data),
+            }
+            self._total_bytes += len(data)
+            self._dirty += 1
+        self._evict()
+        return data
+
+    def _make_thumbnail(self, url, key, data, size):
+        """Decode the full-size poster once and store every thumbnail size made from it"""
+        sizes = tuple(dict.fromkeys((size,) + THUMBNAIL_SIZES))
+        image = None
+        for made_size, rgb, jpeg in self.thumbnails.render(data, sizes):
+            suffix = self._size_suffix(made_size)
+            self._write(key, suffix, jpeg)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry["bytes"] += len(jpeg) - entry["files"].get(suffix, 0)
+                    self._total_bytes += len(jpeg) - entry["files"].get(suffix, 0)
+                    entry["files"][suffix] = len(jpeg)
+                    self._dirty += 1
+
+            thumbnail = wrap_rgb(made_size, rgb)
+            self._memory_put(url, made_size, thumbnail)
+            if made_size == size:
+                image = thumbnail
+        self._touch(key)
+        return image
+
+    def _write(self, key, suffix, data):
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["accessed"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty += 1
+            flush = self._dirty >= 100
+        if flush:
+            try:
+                self.flush()
+            except OSError:
+                # The poster itself is fine; the index is rewritten on a later flush
+                log.exception("Could not write the poster cache index")
+
+    def _remove(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._total_bytes -= entry.get("bytes", 0)
+            self._dirty += 1
+
+        for suffix in entry.get("files", {}):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or len(self._entries) <= 1:
+                    return
+                key = next(iter(self._entries))
+                self.stats["evictions"] += 1
+            self._remove(key)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
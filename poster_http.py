@@ -0,0 +1,188 @@
+"""Shared HTTP client for poster downloads.
+
+One ``requests.Session`` keeps connections alive and pools them per host,
+with at most ``per_host`` requests in flight to any one host. Connects time
+out quickly, and connection errors or 429/5xx answers are retried a bounded
+number of times with exponential backoff. URLs that turned out to be dead
+(404/410, or still failing after the retries) go into a negative cache and
+are not requested again until their TTL runs out; it is saved next to the
+poster cache so a restart does not retry them either. Request latencies and
+outcomes are kept as counters.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrument
+
+CONNECT_TIMEOUT = 3.05  # Seconds; the read timeout is per request
+RETRIES = 2
+BACKOFF = 0.25  # Seconds before the first retry, doubling after that
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEAD_STATUSES = (404, 410)
+DEAD_TTL = 24 * 3600  # URLs that answered 404/410
+ERROR_TTL = 10 * 60   # URLs that kept failing (timeouts, refused connections, 5xx)
+LATENCY_SAMPLES = 1024
+
+
+class DeadPosterError(requests.RequestException):
+    """The URL is in the negative cache; no request was made"""
+
+
+class PosterClient:
+    """Pooled, retrying HTTP GETs with a negative cache of dead URLs"""
+
+    def __init__(self, per_host=4, retries=RETRIES, dead_path=None):
+        self.per_host = per_host
+        self.dead_path = dead_path
+
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=BACKOFF, status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}), raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=per_host, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Saves write in the order they snapshot
+        self._hosts = {}  # host -> semaphore limiting requests in flight
+        self._dead = {}   # url -> time.time() until which it is not retried
+        self._dead_dirty = False
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "not_modified": 0,
+            "failures": 0,
+            "dead_skipped": 0,
+        }
+        self._load_dead()
+
+    def get(self, url, timeout=10, headers=None):
+        """GET ``url``; raises DeadPosterError for URLs known to be dead"""
+        dead = self.is_dead(url)
+        instrument.hit("http.dead_urls", dead)
+        if dead:
+            self._count("dead_skipped")
+            raise DeadPosterError(url)
+
+        self._count("requests")
+        start = time.perf_counter()
+        try:
+            with self._host_slot(url), instrument.span("http.get"):
+                response = self.session.get(url, timeout=(CONNECT_TIMEOUT, timeout), headers=headers)
+        except requests.RequestException:
+            self._failed(url, ERROR_TTL, start)
+            raise
+
+        if response.status_code in DEAD_STATUSES:
+            self._failed(url, DEAD_TTL, start)
+        elif response.status_code >= 400:
+            self._failed(url, ERROR_TTL, start)
+        else:
+            self._count("not_modified" if response.status_code == 304 else "ok")
+            self._latencies.append(time.perf_counter() - start)
+        return response
+
+    def is_dead(self, url):
+        with self._lock:
+            until = self._dead.get(url)
+            if until is None:
+                return False
+            if until > time.time():
+                return True
+            del self._dead[url]
+            self._dead_dirty = True
+            return False
+
+    def failure_rate(self):
+        """Fraction of requests made that failed"""
+        with self._lock:
+            requests_made = self.stats["requests"]
+            return self.stats["failures"] / requests_made if requests_made else 0.0
+
+    def latency_percentiles(self):
+        """p50/p90/p99 latency in ms of recent requests, failed ones included"""
+        samples = sorted(self._latencies)
+        if not samples:
+            return {}
+        return {
+            f"p{p}_ms": samples[min(len(samples) - 1, len(samples) * p // 100)] * 1000
+            for p in (50, 90, 99)
+        }
+
+    def save_dead(self):
+        """Write the negative cache to ``dead_path`` if it changed"""
+        if self.dead_path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dead_dirty:
+                    return
+                now = time.time()
+                dead = {url: until for url, until in self._dead.items() if until > now}
+                self._dead_dirty = False
+
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=os.path.basename(self.dead_path) + ".",
+                suffix=".tmp",
+                dir=os.path.dirname(self.dead_path) or "."
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(dead, f)
+                os.replace(tmp_path, self.dead_path)
+            except BaseException:
+                with self._lock:
+                    self._dead_dirty = True
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    def close(self):
+        self.session.close()
+
+    def _load_dead(self):
+        if self.dead_path is None:
+            return
+        try:
+            with open(self.dead_path, "r") as f:
+                dead = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self._dead = {url: until for url, until in dead.items() if until > now}
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+        return slot
+
+    def _failed(self, url, ttl, start):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._dead[url] = time.time() + ttl
+            self._dead_dirty = True
+        self._latencies.append(time.perf_counter() - start)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
@@ -0,0 +1,179 @@
+import itertools
+import queue
+import threading
+
+from PIL import ImageTk
+
+import instrument
+from ui_scheduler import LOW, UIScheduler
+
+
+class PosterTicket:
+    """Handle for a queued poster download"""
+
+    __slots__ = ("url", "size", "callback", "generation", "priority", "state", "warm")
+
+    PENDING, RUNNING, DONE, CANCELLED = range(4)
+
+    def __init__(self, url, size, callback, generation, priority, warm=False):
+        self.url = url
+        self.size = size
+        self.callback = callback
+        self.generation = generation  # None: pinned, only cancelled through the ticket
+        self.priority = priority
+        self.state = PosterTicket.PENDING
+        self.warm = warm  # Only fill the cache; the callback gets True/False, not a photo
+
+    def cancel(self):
+        """Stop the download (if still queued) and drop its result"""
+        if self.state != PosterTicket.DONE:
+            self.state = PosterTicket.CANCELLED
+
+    @property
+    def pending(self):
+        return self.state == PosterTicket.PENDING
+
+
+class PosterLoader:
+    """Download and decode posters on a bounded pool of background threads.
+
+    Jobs are served lowest priority number first, so visible cards can jump
+    the queue. Decoded images are handed back to Tk through a result queue
+    that is drained as low-priority ``scheduler`` work, one PhotoImage per
+    slice, so list updates and input come first; PhotoImage objects are only
+    ever created on the Tk thread.
+
+    ``cancel_all`` drops the requests of the list being replaced. Pinned
+    requests (e.g. the random-pick popup, which outlives list changes) are
+    left alone; cancel them through their ticket.
+    """
+
+    def __init__(self, root, cache, workers=8, poll_ms=30, max_per_poll=12, scheduler=None):
+        self.root = root
+        self.cache = cache
+        self.scheduler = scheduler or UIScheduler(root)
+        self.poll_ms = poll_ms
+        self.max_per_poll = max_per_poll
+        self._jobs = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._closed = False
+
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"poster-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        self.root.after(self.poll_ms, self._drain)
+
+    def request(self, url, size, callback, priority=0, pinned=False):
+        """Queue a poster; ``callback(photo_or_None)`` runs on the Tk thread"""
+        instrument.count("posters.requested")
+        ticket = PosterTicket(url, size, callback, self._ticket_generation(pinned), priority)
+        self._jobs.put((priority, next(self._seq), ticket))
+        return ticket
+
+    def warm(self, url, size, callback, priority, pinned=False):
+        """Queue a poster only to fill the cache; ``callback(ok)`` runs on the Tk thread"""
+        ticket = PosterTicket(url, size, callback, self._ticket_generation(pinned), priority, warm=True)
+        self._jobs.put((priority, next(self._seq), ticket))
+        return ticket
+
+    def bump(self, ticket, priority):
+        """Move a still-queued ticket up the queue (e.g. its card scrolled into view)"""
+        if ticket.pending and priority < ticket.priority:
+            # The stale entry is skipped by the worker once the ticket has started
+            ticket.priority = priority
+            self._jobs.put((priority, next(self._seq), ticket))
+
+    def cancel_all(self, pinned=False):
+        """Cancel every queued and in-flight request (e.g. when the genre changes).
+
+        Pinned requests are kept unless ``pinned`` is True.
+        """
+        self._generation += 1
+        kept = []
+        try:
+            while True:
+                job = self._jobs.get_nowait()
+                ticket = job[2]
+                if ticket is not None and ticket.generation is None and not pinned:
+                    kept.append(job)
+                elif ticket is not None:
+                    ticket.cancel()
+        except queue.Empty:
+            pass
+        for job in kept:
+            self._jobs.put(job)
+
+    def close(self):
+        """Stop the worker threads"""
+        self._closed = True
+        self.cancel_all(pinned=True)
+        for _ in self._threads:
+            self._jobs.put((float("-inf"), next(self._seq), None))
+
+    def is_live(self, ticket):
+        """False once the ticket was cancelled or outlived by cancel_all"""
+        if ticket.state == PosterTicket.CANCELLED or self._closed:
+            return False
+        return ticket.generation is None or ticket.generation == self._generation
+
+    def _ticket_generation(self, pinned):
+        return None if pinned else self._generation
+
+    def _worker(self):
+        while True:
+            _, _, ticket = self._jobs.get()
+            if ticket is None:
+                return
+            if not ticket.pending or not self.is_live(ticket):
+                continue
+            ticket.state = PosterTicket.RUNNING
+
+            try:
+                with instrument.span("posters.fetch", warm=ticket.warm):
+                    image = self.fetch(ticket.url, ticket.size)
+            except Exception:
+                instrument.count("posters.failed")
+                image = None
+            self._results.put((ticket, image))
+
+    def fetch(self, url, size):
+        """Load a single resized poster through the cache (runs on a worker thread)"""
+        return self.cache.get_image(url, size, timeout=10)
+
+    def _drain(self):
+        self.scheduler.submit(self._deliver(), LOW)
+
+    def _deliver(self):
+        """Hand finished posters to their callbacks on the Tk thread, one per slice"""
+        try:
+            for _ in range(self.max_per_poll):
+                try:
+                    ticket, image = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                if not self.is_live(ticket):
+                    continue
+                ticket.state = PosterTicket.DONE
+                if ticket.warm:
+                    result = image is not None
+                elif image is not None:
+                    with instrument.span("posters.photo_image"):
+                        result = ImageTk.PhotoImage(image)
+                else:
+                    result = None
+                try:
+                    ticket.callback(result)
+                except Exception:
+                    # The card was destroyed before its poster arrived
+                    pass
+                yield
+        finally:
+            # Keep polling even if this batch failed part way
+            if not self._closed:
+                self.root.after(self.poll_ms, self._drain)
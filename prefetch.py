@@ -0,0 +1,107 @@
+"""Background poster prefetching within a concurrency and rate budget.
+
+Two kinds of work, most urgent first:
+
+* scroll-ahead: posters of the cards just past the rendered rows in the
+  direction the list is scrolling, replaced on every scroll;
+* idle: posters of likely next picks (top-scored titles of the largest
+  genres), only started once the user has not scrolled for a while.
+
+Prefetches go through the shared PosterLoader as cache-warming tickets
+queued behind every card request, so they never delay a poster that is on
+screen. At most ``max_in_flight`` run at once (the loader keeps its other
+workers for visible cards) and at most ``per_second`` start per second.
+"""
+import time
+from collections import deque
+from functools import partial
+
+from thumbnails import CARD_SIZE
+
+PREFETCH_PRIORITY = 1 << 30  # Behind every card, whose priority is at most its list index
+PUMP_MS = 100  # How often queued prefetches are reconsidered
+IDLE_AFTER_MS = 1500  # Quiet time before idle prefetching starts
+
+
+class PosterPrefetcher:
+    """Warms the poster cache for cards the user is likely to see next"""
+
+    def __init__(self, root, loader, size=CARD_SIZE, max_in_flight=2, per_second=8):
+        self.root = root
+        self.loader = loader
+        self.size = size
+        self.max_in_flight = max_in_flight
+        self.per_second = per_second
+
+        self._ahead = deque()  # Scroll-ahead URLs, nearest first
+        self._idle = deque()   # Idle-time URLs
+        self._done = set()     # URLs warmed this session; failed ones may be tried again
+        self._tickets = []
+        self._starts = deque()  # Start times within the last second, for the rate budget
+        self._last_activity = time.monotonic()
+        self._pump_after = None
+
+        self.stats = {"started": 0, "warmed": 0, "failed": 0}
+
+    def prefetch_ahead(self, urls):
+        """Replace the scroll-ahead queue (nearest card first)"""
+        self._last_activity = time.monotonic()
+        self._ahead = deque(url for url in urls if url not in self._done)
+        self._schedule()
+
+    def prefetch_idle(self, urls):
+        """Replace the idle-time queue"""
+        self._idle = deque(url for url in urls if url not in self._done)
+        self._schedule()
+
+    def close(self):
+        if self._pump_after is not None:
+            self.root.after_cancel(self._pump_after)
+            self._pump_after = None
+        self._ahead.clear()
+        self._idle.clear()
+
+    def _schedule(self, delay=0):
+        if self._pump_after is None and (self._ahead or self._idle):
+            self._pump_after = self.root.after(delay, self._pump)
+
+    def _pump(self):
+        self._pump_after = None
+        now = time.monotonic()
+        while self._starts and now - self._starts[0] >= 1.0:
+            self._starts.popleft()
+        # Tickets dropped by cancel_all never call back, so count the live ones
+        self._tickets = [ticket for ticket in self._tickets
+                         if ticket.state in (ticket.PENDING, ticket.RUNNING)
+                         and self.loader.is_live(ticket)]
+
+        idle = (now - self._last_activity) * 1000 >= IDLE_AFTER_MS
+        while len(self._tickets) < self.max_in_flight and len(self._starts) < self.per_second:
+            url = self._next_url(idle)
+            if url is None:
+                break
+            self._starts.append(now)
+            self.stats["started"] += 1
+            callback = partial(self._finished, url)
+            self._tickets.append(self.loader.warm(url, self.size, callback, PREFETCH_PRIORITY))
+
+        if self._ahead or self._idle:
+            self._schedule(PUMP_MS)
+
+    def _next_url(self, idle):
+        queues = (self._ahead, self._idle) if idle else (self._ahead,)
+        in_flight = {ticket.url for ticket in self._tickets}
+        for urls in queues:
+            while urls:
+                url = urls.popleft()
+                if url not in self._done and url not in in_flight:
+                    return url
+        return None
+
+    def _finished(self, url, ok):
+        # Failed URLs are not marked done; PosterClient's negative cache keeps
+        # dead ones from being requested again
+        if ok:
+            self._done.add(url)
+        self.stats["warmed" if ok else "failed"] += 1
+        self._schedule()
@@ -0,0 +1,88 @@
+"""Random picks from a filtered slice of the catalog, uniform or weighted by score.
+
+A RandomPicker is built once per filter (the ids matching a MovieQuery) and
+then draws in O(1) when uniform, or O(log n) with a binary search over the
+cumulative score weights. Exclusions - the watchlist and recently shown
+picks - are handled by redrawing, falling back to an explicit scan only
+when nearly every candidate is excluded. Uids are hashed on demand: one
+per redraw, and once per candidate only in that fallback scan.
+"""
+import random
+from collections import deque
+
+import numpy as np
+
+from movie_table import movie_uid
+
+SCORE_WEIGHT_POWER = 2  # Weight is score ** power, so a 8.0 is ~1.8x as likely as a 6.0
+REDRAWS = 32  # Redraws before falling back to scanning the candidates
+
+
+class RandomPicker:
+    """Draws movie ids from a fixed candidate set"""
+
+    def __init__(self, table, ids, weighted=False, recent=None):
+        self.table = table
+        self.ids = ids
+        self.weighted = weighted
+        self.recent = recent if recent is not None else deque(maxlen=20)
+
+        self.cumulative = None
+        if weighted and len(ids):
+            weights = np.nan_to_num(table.scores[ids], nan=0.0).clip(min=0) ** SCORE_WEIGHT_POWER
+            if weights.sum() > 0:
+                self.cumulative = np.cumsum(weights)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def pick(self, rng=None, exclude_uids=()):
+        """A movie id whose uid is not in ``exclude_uids`` and not picked recently, or None"""
+        if not len(self.ids):
+            return None
+        rng = rng or random
+
+        for _ in range(REDRAWS):
+            i = int(self.ids[self._draw(rng)])
+            if i not in self.recent and not self._excluded(i, exclude_uids):
+                return self._remember(i)
+
+        # Almost everything is excluded: choose among what is left, and
+        # allow recent picks again rather than returning nothing
+        positions = self._allowed_positions(exclude_uids)
+        fresh = [p for p in positions if int(self.ids[p]) not in self.recent]
+        positions = fresh or positions
+        if not positions:
+            return None
+        weights = None
+        if self.cumulative is not None:
+            weights = [self._weight(p) for p in positions]
+            if not any(weights):
+                weights = None
+        p = rng.choices(positions, weights=weights)[0]
+        return self._remember(int(self.ids[p]))
+
+    def _draw(self, rng):
+        """Position of one candidate: uniform, or by binary search over the weights"""
+        if self.cumulative is None:
+            return rng.randrange(len(self.ids))
+        target = rng.random() * self.cumulative[-1]
+        return min(int(np.searchsorted(self.cumulative, target, 'right')), len(self.ids) - 1)
+
+    def _weight(self, position):
+        previous = self.cumulative[position - 1] if position else 0.0
+        return float(self.cumulative[position] - previous)
+
+    def _excluded(self, i, exclude_uids):
+        return bool(exclude_uids) and movie_uid(self.table.strings[i]) in exclude_uids
+
+    def _allowed_positions(self, exclude_uids):
+        """Positions of the candidates not in ``exclude_uids``, hashing each title once"""
+        if not exclude_uids:
+            return list(range(len(self.ids)))
+        strings = self.table.strings
+        return [p for p, i in enumerate(self.ids.tolist()) if movie_uid(strings[i]) not in exclude_uids]
+
+    def _remember(self, i):
+        self.recent.append(i)
+        return i
@@ -0,0 +1,286 @@
+"""In-memory title index behind the catalog's search box.
+
+``SearchIndex`` is built once from the catalog's titles and scores and
+answers ranked queries as positions into those titles. ``refine`` narrows
+a complete result for a query typed one character further without
+searching again. The trigram index for fuzzy matches is the slowest part
+to build, so it is made on first use (or ahead of time by
+``prepare_fuzzy``, which the catalog runs on a background thread).
+"""
+import re
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class SearchResults(list):
+    """Ranked title positions for a query.
+
+    ``complete`` is True when every exact (non-fuzzy) match is in the list,
+    which is what makes it safe to refine for a longer query.
+    """
+
+    def __init__(self, query, ids=(), complete=False):
+        super().__init__(ids)
+        self.query = query
+        self.complete = complete
+
+
+class SearchIndex:
+    """Prebuilt title index for ranked prefix, token, substring and fuzzy search.
+
+    Results are returned as positions into the ``titles`` sequence the index
+    was built from, best match first. Matches are tiered: whole-title prefix,
+    then titles containing every query word (the last word may be
+    incomplete, for search-as-you-type), then plain substring matches, then
+    typo-tolerant trigram matches. Within a tier, higher IMDB scores win.
+    """
+
+    def __init__(self, titles, scores, fuzzy=True):
+        self.size = len(titles)
+        self.lowered = [title.lower() for title in titles]
+        self.scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=0.0)
+        self.fuzzy = fuzzy
+
+        # Whole-title prefix lookups: bisect over the sorted lowercased titles
+        order = sorted(range(self.size), key=self.lowered.__getitem__)
+        self._sorted_titles = [self.lowered[i] for i in order]
+        self._sorted_ids = np.array(order, dtype=np.int32)
+
+        # Word index: token -> sorted array of title positions
+        postings = {}
+        for i, title in enumerate(self.lowered):
+            for token in set(TOKEN_RE.findall(title)):
+                postings.setdefault(token, []).append(i)
+        self._tokens = sorted(postings)
+        self._postings = [np.array(postings[token], dtype=np.int32) for token in self._tokens]
+
+        # Substring scan over one joined string instead of one `in` per title
+        self._blob = "\n".join(self.lowered)
+        self._starts = []
+        offset = 0
+        for title in self.lowered:
+            self._starts.append(offset)
+            offset += len(title) + 1
+
+        self._trigrams = None  # Built on first fuzzy search
+        self._trigrams_lock = threading.Lock()
+
+    def search(self, query, limit=200):
+        """Return up to ``limit`` title positions matching ``query``, best first"""
+        query = normalize(query)
+        results = SearchResults(query)
+        if not query or not self.size:
+            results.complete = True
+            return results
+
+        seen = set()
+
+        def take(ids, by_score=True):
+            if not by_score:
+                ids = [i for i in ids.tolist() if i not in seen][:limit - len(results)]
+            else:
+                ids = self._rank(ids, limit - len(results), seen)
+            for i in ids:
+                seen.add(i)
+                results.append(i)
+            return len(results) >= limit
+
+        if take(self._prefix_matches(query)):
+            return results
+        if take(self._token_matches(query)):
+            return results
+        if take(self._substring_matches(query, limit)):
+            return results
+
+        if results:
+            # Every exact match fitted under the limit
+            results.complete = True
+        elif self.fuzzy and len(query) >= 3:
+            # Nothing matched exactly, so fall back to typo-tolerant matches
+            # (already ordered by similarity)
+            take(self._fuzzy_matches(query, limit), by_score=False)
+        return results
+
+    def refine(self, previous, query, limit=200):
+        """Narrow complete results for a query that extends ``previous.query``.
+
+        Each exact tier of the longer query only matches titles the shorter
+        query matched, so only the previous results need to be rechecked.
+        """
+        query = normalize(query)
+        words = TOKEN_RE.findall(query)
+        partial_last = bool(words) and query.endswith(words[-1])
+
+        tiers = ([], [], [])
+        for i in previous:
+            tier = self._tier(i, query, words, partial_last)
+            if tier is not None:
+                tiers[tier].append(i)
+        if not any(tiers):
+            # No exact match left; search falls back to fuzzy matching
+            return self.search(query, limit)
+        ranked = [i for ids in tiers for i in self._ordered(ids).tolist()]
+        return SearchResults(query, ranked[:limit], complete=len(ranked) < limit)
+
+    def _tier(self, i, query, words, partial_last):
+        """Which exact tier title ``i`` matches ``query`` in, or None"""
+        title = self.lowered[i]
+        if title.startswith(query):
+            return 0
+        if words:
+            tokens = set(TOKEN_RE.findall(title))
+            if all(word in tokens for word in words[:-1]):
+                last = words[-1]
+                if (any(token.startswith(last) for token in tokens) if partial_last
+                        else last in tokens):
+                    return 1
+        if query in title:
+            return 2
+        return None
+
+    # ---- tiers ------------------------------------------------------------
+
+    def _prefix_matches(self, query):
+        lo = bisect_left(self._sorted_titles, query)
+        hi = bisect_left(self._sorted_titles, _prefix_end(query), lo)
+        return self._sorted_ids[lo:hi]
+
+    def _token_matches(self, query):
+        words = TOKEN_RE.findall(query)
+        if not words:
+            return np.empty(0, dtype=np.int32)
+
+        # Every word but the last must match a whole token
+        sets = []
+        for word in words[:-1]:
+            pos = bisect_left(self._tokens, word)
+            if pos == len(self._tokens) or self._tokens[pos] != word:
+                return np.empty(0, dtype=np.int32)
+            sets.append(self._postings[pos])
+
+        # The last word may still be being typed
+        last = words[-1]
+        if query.endswith(last):
+            lo = bisect_left(self._tokens, last)
+            hi = bisect_left(self._tokens, _prefix_end(last), lo)
+        else:
+            lo = bisect_left(self._tokens, last)
+            hi = lo + 1 if lo < len(self._tokens) and self._tokens[lo] == last else lo
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+        if hi - lo == 1:
+            sets.append(self._postings[lo])
+        else:
+            sets.append(np.unique(np.concatenate(self._postings[lo:hi])))
+
+        sets.sort(key=len)
+        matches = sets[0]
+        for other in sets[1:]:
+            matches = np.intersect1d(matches, other, assume_unique=True)
+            if not len(matches):
+                break
+        return matches
+
+    def _substring_matches(self, query, limit):
+        """Titles containing the query anywhere (the old linear search semantics)"""
+        if "\n" in query:
+            return []
+        matches = []
+        blob = self._blob
+        starts = self._starts
+        pos = blob.find(query)
+        # Scan a few pages past the limit so higher-scored matches can win
+        while pos != -1 and len(matches) < limit * 4:
+            i = bisect_right(starts, pos) - 1
+            matches.append(i)
+            next_start = starts[i + 1] if i + 1 < len(starts) else len(blob)
+            pos = blob.find(query, next_start)
+        return np.array(matches, dtype=np.int32)
+
+    def _fuzzy_matches(self, query, limit, threshold=0.34):
+        """Typo-tolerant matches: enough shared trigrams, ranked by Jaccard similarity"""
+        grams, offsets, ids, counts = self.prepare_fuzzy()
+
+        query_grams = _trigrams(query)
+        postings = []
+        for gram in query_grams:
+            pos = bisect_left(grams, gram)
+            if pos < len(grams) and grams[pos] == gram:
+                postings.append(ids[offsets[pos]:offsets[pos + 1]])
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+
+        candidates, shared = np.unique(np.concatenate(postings), return_counts=True)
+        keep = shared >= threshold * len(query_grams)
+        candidates, shared = candidates[keep], shared[keep]
+        similarity = shared / (len(query_grams) + counts[candidates] - shared)
+        best = np.argsort(-similarity, kind="stable")[:limit]
+        return candidates[best]
+
+    def prepare_fuzzy(self):
+        """Build the trigram index (also done lazily by the first fuzzy search)"""
+        trigrams = self._trigrams
+        if trigrams is None:
+            # A search can arrive while the background build is still running
+            with self._trigrams_lock:
+                if self._trigrams is None:
+                    self._trigrams = self._build_trigrams()
+                trigrams = self._trigrams
+        return trigrams
+
+    def _build_trigrams(self):
+        pairs = {}
+        counts = np.zeros(self.size, dtype=np.int32)
+        for i, title in enumerate(self.lowered):
+            title_grams = _trigrams(title)
+            counts[i] = len(title_grams)
+            for gram in title_grams:
+                pairs.setdefault(gram, []).append(i)
+
+        grams = sorted(pairs)
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(pairs[gram]) for gram in grams], out=offsets[1:])
+        ids = np.fromiter(
+            (i for gram in grams for i in pairs[gram]), dtype=np.int32, count=int(offsets[-1])
+        )
+        return grams, offsets, ids, counts
+
+    # ---- ranking ----------------------------------------------------------
+
+    def _rank(self, ids, count, seen):
+        """Best ``count`` ids not already returned, in ``_ordered`` order"""
+        if count <= 0 or not len(ids):
+            return []
+        ids = np.asarray(ids, dtype=np.int32)
+        keep = count + len(seen)
+        if len(ids) > keep:
+            # Only the top slice needs a full sort; ties with its lowest score stay in
+            scores = self.scores[ids]
+            cutoff = np.partition(scores, len(ids) - keep)[len(ids) - keep]
+            ids = ids[scores >= cutoff]
+        ranked = [i for i in self._ordered(ids).tolist() if i not in seen]
+        return ranked[:count]
+
+    def _ordered(self, ids):
+        """``ids`` best first within a tier: higher score, then lower position"""
+        ids = np.asarray(ids, dtype=np.int32)
+        return ids[np.lexsort((ids, -self.scores[ids]))]
+
+
+def normalize(query):
+    """Lowercase and collapse whitespace the way the index stores titles"""
+    return " ".join(query.lower().split())
+
+
+def _prefix_end(prefix):
+    """Smallest string greater than every string starting with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,115 @@
+"""Content-based "more like this" recommendations.
+
+Similarity between two movies is a weighted blend of the Jaccard index of
+their genre sets, how close their IMDB scores are and how close their years
+are. None of the three needs a per-movie loop: Jaccard only depends on the
+genre combination (a few thousand distinct bitsets), and scores and years
+only take a few hundred distinct values. Each part is computed on those
+small tables with bitset/NumPy ops for every seed at once and then gathered
+for the whole catalog, which is what lets a whole watchlist be scored in a
+single pass. Top-k results for single movies are cached.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import instrument
+from movie_table import MISSING_YEAR, popcount
+
+GENRE_WEIGHT = 0.7
+SCORE_WEIGHT = 0.2
+YEAR_WEIGHT = 0.1
+SCORE_RANGE = 10.0  # Score gap at which score similarity reaches 0
+YEAR_SCALE = 10.0   # Year gap at which year similarity falls to 1/e
+SEED_BLOCK = 256    # Seed genre combinations compared per step (bounds temporary memory)
+
+
+class SimilarityIndex:
+    """Ranks movies by genre, score and year similarity to one or more seeds"""
+
+    def __init__(self, table, cache_size=256):
+        self.table = table
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (seed id, k) -> (ids, similarities)
+        self._lock = threading.Lock()
+
+        self._combo_masks = table.combo_masks()
+        self._combo_sizes = popcount(self._combo_masks)
+
+        # Distinct values and, for every movie, which one it has
+        scores = np.nan_to_num(table.scores, nan=-1.0)
+        self._scores, self._score_of = np.unique(scores, return_inverse=True)
+        self._years, self._year_of = np.unique(table.years, return_inverse=True)
+
+    def similar(self, ids, k=10, exclude=()):
+        """Top ``k`` movies most like the seed ``ids`` (best first) and their similarities.
+
+        With several seeds a movie's similarity is its mean similarity to
+        them. The seeds themselves and ids in ``exclude`` are never returned.
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(ids) or not len(self.table) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        key = (int(ids[0]), k) if len(ids) == 1 and not len(exclude) else None
+        if key is not None:
+            with self._lock:
+                cached = self._cache.get(key)
+                instrument.hit("similar.cache", cached is not None)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    return cached
+
+        similarity = self.similarities(ids)
+        similarity[ids] = -np.inf
+        if len(exclude):
+            similarity[np.asarray(exclude, dtype=np.int64)] = -np.inf
+
+        k = min(k, len(similarity))
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top], kind='stable')]
+        top = top[np.isfinite(similarity[top])]
+        result = (top, similarity[top])
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def similarities(self, ids):
+        """Similarity of every movie to the seeds, averaged over the seeds"""
+        table = self.table
+
+        # Genres: Jaccard between every combination and each distinct seed combination
+        seed_combos, combo_counts = np.unique(table.combo[ids], return_counts=True)
+        masks = self._combo_masks
+        genre = np.zeros(len(masks))
+        for start in range(0, len(seed_combos), SEED_BLOCK):
+            block = seed_combos[start:start + SEED_BLOCK]
+            shared = popcount(masks[:, None, :] & masks[block][None, :, :])
+            union = self._combo_sizes[:, None] + self._combo_sizes[block][None, :] - shared
+            jaccard = np.divide(shared, union, out=np.zeros(shared.shape), where=union > 0)
+            genre += jaccard @ (combo_counts[start:start + SEED_BLOCK] / len(ids))
+
+        # Scores: linear falloff, missing scores are never close
+        seed_scores, score_counts = np.unique(self._score_of[ids], return_counts=True)
+        gap = np.abs(self._scores[:, None] - self._scores[seed_scores][None, :])
+        closeness = np.clip(1 - gap / SCORE_RANGE, 0, None)
+        closeness[self._scores < 0] = 0
+        closeness[:, self._scores[seed_scores] < 0] = 0
+        score = closeness @ (score_counts / len(ids))
+
+        # Years: exponential falloff, missing years are never close
+        seed_years, year_counts = np.unique(self._year_of[ids], return_counts=True)
+        gap = np.abs(self._years[:, None].astype(np.float64) - self._years[seed_years][None, :])
+        closeness = np.exp(-gap / YEAR_SCALE)
+        closeness[self._years == MISSING_YEAR] = 0
+        closeness[:, self._years[seed_years] == MISSING_YEAR] = 0
+        year = closeness @ (year_counts / len(ids))
+
+        return (GENRE_WEIGHT * genre[table.combo]
+                + SCORE_WEIGHT * score[self._score_of]
+                + YEAR_WEIGHT * year[self._year_of])
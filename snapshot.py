@@ -0,0 +1,240 @@
+"""Versioned, memory-mappable snapshot of the cleaned movie catalog.
+
+Layout::
+
+    MAGIC | header length (uint32 LE) | JSON header | padding | arrays...
+
+The JSON header records the snapshot version, the CSV it was built from
+(size, mtime and SHA-1) and the dtype/offset/length of every array. Arrays
+are 8-byte aligned so they can be wrapped with ``numpy.frombuffer`` straight
+out of an ``mmap`` without copying.
+
+The arrays are exactly the columns of a ``movie_table.MovieTable`` (one
+string table for titles, poster URLs and genre names, typed score/year
+arrays, genre combinations and bitsets) plus each genre's distinct movie
+ids in ascending order, so a warm start wraps the mapped file instead of
+rebuilding Python objects.
+Strings are only decoded when a movie is actually read.
+
+``SnapshotWriter`` writes the same file from arrays that arrive in chunks
+(each spooled to a temporary file), for catalogs too large to hold in memory.
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from movie_table import MovieTable
+
+SNAPSHOT_VERSION = 3
+MAGIC = b"BBSNAP\x00\x01"
+ALIGN = 8
+
+
+def snapshot_path(csv_path):
+    """Where the snapshot for a CSV file lives"""
+    return os.path.splitext(csv_path)[0] + ".bbsnap"
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_info(csv_path, sha1=None):
+    stat = os.stat(csv_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": sha1 if sha1 is not None else file_sha1(csv_path),
+    }
+
+
+def write_snapshot(path, csv_path, table, genre_index, build_seconds=None):
+    """Write a MovieTable and its genre index as a columnar snapshot, atomically"""
+    genre_movies = [genre_index[genre] for genre in table.genre_names]
+    arrays = dict(table.arrays())
+    arrays["genre_movie_offsets"] = _csr_offsets(genre_movies)
+    arrays["genre_movie_ids"] = (
+        np.concatenate(genre_movies).astype(np.int32) if genre_movies else np.empty(0, np.int32)
+    )
+
+    header = _header(csv_path, build_seconds, len(table), len(table.genre_names))
+    columns = [
+        (name, array.dtype, int(array.size), lambda f, array=array: f.write(array.tobytes()))
+        for name, array in arrays.items()
+    ]
+    _write_file(path, header, columns)
+
+
+class SnapshotWriter:
+    """Writes a snapshot whose arrays are appended chunk by chunk.
+
+    Each array is spooled to its own temporary file next to the snapshot
+    and copied into place by ``commit``, so memory use is bounded by the
+    largest chunk rather than the catalog.
+    """
+
+    def __init__(self, path, csv_path, sha1=None):
+        self.path = path
+        self.csv_path = csv_path
+        self.sha1 = sha1
+        self._spools = {}  # name -> [dtype, element count, temporary file]
+
+    def append(self, name, chunk):
+        """Add ``chunk`` to the end of array ``name`` (created with the chunk's dtype)"""
+        chunk = np.ascontiguousarray(chunk)
+        spool = self._spools.get(name)
+        if spool is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            spool = self._spools[name] = [chunk.dtype, 0, tempfile.TemporaryFile(dir=directory)]
+        elif chunk.dtype != spool[0]:
+            chunk = chunk.astype(spool[0])
+        spool[1] += int(chunk.size)
+        spool[2].write(chunk.tobytes())
+
+    def commit(self, movies, genres, build_seconds=None):
+        """Assemble the spooled arrays into the snapshot file, atomically"""
+        header = _header(self.csv_path, build_seconds, movies, genres, self.sha1)
+        columns = [
+            (name, dtype, count, lambda f, spool=spool: _copy_spool(spool, f))
+            for name, (dtype, count, spool) in self._spools.items()
+        ]
+        _write_file(self.path, header, columns)
+
+    def close(self):
+        for _, _, spool in self._spools.values():
+            spool.close()
+        self._spools.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _header(csv_path, build_seconds, movies, genres, sha1=None):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created": time.time(),
+        "source": source_info(csv_path, sha1),
+        "build_seconds": build_seconds,
+        "movies": movies,
+        "genres": genres,
+        "arrays": {},
+    }
+
+
+def _write_file(path, header, columns):
+    """Write the header and ``columns`` ((name, dtype, count, write(f)) each) to ``path``"""
+    # Array offsets are relative to the (aligned) end of the header
+    layout = []
+    offset = 0
+    for name, dtype, count, write in columns:
+        offset = _align(offset)
+        header["arrays"][name] = [np.dtype(dtype).str, offset, count]
+        layout.append((offset, write))
+        offset += count * np.dtype(dtype).itemsize
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+    header_bytes = header_bytes.ljust(data_start - len(MAGIC) - 4, b" ")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for array_offset, write in layout:
+                f.write(b"\x00" * (data_start + array_offset - f.tell()))
+                write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _copy_spool(spool, f):
+    spool.seek(0)
+    shutil.copyfileobj(spool, f, 1 << 20)
+
+
+def open_snapshot(path):
+    """Map a snapshot file and return (header, {name: read-only array})"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a BingeBuddy snapshot")
+    (header_len,) = struct.unpack_from("<I", mapped, len(MAGIC))
+    header_end = len(MAGIC) + 4 + header_len
+    header = json.loads(mapped[len(MAGIC) + 4:header_end])
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("Snapshot version mismatch")
+
+    data_start = _align(header_end)
+    arrays = {
+        name: np.frombuffer(mapped, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+        for name, (dtype, offset, count) in header["arrays"].items()
+    }
+    return header, arrays
+
+
+def is_fresh(header, csv_path):
+    """True if the snapshot was built from the current contents of csv_path"""
+    source = header.get("source", {})
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return False
+    if stat.st_size != source.get("size"):
+        return False
+    if stat.st_mtime_ns == source.get("mtime_ns"):
+        return True
+    # Touched but maybe not changed (e.g. re-downloaded): fall back to the hash
+    return file_sha1(csv_path) == source.get("sha1")
+
+
+def load_snapshot(path, csv_path):
+    """Return (MovieTable, genre index, header) from a fresh snapshot, or None.
+
+    The table's arrays stay backed by the mapped file, so nothing but the
+    genre names is decoded up front.
+    """
+    try:
+        header, arrays = open_snapshot(path)
+    except (OSError, ValueError):
+        return None
+    if not is_fresh(header, csv_path):
+        return None
+
+    table = MovieTable.from_arrays(arrays)
+    offsets = arrays["genre_movie_offsets"].tolist()
+    genre_movie_ids = arrays["genre_movie_ids"]
+    genre_index = {
+        genre: genre_movie_ids[start:end]
+        for genre, start, end in zip(table.genre_names, offsets[:-1], offsets[1:])
+    }
+    return table, genre_index, header
+
+
+def _csr_offsets(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(items) for items in lists], out=offsets[1:])
+    return offsets
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
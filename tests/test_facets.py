@@ -0,0 +1,102 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from facets import FacetIndex, MovieQuery
+from movie_table import MISSING_YEAR, MovieTable
+
+GENRES = ["Drama", "Comedy", "Horror", "Western"]
+
+
+@pytest.fixture(scope="module")
+def facets():
+    rng = random.Random(11)
+    n = 2000
+    movie_genres = [rng.sample(range(len(GENRES)), rng.choice([1, 1, 2, 3])) for _ in range(n)]
+    # Coarse values, so ties are common; some scores and years are missing
+    scores = [float("nan") if rng.random() < 0.05 else rng.choice([4.0, 5.5, 6.0, 7.5, 9.0])
+              for _ in range(n)]
+    years = [MISSING_YEAR if rng.random() < 0.05 else rng.randint(1990, 1999) for _ in range(n)]
+    table = MovieTable.from_columns(
+        [f"Movie {i}" for i in range(n)], [f"http://p/{i}.jpg" for i in range(n)],
+        scores, years, movie_genres, GENRES
+    )
+    genre_index = {
+        name: np.array([i for i, ids in enumerate(movie_genres) if g in ids], dtype=np.int32)
+        for g, name in enumerate(GENRES)
+    }
+    return FacetIndex(table, genre_index), movie_genres, scores, years
+
+
+def expected(facets, query):
+    """Brute force over every movie: filter, then sort with missing values last and ties by id"""
+    index, movie_genres, scores, years = facets
+    wanted = {GENRES.index(genre) for genre in query.genres if genre in GENRES}
+    if query.match_all and len(wanted) < len(query.genres):
+        return []
+    columns = {'score': scores, 'year': [math.nan if y == MISSING_YEAR else y for y in years]}
+
+    def keep(i):
+        genres = set(movie_genres[i])
+        if query.genres and not (wanted <= genres if query.match_all else wanted & genres):
+            return False
+        for key in columns:
+            low, high = query.bounds(key)
+            value = columns[key][i]
+            if (low is not None or high is not None) and math.isnan(value):
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    def sort_key(i):
+        value = columns[query.sort][i]
+        if math.isnan(value):
+            return (1, 0, i)
+        return (0, -value if query.descending else value, i)
+
+    return sorted(filter(keep, range(len(movie_genres))), key=sort_key)
+
+
+QUERIES = [
+    MovieQuery(),
+    MovieQuery(["Drama"]),
+    MovieQuery(["Drama"], sort='year', descending=False),
+    MovieQuery(["Drama", "Comedy"]),
+    MovieQuery(["Drama", "Horror"], match_all=False, sort='year'),
+    MovieQuery(["Western"], min_score=5.5, max_score=7.5),
+    MovieQuery(["Comedy"], min_score=6.0, min_year=1993, max_year=1996, descending=False),
+    MovieQuery(["Comedy", "Horror", "Western"], match_all=False, max_year=1991, sort='year'),
+    MovieQuery(min_year=1995),
+    MovieQuery(["Drama", "Sci-Fi"]),
+    MovieQuery(["Drama", "Sci-Fi"], match_all=False, min_score=9.0),
+    MovieQuery(min_score=9.5),
+]
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=repr)
+@pytest.mark.parametrize("size", [1, 7, 50, 5000])
+def test_pages_cover_the_matches_in_order(facets, query, size):
+    index = facets[0]
+    want = expected(facets, query)
+    got = []
+    number = 0
+    while True:
+        page = index.page(query, number, size)
+        assert len(page) <= size
+        assert page.has_next == (len(want) > (number + 1) * size)
+        got.extend(page.ids.tolist())
+        if not page.has_next:
+            break
+        number += 1
+    assert got == want
+    assert page.total == index.count(query) == len(want)
+    assert page.pages == max(1, -(-len(want) // size))
+    assert index.matching(query).tolist() == want
+
+
+def test_page_past_the_end_is_empty(facets):
+    page = facets[0].page(MovieQuery(["Western"]), number=10_000, size=50)
+    assert len(page) == 0 and not page.has_next
@@ -0,0 +1,108 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import ingest
+from benchmarks.synthetic import generate_csv
+from catalog import Catalog
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    """A CSV, and a longer one that starts with exactly the same bytes"""
+    full = tmp_path / "full.csv"
+    generate_csv(str(full), 3000, seed=5)
+    lines = full.read_bytes().splitlines(keepends=True)
+    part = tmp_path / "MovieGenre.csv"
+    part.write_bytes(b"".join(lines[:1800]))
+    return str(part), full.read_bytes()
+
+
+def count_blocks(monkeypatch):
+    blocks = []
+    add_block = ingest.MovieStore._add_block
+
+    def counted(store, raw, encoding):
+        blocks.append(raw.count(b"\n") - 1)  # Rows, without the repeated header
+        return add_block(store, raw, encoding)
+
+    monkeypatch.setattr(ingest.MovieStore, "_add_block", counted)
+    return blocks
+
+
+def same_catalog(a, b):
+    assert a.table.titles() == b.table.titles()
+    np.testing.assert_array_equal(a.table.scores, b.table.scores)
+    assert a.genres() == b.genres()
+    for genre in a.genres():
+        np.testing.assert_array_equal(a.genre_index[genre], b.genre_index[genre])
+
+
+def test_resume_only_parses_appended_rows(csv_files, monkeypatch):
+    path, full = csv_files
+    store = ingest.store_path(path)
+    with ingest.MovieStore(store) as movies:
+        movies.ingest(path, block_bytes=32 << 10)
+
+    with open(path, "rb") as f:
+        ingested = f.read().count(b"\n")
+    with open(path, "wb") as f:
+        f.write(full)
+    blocks = count_blocks(monkeypatch)
+    with ingest.MovieStore(store) as movies:
+        movies.ingest(path, block_bytes=32 << 10)
+    assert sum(blocks) == full.count(b"\n") - ingested
+
+    monkeypatch.undo()
+    resumed = Catalog.load(path, use_snapshot=False, streaming=True)
+    shutil.copy(path, path + ".copy.csv")
+    fresh = Catalog.load(path + ".copy.csv", use_snapshot=False, streaming=False)
+    same_catalog(resumed, fresh)
+
+
+def test_changed_rows_start_over(csv_files, monkeypatch):
+    path, full = csv_files
+    store = ingest.store_path(path)
+    with ingest.MovieStore(store) as movies:
+        movies.ingest(path)
+
+    # Same length, but an earlier row changed: nothing ingested can be trusted
+    data = bytearray(full[:len(open(path, "rb").read())])
+    data[200:203] = b"Zzz"
+    with open(path, "wb") as f:
+        f.write(bytes(data))
+    blocks = count_blocks(monkeypatch)
+    with ingest.MovieStore(store) as movies:
+        movies.ingest(path)
+    assert sum(blocks) == data.count(b"\n") - 1
+
+
+def test_interrupted_ingest_resumes_from_the_last_block(csv_files, monkeypatch):
+    path, full = csv_files
+    with open(path, "wb") as f:
+        f.write(full)
+    store = ingest.store_path(path)
+    add_block = ingest.MovieStore._add_block
+    calls = []
+
+    def failing(movies, raw, encoding):
+        calls.append(raw)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return add_block(movies, raw, encoding)
+
+    monkeypatch.setattr(ingest.MovieStore, "_add_block", failing)
+    with pytest.raises(KeyboardInterrupt), ingest.MovieStore(store) as movies:
+        movies.ingest(path, block_bytes=32 << 10)
+    monkeypatch.undo()
+
+    blocks = count_blocks(monkeypatch)
+    with ingest.MovieStore(store) as movies:
+        movies.ingest(path, block_bytes=32 << 10)
+    assert sum(blocks) == full.count(b"\n") - 1 - sum(raw.count(b"\n") - 1 for raw in calls[:2])
+
+    monkeypatch.undo()
+    shutil.copy(path, path + ".copy.csv")
+    same_catalog(Catalog.load(path, use_snapshot=False, streaming=True),
+                 Catalog.load(path + ".copy.csv", use_snapshot=False, streaming=False))
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from posters import PosterLoader
+from ui_scheduler import UIScheduler
+
+
+class FakeRoot:
+    """Just enough of Tk's ``after`` to pump the loader from the test thread"""
+
+    def __init__(self):
+        self.calls = []
+
+    def after(self, ms, callback):
+        self.calls.append(callback)
+        return len(self.calls)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def pump(self):
+        calls, self.calls = self.calls, []
+        for callback in calls:
+            callback()
+
+
+class FakeCache:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def get_image(self, url, size, timeout=10):
+        self.release.wait(5)
+        return None  # A failed download: request callbacks get None, warm ones False
+
+
+def pump_until(root, done, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        root.pump()
+        time.sleep(0.005)
+
+
+def make_loader():
+    root = FakeRoot()
+    cache = FakeCache()
+    loader = PosterLoader(root, cache, workers=2, poll_ms=1, scheduler=UIScheduler(root))
+    return root, cache, loader
+
+
+def test_cancel_all_keeps_pinned_tickets():
+    root, cache, loader = make_loader()
+    results = {}
+    loader.request("http://p/popup.jpg", (10, 10), lambda photo: results.setdefault("popup", photo),
+                   pinned=True)
+    loader.warm("http://p/next.jpg", (10, 10), lambda ok: results.setdefault("next", ok), 0, pinned=True)
+    loader.request("http://p/card.jpg", (10, 10), lambda photo: results.setdefault("card", photo))
+
+    loader.cancel_all()  # E.g. a search keystroke replaced the list
+    cache.release.set()
+    pump_until(root, lambda: len(results) == 2)
+    time.sleep(0.05)
+    root.pump()
+    assert results == {"popup": None, "next": False}
+    loader.close()
+
+
+def test_pinned_tickets_are_cancelled_through_the_ticket_or_close():
+    root, cache, loader = make_loader()
+    results = []
+    ticket = loader.request("http://p/a.jpg", (10, 10), results.append, pinned=True)
+    other = loader.request("http://p/b.jpg", (10, 10), results.append, pinned=True)
+    ticket.cancel()
+    loader.close()
+    cache.release.set()
+    time.sleep(0.05)
+    root.pump()
+    assert results == []
+    assert not loader.is_live(other)
@@ -0,0 +1,60 @@
+import random
+from collections import deque
+
+import numpy as np
+
+from movie_table import MISSING_YEAR, MovieTable, movie_uid
+from sampler import RandomPicker
+
+
+def make_table(n):
+    titles = [f"Movie {i} ({1990 + i % 30})" for i in range(n)]
+    return MovieTable.from_columns(
+        titles, [f"http://posters/{i}.jpg" for i in range(n)], [5 + i % 5 for i in range(n)],
+        [MISSING_YEAR] * n, [[0]] * n, ["Drama"]
+    )
+
+
+def uids(table, ids):
+    return {movie_uid(table.strings[i]) for i in ids}
+
+
+def test_never_picks_excluded_uids():
+    table = make_table(200)
+    ids = np.arange(200, dtype=np.int32)
+    excluded = uids(table, range(0, 200, 2))
+    for weighted in (False, True):
+        picker = RandomPicker(table, ids, weighted, recent=deque(maxlen=0))
+        rng = random.Random(1)
+        picks = {picker.pick(rng, excluded) for _ in range(500)}
+        assert picks and all(i % 2 for i in picks)
+
+
+def test_falls_back_to_the_only_candidates_left():
+    table = make_table(500)
+    ids = np.arange(100, 500, dtype=np.int32)
+    left = {137, 421}
+    excluded = uids(table, set(ids.tolist()) - left)
+    picker = RandomPicker(table, ids, weighted=True, recent=deque(maxlen=0))
+    rng = random.Random(2)
+    assert {picker.pick(rng, excluded) for _ in range(50)} == left
+
+
+def test_everything_excluded_returns_none():
+    table = make_table(50)
+    ids = np.arange(50, dtype=np.int32)
+    picker = RandomPicker(table, ids)
+    assert picker.pick(random.Random(3), uids(table, range(50))) is None
+
+
+def test_recent_picks_are_skipped_until_nothing_else_is_left():
+    table = make_table(10)
+    ids = np.arange(10, dtype=np.int32)
+    picker = RandomPicker(table, ids, recent=deque(maxlen=5))
+    rng = random.Random(4)
+    picks = [picker.pick(rng) for _ in range(5)]
+    assert len(set(picks)) == 5
+
+    # Only recent picks remain after the exclusions, so one of them is reused
+    excluded = uids(table, set(range(10)) - set(picks[:2]))
+    assert picker.pick(rng, excluded) in picks[:2]
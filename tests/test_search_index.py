@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from search_index import SearchIndex
+
+WORDS = ["star", "stars", "start", "war", "wars", "the", "return", "night", "knight",
+         "dark", "darkness", "story", "toy", "man", "iron", "spider", "a", "new", "hope"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = random.Random(7)
+    titles = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + f" ({1950 + i % 70})"
+              for i in range(3000)]
+    # Few distinct scores, so most matches tie and the tie-break is exercised
+    scores = [rng.choice([5.0, 6.5, 7.0, 8.5, float("nan")]) for _ in titles]
+    return SearchIndex(titles, scores)
+
+
+@pytest.mark.parametrize("query", ["s", "st", "star", "star w", "star wars", "the d", "the dark k",
+                                   "i", "iron m", "ar", "ars", "a n", "a new h"])
+@pytest.mark.parametrize("limit", [20, 200, 5000])
+def test_refine_matches_search(index, query, limit):
+    for cut in range(1, len(query)):
+        previous = index.search(query[:cut], limit)
+        if not previous.complete:
+            continue
+        refined = index.refine(previous, query, limit)
+        expected = index.search(query, limit)
+        assert list(refined) == list(expected)
+        assert refined.complete == expected.complete
+
+
+def test_search_orders_ties_by_position(index):
+    results = index.search("star", 5000)
+    scores = index.scores[results]
+    for a, b, score_a, score_b in zip(results, results[1:], scores, scores[1:]):
+        if score_a == score_b and index._tier(a, "star", ["star"], True) == index._tier(b, "star", ["star"], True):
+            assert a < b
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+import snapshot
+from benchmarks.synthetic import generate_csv
+from catalog import Catalog
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "MovieGenre.csv")
+    generate_csv(path, 500, seed=3)
+    return path
+
+
+def load(csv_path):
+    return snapshot.load_snapshot(snapshot.snapshot_path(csv_path), csv_path)
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+
+def test_warm_start_reads_the_snapshot(csv_path):
+    cold = Catalog.load(csv_path)
+    assert not cold.warm and os.path.exists(snapshot.snapshot_path(csv_path))
+    warm = Catalog.load(csv_path)
+    assert warm.warm
+    assert warm.table.titles() == cold.table.titles()
+    np.testing.assert_array_equal(warm.table.scores, cold.table.scores)
+    assert warm.genres() == cold.genres()
+
+
+def test_touched_but_unchanged_csv_is_still_fresh(csv_path):
+    Catalog.load(csv_path)
+    bump_mtime(csv_path)
+    assert load(csv_path) is not None
+
+
+def test_edited_csv_of_the_same_size_is_stale(csv_path):
+    Catalog.load(csv_path)
+    with open(csv_path, "rb") as f:
+        data = bytearray(f.read())
+    data[-10] = ord("Z") if data[-10] != ord("Z") else ord("Y")
+    with open(csv_path, "wb") as f:
+        f.write(data)
+    bump_mtime(csv_path)
+    assert load(csv_path) is None
+    assert not Catalog.load(csv_path).warm
+
+
+def test_grown_csv_is_stale(csv_path):
+    Catalog.load(csv_path)
+    with open(csv_path, "a", encoding="latin-1") as f:
+        f.write("1,http://www.imdb.com/title/tt1,New Movie (2017),7.0,Drama,http://p/new.jpg\n")
+    assert load(csv_path) is None
+    catalog = Catalog.load(csv_path)
+    assert not catalog.warm and "New Movie (2017)" in catalog.table.titles()
+    assert Catalog.load(csv_path).warm
+
+
+def test_missing_csv_is_stale(csv_path):
+    Catalog.load(csv_path)
+    os.remove(csv_path)
+    assert load(csv_path) is None
+
+
+def test_other_versions_and_garbage_are_ignored(csv_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION - 1)
+    Catalog.load(csv_path)
+    monkeypatch.undo()
+    assert load(csv_path) is None
+
+    with open(snapshot.snapshot_path(csv_path), "wb") as f:
+        f.write(b"not a snapshot")
+    assert load(csv_path) is None
+    assert not Catalog.load(csv_path).warm
@@ -0,0 +1,80 @@
+import json
+import sqlite3
+
+from catalog import Watchlist
+from movie_table import movie_uid
+
+MOVIES = [
+    {"title": "Toy Story (1995)", "score": 8.3, "year": "1995", "poster": "http://p/1.jpg",
+     "genres": ["Animation", "Comedy"]},
+    {"title": "Heat (1995)", "score": 8.2, "year": "1995", "poster": "http://p/2.jpg",
+     "genres": ["Crime"]},
+    {"title": "Alien (1979)", "score": 8.5, "year": "1979", "poster": "http://p/3.jpg",
+     "genres": ["Horror", "Sci-Fi"]},
+]
+
+
+def user_version(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        db.close()
+
+
+def assert_migrated(path):
+    watchlist = Watchlist(path, legacy_path=None).load()
+    try:
+        assert [movie["title"] for movie in watchlist] == [movie["title"] for movie in MOVIES]
+        assert watchlist.uids() == {movie_uid(movie["title"]) for movie in MOVIES}
+        assert all(movie["uid"] == movie_uid(movie["title"]) for movie in watchlist)
+        assert list(watchlist)[2]["genres"] == ["Horror", "Sci-Fi"]
+    finally:
+        watchlist.close()
+    assert user_version(path) == Watchlist.SCHEMA_VERSION == 2
+
+
+def test_imports_legacy_json(tmp_path):
+    legacy = tmp_path / "watchlist.json"
+    # A duplicate title in the old list is kept once, at its first position
+    legacy.write_text(json.dumps(MOVIES + MOVIES[:1]))
+    path = str(tmp_path / "watchlist.db")
+
+    Watchlist(path, legacy_path=str(legacy)).load().close()
+    assert_migrated(path)
+
+
+def test_migrates_title_keyed_table(tmp_path):
+    path = str(tmp_path / "watchlist.db")
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("CREATE TABLE watchlist ("
+                   "title TEXT PRIMARY KEY, position INTEGER NOT NULL, movie TEXT NOT NULL)")
+        db.executemany(
+            "INSERT INTO watchlist (title, position, movie) VALUES (?, ?, ?)",
+            [(movie["title"], position, json.dumps(movie)) for position, movie in enumerate(MOVIES)]
+        )
+        db.execute("PRAGMA user_version = 1")
+    db.close()
+
+    Watchlist(path, legacy_path=None).load().close()
+    assert_migrated(path)
+    db = sqlite3.connect(path)
+    tables = {name for name, in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    db.close()
+    assert "watchlist" not in tables
+
+
+def test_migration_runs_once(tmp_path):
+    legacy = tmp_path / "watchlist.json"
+    legacy.write_text(json.dumps(MOVIES))
+    path = str(tmp_path / "watchlist.db")
+
+    watchlist = Watchlist(path, legacy_path=str(legacy)).load()
+    watchlist.remove(movie_uid(MOVIES[0]["title"]))
+    watchlist.close()
+
+    # The JSON file is still there, but is not imported again
+    watchlist = Watchlist(path, legacy_path=str(legacy)).load()
+    assert len(watchlist) == 2
+    watchlist.close()
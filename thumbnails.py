@@ -0,0 +1,147 @@
+"""Poster thumbnails: draft-mode JPEG decoding and resizing on a process pool.
+
+Decoding a full-size poster and resampling it is the CPU-heavy part of
+showing a card, and threads cannot spread it over cores because of the GIL.
+``render_thumbnails`` asks libjpeg for a reduced decode (``Image.draft``
+picks the smallest 1/2, 1/4 or 1/8 DCT scale that is still at least as large
+as the biggest thumbnail) and cuts every requested size from that single
+decode. ``ThumbnailPool`` runs it in worker processes and hands back raw RGB
+buffers, which the UI thread only has to wrap, plus the JPEG bytes that the
+disk cache stores.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image
+
+import instrument
+
+CARD_SIZE = (90, 135)
+POPUP_SIZE = (150, 225)
+THUMBNAIL_SIZES = (CARD_SIZE, POPUP_SIZE)  # Made together from every decode
+JPEG_QUALITY = 90
+REDUCING_GAP = 3.0  # Integer pre-reduction before LANCZOS for non-JPEG sources
+
+
+def default_workers():
+    """Leave a core for the UI thread"""
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def render_thumbnails(data, sizes=THUMBNAIL_SIZES):
+    """Decode an image once and return ``[(size, rgb bytes, jpeg bytes)]`` for every size"""
+    image = Image.open(BytesIO(data))
+    sizes = sorted(set(sizes), key=lambda size: size[0] * size[1], reverse=True)
+    image.draft("RGB", sizes[0])  # JPEG only; other formats ignore it
+    image = image.convert("RGB")
+
+    thumbnails = []
+    for size in sizes:
+        thumbnail = image.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+        buffer = BytesIO()
+        thumbnail.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+        thumbnails.append((size, thumbnail.tobytes(), buffer.getvalue()))
+    return thumbnails
+
+
+def wrap_rgb(size, rgb):
+    """A PIL image over a buffer from ``render_thumbnails`` (no copy)"""
+    return Image.frombuffer("RGB", size, rgb, "raw", "RGB", 0, 1)
+
+
+class ThumbnailPool:
+    """Runs ``render_thumbnails`` on a pool of worker processes.
+
+    ``render`` blocks only the calling (poster worker) thread. With
+    ``workers=0``, or if worker processes cannot be started, thumbnails are
+    rendered on the calling thread instead. ``stats`` counts decodes and
+    thumbnails and the wall time during which any render was in flight.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = default_workers() if workers is None else workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._busy_since = 0.0
+
+        self.stats = {
+            "decodes": 0,
+            "thumbnails": 0,
+            "busy_seconds": 0.0,
+            "in_thread": 0,
+        }
+
+    def render(self, data, sizes=THUMBNAIL_SIZES):
+        """``[(size, rgb bytes, jpeg bytes)]`` for every size, from one decode of ``data``"""
+        self._begin()
+        thumbnails = []
+        try:
+            with instrument.span("thumbnails.render", sizes=len(sizes)):
+                thumbnails = self._render(data, sizes)
+            return thumbnails
+        finally:
+            self._end(len(thumbnails))
+
+    def thumbnails_per_second(self):
+        """Thumbnails made per second of wall time spent rendering"""
+        with self._lock:
+            busy = self.stats["busy_seconds"]
+            if self._active:
+                busy += time.perf_counter() - self._busy_since
+            return self.stats["thumbnails"] / busy if busy else 0.0
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render(self, data, sizes):
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return executor.submit(render_thumbnails, data, sizes).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed); start a fresh pool next time
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+        with self._lock:
+            self.stats["in_thread"] += 1
+        return render_thumbnails(data, sizes)
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    # spawn, not fork: the parent runs Tk and several threads
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                except (OSError, ImportError, NotImplementedError):
+                    # No process support here (e.g. no sem_open); render in-thread from now on
+                    self.workers = 0
+            return self._executor
+
+    def _begin(self):
+        with self._lock:
+            if not self._active:
+                self._busy_since = time.perf_counter()
+            self._active += 1
+
+    def _end(self, thumbnails):
+        with self._lock:
+            self._active -= 1
+            if not self._active:
+                self.stats["busy_seconds"] += time.perf_counter() - self._busy_since
+            if thumbnails:
+                self.stats["decodes"] += 1
+                self.stats["thumbnails"] += thumbnails
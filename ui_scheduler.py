@@ -0,0 +1,118 @@
+"""Cooperative, time-sliced scheduler for work that has to run on the Tk thread.
+
+Widget creation, list updates and poster hand-off must happen on the Tk
+thread, and one long callback there freezes input. Work is submitted as a
+generator, where every ``yield`` marks a point where it can pause, or as a
+plain callable (a single slice). Each tick runs slices, most urgent priority
+first, until the frame budget (8ms by default) is spent, then gives the
+event loop a turn with ``after(1)`` before continuing, so clicks and key
+presses are handled between ticks however much work is queued.
+
+``submit`` returns a CancelToken; pass one token to several submissions to
+cancel them together (e.g. everything feeding a list that has since been
+replaced).
+"""
+import heapq
+import itertools
+import sys
+import time
+
+import instrument
+
+HIGH, NORMAL, LOW = range(3)  # Lower runs first
+FRAME_BUDGET_MS = 8
+
+
+class CancelToken:
+    """Shared cancellation flag for scheduled work"""
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class UIScheduler:
+    """Runs submitted work in slices of at most ``budget_ms`` per event-loop turn"""
+
+    def __init__(self, root, budget_ms=FRAME_BUDGET_MS):
+        self.root = root
+        self.budget = budget_ms / 1000
+        self._queue = []  # (priority, seq, generator, token)
+        self._seq = itertools.count()
+        self._tick_after = None
+        self._tick_start = None
+
+        self.stats = {"ticks": 0, "slices": 0, "over_budget": 0, "cancelled": 0}
+
+    def submit(self, work, priority=NORMAL, token=None):
+        """Queue a generator (one slice per ``next``) or a callable; returns its token"""
+        token = token or CancelToken()
+        if not hasattr(work, "__next__"):
+            work = _single_slice(work)
+        heapq.heappush(self._queue, (priority, next(self._seq), work, token))
+        self._schedule()
+        return token
+
+    def in_budget(self):
+        """True while the current tick still has time (always True outside a tick)"""
+        return self._tick_start is None or time.perf_counter() - self._tick_start < self.budget
+
+    def pending(self):
+        return len(self._queue)
+
+    def cancel_all(self):
+        for _, _, _, token in self._queue:
+            token.cancel()
+
+    def close(self):
+        self.cancel_all()
+        self._queue.clear()
+        if self._tick_after is not None:
+            self.root.after_cancel(self._tick_after)
+            self._tick_after = None
+
+    def _schedule(self):
+        if self._tick_after is None and self._queue:
+            # 1ms rather than after_idle, so pending input is handled first
+            self._tick_after = self.root.after(1, self._tick)
+
+    def _tick(self):
+        self._tick_after = None
+        self._tick_start = start = time.perf_counter()
+        self.stats["ticks"] += 1
+        try:
+            while self._queue and time.perf_counter() - start < self.budget:
+                priority, seq, work, token = self._queue[0]
+                if token.cancelled:
+                    heapq.heappop(self._queue)
+                    self.stats["cancelled"] += 1
+                    continue
+                self.stats["slices"] += 1
+                try:
+                    next(work)
+                except StopIteration:
+                    heapq.heappop(self._queue)
+                except Exception:
+                    # One broken task must not stall the rest of the queue, but
+                    # its traceback goes where Tk reports callback errors
+                    heapq.heappop(self._queue)
+                    instrument.count("ui_scheduler.errors")
+                    self.root.report_callback_exception(*sys.exc_info())
+                # Otherwise the task keeps its place and continues next slice
+        finally:
+            elapsed = time.perf_counter() - start
+            self._tick_start = None
+            if elapsed > self.budget * 2:
+                self.stats["over_budget"] += 1
+            instrument.observe("ui_scheduler.tick_ms", elapsed * 1000)
+            self._schedule()
+
+
+def _single_slice(callable_):
+    callable_()
+    return
+    yield  # Makes this a generator that finishes on its first slice
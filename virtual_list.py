@@ -0,0 +1,200 @@
+import itertools
+import time
+
+from ui_scheduler import HIGH
+
+
+class VirtualList:
+    """Windowed list view that only materialises the rows on screen.
+
+    The list is drawn into ``frame`` (a window item on ``canvas``) which is
+    kept exactly the size of the visible canvas. Instead of scrolling the
+    canvas, the list tracks a virtual pixel offset and ``place``s a small
+    pool of fixed-height rows at their on-screen position. Rows that scroll
+    out of the viewport (plus ``overscan`` rows either side) are recycled
+    for the rows scrolling in, so widget count is O(viewport), not
+    O(len(items)).
+
+    ``make_row(parent)`` builds a row object with a ``widget`` attribute and
+    ``bind_row(row, item, index, visible)`` points an existing row at a new
+    item.
+
+    Building a row is far slower than rebinding one. With a ``scheduler``,
+    ``render`` stops building new rows once the scheduler's frame budget is
+    used up, visible rows first, and leaves the rest to a scheduled render.
+    """
+
+    SCROLL_UNIT = 40  # Pixels per wheel notch / arrow click
+
+    def __init__(self, canvas, frame, scrollbar, row_height, make_row, bind_row,
+                 overscan=3, on_render=None, scheduler=None):
+        self.canvas = canvas
+        self.frame = frame
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.overscan = overscan
+        self.on_render = on_render
+        self.scheduler = scheduler
+
+        self.items = []
+        self.offset = 0
+        self.rows = {}   # item index -> row currently showing it
+        self.spare = []  # rows not showing anything
+        self._pending = None
+        self._build_token = None  # Scheduled render finishing rows that were over budget
+
+        self.window_id = canvas.create_window((0, 0), window=frame, anchor="nw")
+        canvas.bind("<Configure>", self._on_resize)
+        scrollbar.configure(command=self.yview)
+
+        # Wheel events go to the widget under the pointer, so listen globally
+        # and only react when that widget lives inside our canvas
+        canvas.bind_all("<MouseWheel>", self._on_wheel, add="+")
+        canvas.bind_all("<Button-4>", self._on_wheel, add="+")
+        canvas.bind_all("<Button-5>", self._on_wheel, add="+")
+
+    def set_items(self, items, keep_offset=False):
+        """Show a new sequence of items, scrolled to the top unless ``keep_offset``"""
+        self.items = list(items)
+        if not keep_offset:
+            self.offset = 0
+        self._release(list(self.rows))
+        self.scroll_to(self.offset)
+        self.render()
+
+    def insert(self, index, item):
+        """Insert one item; rows below it keep their item and just move down"""
+        self.items.insert(index, item)
+        self.rows = {(i + 1 if i >= index else i): row for i, row in self.rows.items()}
+        self.render()
+
+    def remove(self, index):
+        """Remove one item; rows below it keep their item and just move up"""
+        del self.items[index]
+        if index in self.rows:
+            self._release([index])
+        self.rows = {(i - 1 if i > index else i): row for i, row in self.rows.items()}
+        self.scroll_to(self.offset)
+        self.render()
+
+    def extend(self, items):
+        """Append items without disturbing the rows already on screen"""
+        self.items.extend(items)
+        self.render()
+
+    def clear(self):
+        self.set_items([])
+
+    def visible_range(self):
+        """Indices of the items currently inside the viewport"""
+        height = self._viewport_height()
+        first = self.offset // self.row_height
+        last = min(len(self.items), (self.offset + height) // self.row_height + 1)
+        return range(first, last)
+
+    def visible_rows(self):
+        return [self.rows[i] for i in self.visible_range() if i in self.rows]
+
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self._total_height()))
+        elif args[0] == "scroll":
+            step = self._viewport_height() if args[2] == "pages" else self.SCROLL_UNIT
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self._total_height() - self._viewport_height())
+        offset = max(0, min(int(offset), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def render(self):
+        """Place the rows for the current offset, recycling the rest"""
+        height = self._viewport_height()
+        visible = self.visible_range()
+        start = max(0, visible.start - self.overscan)
+        stop = min(len(self.items), visible.stop + self.overscan)
+
+        self._release([i for i in self.rows if i < start or i >= stop])
+
+        deadline = time.perf_counter() + self.scheduler.budget if self.scheduler else None
+        deferred = False
+        # Visible rows first, so rows left for later are off screen where possible
+        order = itertools.chain(visible, range(start, visible.start), range(visible.stop, stop))
+        for index in order:
+            row = self.rows.get(index)
+            if row is None:
+                if self.spare:
+                    row = self.spare.pop()
+                elif deadline is not None and time.perf_counter() > deadline:
+                    deferred = True
+                    continue
+                else:
+                    row = self.make_row(self.frame)
+                self.rows[index] = row
+                self.bind_row(row, self.items[index], index, index in visible)
+            row.widget.place(
+                x=0,
+                y=index * self.row_height - self.offset,
+                relwidth=1.0,
+                height=self.row_height
+            )
+        if deferred:
+            self._schedule_build()
+
+        self._update_scrollbar(height)
+        if self.on_render:
+            self.on_render()
+
+    def _schedule_build(self):
+        if self._build_token is None:
+            self._build_token = self.scheduler.submit(self._build, HIGH)
+
+    def _build(self):
+        self._build_token = None
+        self.render()
+
+    def _release(self, indices):
+        for index in indices:
+            row = self.rows.pop(index)
+            row.widget.place_forget()
+            self.spare.append(row)
+
+    def _total_height(self):
+        return len(self.items) * self.row_height
+
+    def _viewport_height(self):
+        return max(1, self.canvas.winfo_height())
+
+    def _update_scrollbar(self, height):
+        total = self._total_height()
+        if total <= height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+    def _on_resize(self, event):
+        self.canvas.itemconfigure(self.window_id, width=event.width, height=event.height)
+        # Coalesce the burst of Configure events a window drag produces
+        if self._pending is None:
+            self._pending = self.canvas.after_idle(self._resized)
+
+    def _resized(self):
+        self._pending = None
+        self.scroll_to(self.offset)
+        self.render()
+
+    def _on_wheel(self, event):
+        path = str(event.widget)
+        canvas_path = str(self.canvas)
+        if path == canvas_path or path.startswith(canvas_path + "."):
+            if event.num == 4 or event.delta > 0:
+                self.yview("scroll", -1, "units")
+            elif event.num == 5 or event.delta < 0:
+                self.yview("scroll", 1, "units")